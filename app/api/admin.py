@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.api.deps import require_admin
+from app.db import get_async_db
+from app.models.request import Request
+from app.models.rescore import RescoreRun, RescoreStatus
+from app.schemas.rescore import RescoreJobRead, RescoreRunRead
+from app.services.jobs import enqueue
+from app.services.rescore import fail_stale_runs
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+def _job_response(run: RescoreRun, job) -> dict:
+    return {**RescoreRunRead.model_validate(run).model_dump(), "job_id": job.id}
+
+@router.post("/rescore", response_model=RescoreJobRead, status_code=202)
+async def start_rescore(db: AsyncSession = Depends(get_async_db)):
+    # Una ejecución que murió sin terminar no debe bloquear las nuevas
+    await run_in_threadpool(fail_stale_runs)
+    running = await db.scalar(select(RescoreRun).where(RescoreRun.status == RescoreStatus.running).limit(1))
+    if running:
+        raise HTTPException(status_code=409, detail=f"Rescore {running.id} is already running")
+
+    # La ejecución y su trabajo se crean en la misma transacción; el re-scoring
+    # lo corre un worker de la cola, no el proceso de la API
+    run = RescoreRun(
+        total=await db.scalar(select(func.count()).select_from(Request)), processed=0, updated=0, conflicts=0
+    )
+    db.add(run)
+    await db.flush()
+    job = await enqueue(db, "rescore", {"run_id": str(run.id)})
+    await db.commit()
+    await db.refresh(run)
+    return _job_response(run, job)
+
+@router.get("/rescore/{run_id}", response_model=RescoreRunRead)
+async def get_rescore(run_id: str, db: AsyncSession = Depends(get_async_db)):
+    run = await db.scalar(select(RescoreRun).where(RescoreRun.id == run_id))
+    if not run:
+        raise HTTPException(status_code=404, detail="Rescore run not found")
+    return run
+
+@router.post("/rescore/{run_id}/resume", response_model=RescoreJobRead, status_code=202)
+async def resume_rescore(run_id: str, db: AsyncSession = Depends(get_async_db)):
+    run = await db.scalar(select(RescoreRun).where(RescoreRun.id == run_id))
+    if not run:
+        raise HTTPException(status_code=404, detail="Rescore run not found")
+    if run.status == RescoreStatus.completed:
+        raise HTTPException(status_code=409, detail="Rescore run already completed")
+    # Una ejecución en running la está procesando otro proceso (o fail_stale_runs
+    # todavía no la dio por muerta)
+    if run.status == RescoreStatus.running:
+        raise HTTPException(status_code=409, detail="Rescore run is still running")
+
+    job = await enqueue(db, "rescore", {"run_id": str(run.id)})
+    await db.commit()
+    await db.refresh(run)
+    return _job_response(run, job)
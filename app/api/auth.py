@@ -1,24 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import get_async_db
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, LoginData, Token, UserRead
-from app.services.security import hash_password, verify_password, create_access_token
+from app.services.security import PasswordHasherBusy, create_access_token, password_hasher
 from datetime import timedelta
+import uuid
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
+def _too_many_requests() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many concurrent password operations, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserRead, status_code=201)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
+async def register(user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Solo bloquear cuando se intenta registrar admin y ya existe uno
     if user_in.role == UserRole.admin:
-        existing_admin = db.query(User).filter(User.role == UserRole.admin).first()
+        existing_admin = await db.scalar(select(User).where(User.role == UserRole.admin).limit(1))
         if existing_admin:
             raise HTTPException(status_code=403, detail="Ya existe un administrador")
 
     # Crear usuario normalmente
-    hashed_pw = get_password_hash(user_in.password)
+    try:
+        hashed_pw = await password_hasher.hash(user_in.password)
+    except PasswordHasherBusy:
+        raise _too_many_requests()
     user = User(
         id=uuid.uuid4(),
         email=user_in.email,
@@ -26,16 +39,27 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
         role=user_in.role,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @router.post("/login", response_model=Token)
-def login(data: LoginData, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
-    if not user or not verify_password(data.password, user.password_hash):
+async def login(data: LoginData, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == data.email))
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(data.password, user.password_hash)
+    except PasswordHasherBusy:
+        raise _too_many_requests()
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+
+    # Hash con un costo distinto al configurado: se actualiza de forma transparente
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
 
     token = create_access_token({"sub": str(user.id)}, expires_delta=timedelta(minutes=60))
     return {"access_token": token, "token_type": "bearer"}
@@ -1,72 +1,183 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.db import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import Request as HTTPRequest
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from app.api.responses import (
+    CACHE_CONTROL, check_if_match, conditional_json, not_modified, not_modified_response, rows_to_dicts,
+    version_etag,
+)
+from app.config import settings
+from app.db import get_async_db, get_read_db
 from app.models.company import Company
-from app.schemas.company import CompanyCreate, CompanyRead, CompanyUpdate
+from app.models.request import Request
+from app.schemas.common import TotalMode
+from app.schemas.company import CompanyBatchGet, CompanyCreate, CompanyRead, CompanySearchResult, CompanyUpdate
+from app.services import company_search
+from app.services.pagination import decode_cursor, encode_cursor, get_total
 from typing import List
+from uuid import UUID
 
 router = APIRouter(prefix="/companies", tags=["Companies"])
 
+COMPANY_COLUMNS = (Company.id, Company.name, Company.tax_id, Company.country, Company.created_at)
+
+
+def parse_ids(value: str) -> list[UUID]:
+    """Ids separados por coma (GET /companies?ids=a,b,c)."""
+    try:
+        ids = [UUID(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be comma-separated UUIDs")
+    if not ids:
+        raise HTTPException(status_code=422, detail="ids must not be empty")
+    if len(ids) > settings.COMPANY_BATCH_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {settings.COMPANY_BATCH_MAX_IDS} ids per request")
+    return ids
+
+
+async def companies_by_ids(db: AsyncSession, ids: list[UUID]) -> list[dict]:
+    """Una sola consulta por la PK; se devuelven en el orden pedido, sin los que no existen."""
+    unique = list(dict.fromkeys(ids))
+    rows = (await db.execute(select(*COMPANY_COLUMNS).where(Company.id.in_(unique)))).all()
+    by_id = {row.id: row for row in rows}
+    return rows_to_dicts(by_id[company_id] for company_id in unique if company_id in by_id)
+
+
 @router.post("/", response_model=CompanyRead, status_code=201)
-def create_company(company_in: CompanyCreate, db: Session = Depends(get_db)):
+async def create_company(company_in: CompanyCreate, db: AsyncSession = Depends(get_async_db)):
     company = Company(**company_in.dict())
     db.add(company)
-    db.commit()
-    db.refresh(company)
+    await db.commit()
+    await db.refresh(company)
     return company
 
 @router.get("/", response_model=List[CompanyRead])
-def list_companies(
-    db: Session = Depends(get_db),
+async def list_companies(
+    request: HTTPRequest,
+    db: AsyncSession = Depends(get_read_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     q: str | None = None,
-    order_by: str | None = None
+    order_by: str | None = None,
+    cursor: str | None = None,
+    total: TotalMode | None = None,
+    ids: str | None = Query(None, description="Ids separados por coma; ignora la paginación")
 ):
-    query = db.query(Company)
+    if ids:
+        return conditional_json(request, await companies_by_ids(db, parse_ids(ids)), {})
+
+    stmt = select(*COMPANY_COLUMNS)
     if q:
-        query = query.filter(Company.name.ilike(f"%{q}%"))
-    if order_by == "name":
-        query = query.order_by(Company.name.asc())
-    elif order_by == "-name":
-        query = query.order_by(Company.name.desc())
+        stmt = stmt.where(Company.name.ilike(f"%{q}%"))
+    headers = {}
+
+    if total:
+        count = await get_total(db, stmt, total.value, ("companies", q))
+        headers["X-Total-Count" if total == TotalMode.exact else "X-Total-Estimate"] = str(count)
+
+    # (name, id) como orden estable; por defecto ascendente
+    descending = order_by == "-name"
+    if descending:
+        stmt = stmt.order_by(Company.name.desc(), Company.id.desc())
+    else:
+        stmt = stmt.order_by(Company.name.asc(), Company.id.asc())
 
-    total = query.count()
-    companies = query.offset((page - 1) * page_size).limit(page_size).all()
-    return companies
+    if cursor:
+        try:
+            name, last_id = decode_cursor(cursor, 2)
+            key = (name, UUID(last_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        keyset = tuple_(Company.name, Company.id)
+        stmt = stmt.where(keyset < key if descending else keyset > key)
+    else:
+        stmt = stmt.offset((page - 1) * page_size)
+
+    rows = (await db.execute(stmt.limit(page_size))).all()
+    if len(rows) == page_size:
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor([last.name, last.id])
+    return conditional_json(request, rows_to_dicts(rows), headers)
+
+@router.post("/batch-get", response_model=List[CompanyRead])
+async def batch_get_companies(body: CompanyBatchGet, request: HTTPRequest, db: AsyncSession = Depends(get_read_db)):
+    # Como GET /companies?ids=, para listas que no caben en la URL
+    return conditional_json(request, await companies_by_ids(db, body.ids), {})
+
+@router.get("/search", response_model=List[CompanySearchResult])
+async def search_companies(
+    request: HTTPRequest,
+    db: AsyncSession = Depends(get_read_db),
+    q: str = Query(..., min_length=1, max_length=100),
+    fuzzy: bool = True,
+    limit: int = Query(10, ge=1, le=50)
+):
+    # Autocompletado (fuzzy=false): primero el índice en memoria, si está activo
+    results = None
+    if not fuzzy and company_search.prefix_index is not None:
+        results = await company_search.prefix_index.search(db, q, limit)
+    if results is None:
+        stmt = company_search.search_statement(q, fuzzy, limit)
+        results = rows_to_dicts((await db.execute(stmt)).all()) if stmt is not None else []
+    return conditional_json(request, results, {})
 
 @router.get("/{company_id}", response_model=CompanyRead)
-def get_company(company_id: str, db: Session = Depends(get_db)):
-    company = db.query(Company).filter(Company.id == company_id).first()
+async def get_company(
+    company_id: str, request: HTTPRequest, response: Response, db: AsyncSession = Depends(get_read_db)
+):
+    # Con If-None-Match basta con leer la versión para responder 304
+    if request.headers.get("if-none-match"):
+        version = await db.scalar(select(Company.version).where(Company.id == company_id))
+        if version is not None and not_modified(request, version_etag(version)):
+            return not_modified_response(version_etag(version))
+
+    company = await db.scalar(select(Company).where(Company.id == company_id))
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
+    response.headers["ETag"] = version_etag(company.version)
+    response.headers["Cache-Control"] = CACHE_CONTROL
     return company
 
 @router.put("/{company_id}", response_model=CompanyRead)
-def update_company(company_id: str, company_in: CompanyUpdate, db: Session = Depends(get_db)):
-    company = db.query(Company).filter(Company.id == company_id).first()
+async def update_company(
+    company_id: str,
+    company_in: CompanyUpdate,
+    request: HTTPRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    company = await db.scalar(select(Company).where(Company.id == company_id))
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
+    check_if_match(request, version_etag(company.version))
 
     for field, value in company_in.dict(exclude_unset=True).items():
         setattr(company, field, value)
 
-    db.commit()
-    db.refresh(company)
+    try:
+        await db.commit()
+    except StaleDataError:
+        # Otra escritura cambió la fila entre la lectura y el UPDATE
+        raise HTTPException(status_code=412, detail="Resource has been modified")
+    await db.refresh(company)
+    response.headers["ETag"] = version_etag(company.version)
     return company
 
 @router.delete("/{company_id}", status_code=204)
-def delete_company(company_id: str, db: Session = Depends(get_db)):
-    company = db.query(Company).filter(Company.id == company_id).first()
+async def delete_company(company_id: str, db: AsyncSession = Depends(get_async_db)):
+    company = await db.scalar(select(Company).where(Company.id == company_id))
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
-    
-    if company.requests:
+
+    # Basta con saber si existe una solicitud; no cargo la colección completa
+    has_requests = await db.scalar(select(Request.id).where(Request.company_id == company.id).limit(1))
+    if has_requests:
         raise HTTPException(
             status_code=409,
             detail="Cannot delete a company with associated requests"
         )
 
-    db.delete(company)
-    db.commit()
-    return None
\ No newline at end of file
+    await db.delete(company)
+    await db.commit()
+    return None
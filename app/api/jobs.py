@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import require_admin
+from app.db import get_async_db
+from app.models.job import Job
+from app.schemas.job import JobCreate, JobRead
+from app.services.jobs import HANDLERS, enqueue
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"], dependencies=[Depends(require_admin)])
+
+@router.post("/", response_model=JobRead, status_code=202)
+async def create_job(job_in: JobCreate, db: AsyncSession = Depends(get_async_db)):
+    if job_in.kind not in HANDLERS:
+        raise HTTPException(status_code=422, detail=f"Unknown job kind: {job_in.kind}")
+
+    job = await enqueue(db, job_in.kind, job_in.payload, job_in.max_attempts)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+@router.get("/{job_id}", response_model=JobRead)
+async def get_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    job = await db.scalar(select(Job).where(Job.id == job_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,83 +1,412 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+import asyncio
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from fastapi import Request as HTTPRequest
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
 from typing import List
-from app.db import get_db
-from app.models.request import Request, RequestStatus
+from uuid import UUID
+from datetime import date, datetime, timedelta
+from app.config import settings
+from app.api.responses import (
+    CACHE_CONTROL, check_if_match, conditional_json, not_modified, not_modified_response, rows_to_dicts,
+    version_etag,
+)
+from app.db import get_async_db, get_read_db, read_sessionmaker
+from app.models.request import Request, RequestStatus, can_transition, source_statuses
 from app.models.company import Company
-from app.schemas.request import RequestCreate, RequestRead, RequestUpdate
-from app.services.risk import calculate_risk
+from app.models.stats import RequestStats
+from app.schemas.common import TotalMode
+from app.schemas.request import (
+    MAX_LATE_PAYMENTS, BulkIngestResult, RequestCreate, RequestExpand, RequestListItem, RequestRead,
+    RequestStatsRead, RequestStatusChange, RequestStatusChangeResult, RequestUpdate, RiskExplanation, SkipReason,
+)
+from app.services.events import PUBLISH_RESET, SUPPRESS_EVENTS, broadcaster, event_stream
+from app.services.export import EXPORT_COLUMNS, MEDIA_TYPES, stream_export
+from app.services.ingest import CSV_TYPES, NDJSON_TYPES, BulkIngest, InvalidCsvHeader, iter_lines
+from app.services.pagination import decode_cursor, encode_cursor, get_total
+from app.services.risk import RISK_RULES_VERSION, calculate_risk, load_ruleset
 
 router = APIRouter(prefix="/requests", tags=["Requests"])
 
+
+def apply_request_filters(stmt, q=None, status=None, risk_min=None, risk_max=None, company_id=None,
+                          pep_flag=None, sanction_list=None, late_payments_min=None, late_payments_max=None,
+                          created_from=None, created_to=None):
+    if q:
+        stmt = stmt.join(Company).where(Company.name.ilike(f"%{q}%"))
+    if status:
+        stmt = stmt.where(Request.status == status)
+    if company_id:
+        stmt = stmt.where(Request.company_id == company_id)
+    if risk_min is not None:
+        stmt = stmt.where(Request.risk_score >= risk_min)
+    if risk_max is not None:
+        stmt = stmt.where(Request.risk_score <= risk_max)
+    # Columnas generadas desde risk_inputs, con sus propios índices
+    if pep_flag is not None:
+        stmt = stmt.where(Request.pep_flag == pep_flag)
+    if sanction_list is not None:
+        stmt = stmt.where(Request.sanction_list == sanction_list)
+    if late_payments_min is not None:
+        stmt = stmt.where(Request.late_payments >= late_payments_min)
+    if late_payments_max is not None:
+        stmt = stmt.where(Request.late_payments <= late_payments_max)
+    # Ventana de fechas (inclusive) sobre la clave de partición: el planner
+    # descarta los meses fuera del rango
+    if created_from:
+        stmt = stmt.where(Request.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(Request.created_at < created_to + timedelta(days=1))
+    return stmt
+
+
 @router.post("/", response_model=RequestRead, status_code=201)
-def create_request(req_in: RequestCreate, db: Session = Depends(get_db)):
-    company = db.query(Company).filter(Company.id == req_in.company_id).first()
+async def create_request(req_in: RequestCreate, db: AsyncSession = Depends(get_async_db)):
+    company = await db.scalar(select(Company).where(Company.id == req_in.company_id))
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
 
-    score = calculate_risk(req_in.risk_inputs)
-    req = Request(company_id=req_in.company_id, risk_inputs=req_in.risk_inputs, risk_score=score)
+    risk_inputs = req_in.risk_inputs.model_dump()
+    score = calculate_risk(risk_inputs)
+    req = Request(
+        company_id=req_in.company_id,
+        risk_inputs=risk_inputs,
+        risk_score=score,
+        risk_rules_version=RISK_RULES_VERSION,
+    )
     db.add(req)
-    db.commit()
-    db.refresh(req)
+    await db.commit()
+    await db.refresh(req)
     return req
 
-@router.get("/", response_model=List[RequestRead])
-def list_requests(
-    db: Session = Depends(get_db),
+@router.post("/bulk", response_model=BulkIngestResult)
+async def bulk_create_requests(request: HTTPRequest, db: AsyncSession = Depends(get_async_db)):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in NDJSON_TYPES | CSV_TYPES:
+        raise HTTPException(status_code=415, detail="Use application/x-ndjson or text/csv")
+
+    # El cuerpo se procesa a medida que llega, chunk a chunk
+    ingest = BulkIngest(db, content_type)
+    line_no = 0
+    try:
+        async for line in iter_lines(request.stream(), settings.BULK_MAX_LINE_BYTES):
+            line_no += 1
+            await ingest.add(line_no, line)
+    except InvalidCsvHeader as exc:
+        # Es la primera línea: todavía no se insertó nada
+        raise HTTPException(status_code=422, detail=str(exc))
+    await ingest.flush()
+    return ingest.result()
+
+# Columnas que expone RequestRead: el listado las selecciona como tuplas
+LIST_COLUMNS = (
+    Request.id,
+    Request.company_id,
+    Request.status,
+    Request.risk_inputs,
+    Request.risk_score,
+    Request.risk_rules_version,
+    Request.created_at,
+    Request.version,
+)
+
+# expand=company: la empresa (CompanySummary) se arma en la misma consulta
+COMPANY_SUMMARY = func.jsonb_build_object(
+    "id", Company.id, "name", Company.name, "country", Company.country, type_=JSONB
+).label("company")
+
+@router.get("/", response_model=List[RequestListItem])
+async def list_requests(
+    request: HTTPRequest,
+    db: AsyncSession = Depends(get_read_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     q: str | None = None,
     status: RequestStatus | None = None,
     risk_min: int | None = None,
     risk_max: int | None = None,
-    company_id: str | None = None
+    company_id: str | None = None,
+    pep_flag: bool | None = None,
+    sanction_list: bool | None = None,
+    late_payments_min: int | None = Query(None, ge=0, le=MAX_LATE_PAYMENTS),
+    late_payments_max: int | None = Query(None, ge=0, le=MAX_LATE_PAYMENTS),
+    created_from: date | None = None,
+    created_to: date | None = None,
+    cursor: str | None = None,
+    total: TotalMode | None = None,
+    expand: List[RequestExpand] = Query([])
 ):
-    query = db.query(Request).options(joinedload(Request.company))
+    stmt = apply_request_filters(
+        select(*LIST_COLUMNS), q=q, status=status, risk_min=risk_min, risk_max=risk_max, company_id=company_id,
+        pep_flag=pep_flag, sanction_list=sanction_list,
+        late_payments_min=late_payments_min, late_payments_max=late_payments_max,
+        created_from=created_from, created_to=created_to,
+    )
+    headers = {}
 
-    if q:
-        query = query.join(Company).filter(Company.name.ilike(f"%{q}%"))
-    if status:
-        query = query.filter(Request.status == status)
-    if company_id:
-        query = query.filter(Request.company_id == company_id)
-    if risk_min is not None:
-        query = query.filter(Request.risk_score >= risk_min)
-    if risk_max is not None:
-        query = query.filter(Request.risk_score <= risk_max)
+    if total:
+        cache_key = (
+            "requests", q, status, risk_min, risk_max, company_id,
+            pep_flag, sanction_list, late_payments_min, late_payments_max, created_from, created_to,
+        )
+        count = await get_total(db, stmt, total.value, cache_key)
+        headers["X-Total-Count" if total == TotalMode.exact else "X-Total-Estimate"] = str(count)
+
+    if RequestExpand.company in expand:
+        # Con q el filtro ya unió companies
+        stmt = stmt.add_columns(COMPANY_SUMMARY)
+        if not q:
+            stmt = stmt.join(Company, Company.id == Request.company_id)
+
+    # Orden estable (más recientes primero) para que el cursor sea válido
+    stmt = stmt.order_by(Request.created_at.desc(), Request.id.desc())
+    if cursor:
+        try:
+            created_at, last_id = decode_cursor(cursor, 2)
+            key = (datetime.fromisoformat(created_at), UUID(last_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # La condición sobre created_at sola permite descartar particiones
+        stmt = stmt.where(tuple_(Request.created_at, Request.id) < key, Request.created_at <= key[0])
+    else:
+        stmt = stmt.offset((page - 1) * page_size)
+
+    rows = (await db.execute(stmt.limit(page_size))).all()
+    if len(rows) == page_size:
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor([last.created_at.isoformat(), last.id])
+    # Las filas ya tienen la forma de RequestRead: se codifican sin validar
+    return conditional_json(request, rows_to_dicts(rows), headers)
+
+@router.get("/export")
+async def export_requests(
+    request: HTTPRequest,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    compress: bool = False,
+    q: str | None = None,
+    status: RequestStatus | None = None,
+    risk_min: int | None = None,
+    risk_max: int | None = None,
+    company_id: str | None = None,
+    pep_flag: bool | None = None,
+    sanction_list: bool | None = None,
+    late_payments_min: int | None = Query(None, ge=0, le=MAX_LATE_PAYMENTS),
+    late_payments_max: int | None = Query(None, ge=0, le=MAX_LATE_PAYMENTS),
+    created_from: date | None = None,
+    created_to: date | None = None
+):
+    stmt = apply_request_filters(
+        select(*EXPORT_COLUMNS), q=q, status=status, risk_min=risk_min, risk_max=risk_max, company_id=company_id,
+        pep_flag=pep_flag, sanction_list=sanction_list,
+        late_payments_min=late_payments_min, late_payments_max=late_payments_max,
+        created_from=created_from, created_to=created_to,
+    ).order_by(Request.created_at.desc(), Request.id.desc())
 
-    total = query.count()
-    requests = query.offset((page - 1) * page_size).limit(page_size).all()
-    return requests
+    filename = f"requests.{format}" + (".gz" if compress else "")
+    return StreamingResponse(
+        stream_export(await read_sessionmaker(request), stmt, format, compress),
+        media_type="application/gzip" if compress else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/events")
+async def request_events(
+    company_id: str | None = None,
+    last_event_id: int | None = Header(None, alias="Last-Event-ID"),
+    since: int | None = Query(None, description="Como Last-Event-ID, para clientes que no envían la cabecera")
+):
+    try:
+        subscription = await broadcaster.subscribe()
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Event feed unavailable")
+    return StreamingResponse(
+        event_stream(subscription, last_event_id if last_event_id is not None else since, company_id),
+        media_type="text/event-stream",
+        # Sin buffering en proxies (nginx) para que cada evento salga al momento
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.patch("/status", response_model=RequestStatusChangeResult)
+async def change_requests_status(change: RequestStatusChange, db: AsyncSession = Depends(get_async_db)):
+    target = RequestStatus(change.status.value)
+    # La máquina de estados se aplica en el WHERE: solo se tocan filas cuyo
+    # estado actual permite pasar a `target`
+    allowed = Request.status.in_(source_statuses(target))
+    candidates = select(Request.id, Request.created_at).where(allowed)
+    if change.ids is not None:
+        candidates = candidates.where(Request.id.in_(change.ids))
+    else:
+        candidates = apply_request_filters(candidates, **change.filter.model_dump()).limit(change.limit)
+    # Se bloquean en orden de id: dos cambios masivos que se cruzan esperan en
+    # vez de trabarse. Con created_at (clave de partición) el UPDATE va directo
+    # a la partición de cada fila.
+    candidates = candidates.order_by(Request.id).with_for_update(of=Request)
+    # Un cambio masivo llenaría las colas de los clientes SSE: se publica un
+    # único reset en lugar de un evento por fila
+    bulk = (len(change.ids) if change.ids is not None else change.limit) > settings.EVENTS_BULK_THRESHOLD
+    if bulk:
+        await db.execute(SUPPRESS_EVENTS)
+
+    updated = (await db.scalars(
+        update(Request)
+        .where(tuple_(Request.id, Request.created_at).in_(candidates), allowed)
+        .values(status=target, version=Request.version + 1)
+        .returning(Request.id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    if bulk and updated:
+        await db.execute(PUBLISH_RESET)
+
+    skipped = []
+    if change.ids is not None:
+        done = set(updated)
+        missing = [request_id for request_id in dict.fromkeys(change.ids) if request_id not in done]
+        current = dict((await db.execute(
+            select(Request.id, Request.status).where(Request.id.in_(missing))
+        )).all()) if missing else {}
+        for request_id in missing:
+            status = current.get(request_id)
+            if status is None:
+                reason = SkipReason.not_found
+            elif status == target:
+                reason = SkipReason.unchanged
+            else:
+                reason = SkipReason.transition_not_allowed
+            skipped.append({"id": request_id, "status": status, "reason": reason})
+    await db.commit()
+    return {"status": target, "updated": updated, "skipped": skipped}
+
+@router.get("/stats", response_model=RequestStatsRead)
+async def request_stats(
+    db: AsyncSession = Depends(get_read_db),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    company_limit: int = Query(20, ge=1, le=100)
+):
+    # Se lee del rollup request_stats (mantenido por triggers): el costo
+    # depende de la cantidad de tramos, no de la cantidad de solicitudes.
+    conditions = [RequestStats.count != 0]
+    if date_from:
+        conditions.append(RequestStats.bucket_date >= date_from)
+    if date_to:
+        conditions.append(RequestStats.bucket_date <= date_to)
+    total_count = func.sum(RequestStats.count)
+
+    by_status = (await db.execute(
+        select(RequestStats.status, total_count).where(*conditions).group_by(RequestStats.status)
+    )).all()
+    by_bucket = dict((await db.execute(
+        select(RequestStats.risk_bucket, total_count).where(*conditions).group_by(RequestStats.risk_bucket)
+    )).all())
+    by_country = (await db.execute(
+        select(func.coalesce(Company.country, ""), total_count)
+        .join(Company, Company.id == RequestStats.company_id)
+        .where(*conditions)
+        .group_by(Company.country)
+    )).all()
+    by_company = (await db.execute(
+        select(RequestStats.company_id, Company.name, total_count.label("count"))
+        .outerjoin(Company, Company.id == RequestStats.company_id)
+        .where(*conditions)
+        .group_by(RequestStats.company_id, Company.name)
+        .order_by(total_count.desc())
+        .limit(company_limit)
+    )).all()
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "total": sum(count for _, count in by_status),
+        "by_status": {status: count for status, count in by_status},
+        "by_country": {country: count for country, count in by_country},
+        "by_company": [
+            {"company_id": company_id, "name": name, "count": count}
+            for company_id, name, count in by_company
+        ],
+        "risk_histogram": [
+            {"min_score": bucket * 10, "max_score": min(bucket * 10 + 9, 100), "count": by_bucket.get(bucket, 0)}
+            for bucket in range(11)
+        ],
+    }
 
 @router.get("/{request_id}", response_model=RequestRead)
-def get_request(request_id: str, db: Session = Depends(get_db)):
-    req = db.query(Request).filter(Request.id == request_id).first()
+async def get_request(
+    request_id: str, request: HTTPRequest, response: Response, db: AsyncSession = Depends(get_read_db)
+):
+    # Con If-None-Match basta con leer la versión para responder 304
+    if request.headers.get("if-none-match"):
+        version = await db.scalar(select(Request.version).where(Request.id == request_id))
+        if version is not None and not_modified(request, version_etag(version)):
+            return not_modified_response(version_etag(version))
+
+    req = await db.scalar(select(Request).where(Request.id == request_id))
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
+    response.headers["ETag"] = version_etag(req.version)
+    response.headers["Cache-Control"] = CACHE_CONTROL
     return req
 
+@router.get("/{request_id}/risk", response_model=RiskExplanation)
+async def explain_request_risk(request_id: str, db: AsyncSession = Depends(get_read_db)):
+    req = await db.scalar(select(Request).where(Request.id == request_id))
+    if not req:
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    # Se explica con la versión de reglas que produjo el puntaje guardado
+    version = req.risk_rules_version or RISK_RULES_VERSION
+    try:
+        ruleset = load_ruleset(version)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Risk rules {version} not found")
+    return {
+        "request_id": req.id,
+        "risk_score": req.risk_score,
+        "risk_rules_version": version,
+        "contributions": ruleset.explain(req.risk_inputs),
+    }
+
 @router.put("/{request_id}", response_model=RequestRead)
-def update_request(request_id: str, req_in: RequestUpdate, db: Session = Depends(get_db)):
-    req = db.query(Request).filter(Request.id == request_id).first()
+async def update_request(
+    request_id: str,
+    req_in: RequestUpdate,
+    request: HTTPRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    req = await db.scalar(select(Request).where(Request.id == request_id))
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
+    check_if_match(request, version_etag(req.version))
 
-    if req_in.status:
-        req.status = req_in.status
-    if req_in.risk_inputs:
-        req.risk_inputs = req_in.risk_inputs
-        req.risk_score = calculate_risk(req_in.risk_inputs)
+    if req_in.status and req_in.status != req.status:
+        target = RequestStatus(req_in.status.value)
+        if not can_transition(req.status, target):
+            raise HTTPException(
+                status_code=409, detail=f"Cannot change status from {req.status.value} to {target.value}"
+            )
+        req.status = target
+    if req_in.risk_inputs is not None:
+        req.risk_inputs = req_in.risk_inputs.model_dump()
+        req.risk_score = calculate_risk(req.risk_inputs)
+        req.risk_rules_version = RISK_RULES_VERSION
 
-    db.commit()
-    db.refresh(req)
+    try:
+        await db.commit()
+    except StaleDataError:
+        # Otra escritura cambió la fila entre la lectura y el UPDATE
+        raise HTTPException(status_code=412, detail="Resource has been modified")
+    await db.refresh(req)
+    response.headers["ETag"] = version_etag(req.version)
     return req
 
 @router.delete("/{request_id}", status_code=204)
-def delete_request(request_id: str, db: Session = Depends(get_db)):
-    req = db.query(Request).filter(Request.id == request_id).first()
+async def delete_request(request_id: str, db: AsyncSession = Depends(get_async_db)):
+    req = await db.scalar(select(Request).where(Request.id == request_id))
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
-    db.delete(req)
-    db.commit()
+    await db.delete(req)
+    await db.commit()
     return None
@@ -0,0 +1,63 @@
+import hashlib
+
+import orjson
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+
+class FastJSONResponse(JSONResponse):
+    """Respuesta JSON codificada con orjson.
+
+    Pensada para devolver filas ya seleccionadas (dicts) sin pasar por la
+    validación de response_model. default=str cubre el UUID de asyncpg.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def rows_to_dicts(rows) -> list[dict]:
+    return [dict(row._mapping) for row in rows]
+
+
+# --- ETags ---------------------------------------------------------------
+
+def version_etag(version: int) -> str:
+    """ETag fuerte de una fila a partir de su columna version."""
+    return f'"v{version}"'
+
+
+def _etags(header: str | None) -> set[str]:
+    return {tag.strip() for tag in header.split(",")} if header else set()
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match usa comparación débil: W/"x" equivale a "x"."""
+    tags = {tag.removeprefix("W/") for tag in _etags(request.headers.get("if-none-match"))}
+    return "*" in tags or etag in tags
+
+
+def check_if_match(request: Request, etag: str) -> None:
+    """If-Match usa comparación fuerte; si no coincide, 412."""
+    tags = _etags(request.headers.get("if-match"))
+    if tags and "*" not in tags and etag not in tags:
+        raise HTTPException(status_code=412, detail="Resource has been modified")
+
+
+# Los clientes pueden guardar la respuesta, pero deben revalidarla siempre
+CACHE_CONTROL = "private, no-cache"
+
+
+def not_modified_response(etag: str, headers: dict | None = None) -> Response:
+    return Response(status_code=304, headers={**(headers or {}), "ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def conditional_json(request: Request, content, headers: dict) -> Response:
+    """Respuesta de listado con ETag calculado sobre el cuerpo ya codificado."""
+    response = FastJSONResponse(content, headers=headers)
+    etag = '"' + hashlib.blake2b(response.body, digest_size=16).hexdigest() + '"'
+    if not_modified(request, etag):
+        return not_modified_response(etag, headers)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
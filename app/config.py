@@ -1,5 +1,8 @@
 import os
 
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
 class Settings:
     DATABASE_URL: str = os.getenv(
         "DATABASE_URL",
@@ -7,5 +10,107 @@ class Settings:
     )
     JWT_SECRET: str = os.getenv("JWT_SECRET", "supersecret")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
+    # bcrypt: costo y pool de hilos dedicado (login/registro)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+    # Trabajos en curso + en cola antes de responder 429
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+    TOTAL_CACHE_TTL: float = float(os.getenv("TOTAL_CACHE_TTL", "30"))
+
+    # Cache de usuarios autenticados (get_current_user)
+    PRINCIPAL_CACHE_TTL: float = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    PRINCIPAL_CACHE_MAXSIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAXSIZE", "10000"))
+    # redis://... para compartir el cache entre workers; vacío = cache en memoria
+    PRINCIPAL_CACHE_URL: str = os.getenv("PRINCIPAL_CACHE_URL", "")
+
+    # Reglas de riesgo: app/risk_rules/<version>.json
+    RISK_RULES_DIR: str = os.getenv("RISK_RULES_DIR", os.path.join(os.path.dirname(__file__), "risk_rules"))
+    RISK_RULES_VERSION: str = os.getenv("RISK_RULES_VERSION", "v1")
+
+    # Carga masiva (POST /requests/bulk)
+    BULK_CHUNK_SIZE: int = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+    BULK_MAX_ERRORS: int = int(os.getenv("BULK_MAX_ERRORS", "1000"))
+    BULK_MAX_LINE_BYTES: int = int(os.getenv("BULK_MAX_LINE_BYTES", "65536"))
+    # Máximo de solicitudes por llamada a PATCH /requests/status
+    STATUS_CHANGE_MAX_ROWS: int = int(os.getenv("STATUS_CHANGE_MAX_ROWS", "1000"))
+
+    # Índice en memoria para autocompletar empresas (GET /companies/search)
+    COMPANY_PREFIX_INDEX: bool = _env_bool("COMPANY_PREFIX_INDEX", "false")
+    COMPANY_PREFIX_INDEX_TTL: float = float(os.getenv("COMPANY_PREFIX_INDEX_TTL", "60"))
+    COMPANY_PREFIX_INDEX_MAX_SIZE: int = int(os.getenv("COMPANY_PREFIX_INDEX_MAX_SIZE", "50000"))
+    # Máximo de ids por consulta en GET /companies?ids= y POST /companies/batch-get
+    COMPANY_BATCH_MAX_IDS: int = int(os.getenv("COMPANY_BATCH_MAX_IDS", "500"))
+
+    # Filas por lote en GET /requests/export
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+    # Re-scoring de la cartera
+    RESCORE_CHUNK_SIZE: int = int(os.getenv("RESCORE_CHUNK_SIZE", "5000"))
+    # Una ejecución en running sin lock ni avance por este tiempo se da por interrumpida
+    RESCORE_STALE_SECONDS: int = int(os.getenv("RESCORE_STALE_SECONDS", "60"))
+    RESCORE_WORKERS: int = int(os.getenv("RESCORE_WORKERS", str(os.cpu_count() or 1)))
+    # Límite de filas por segundo para no competir con el tráfico (0 = sin límite)
+    RESCORE_MAX_ROWS_PER_SECOND: int = int(os.getenv("RESCORE_MAX_ROWS_PER_SECOND", "20000"))
+
+    # Cola de trabajos (python -m app.services.jobs)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    # Sin NOTIFY, cada worker revisa la cola con esta frecuencia
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "5"))
+    # Un trabajo en curso sin latido durante este tiempo se devuelve a la cola
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+    # Espera antes del primer reintento; se duplica en cada intento fallido
+    JOB_RETRY_BASE_SECONDS: float = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+
+    # Particiones mensuales de requests (app/services/partitions.py)
+    REQUEST_PARTITION_MONTHS_AHEAD: int = int(os.getenv("REQUEST_PARTITION_MONTHS_AHEAD", "3"))
+    # Meses que quedan en la base; los anteriores se archivan (0 = sin retención)
+    REQUEST_RETENTION_MONTHS: int = int(os.getenv("REQUEST_RETENTION_MONTHS", "0"))
+    REQUEST_ARCHIVE_DIR: str = os.getenv("REQUEST_ARCHIVE_DIR", "archive/requests")
+    # Cada cuánto los workers de la cola mantienen las particiones
+    PARTITION_MAINTENANCE_SECONDS: float = float(os.getenv("PARTITION_MAINTENANCE_SECONDS", "3600"))
+
+    # Feed de cambios GET /requests/events (Server-Sent Events)
+    # Conexión para LISTEN; vacío = DATABASE_URL (con PgBouncer debe ir directo a PostgreSQL)
+    EVENTS_DATABASE_URL: str = os.getenv("EVENTS_DATABASE_URL", "")
+    EVENTS_CONNECT_TIMEOUT: float = float(os.getenv("EVENTS_CONNECT_TIMEOUT", "5"))
+    # Eventos pendientes por cliente; si se llena, el cliente se desconecta y retoma
+    EVENTS_CLIENT_BUFFER: int = int(os.getenv("EVENTS_CLIENT_BUFFER", "256"))
+    EVENTS_HEARTBEAT_SECONDS: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+    # Máximo de eventos a reenviar con Last-Event-ID; más que esto = recarga completa
+    EVENTS_REPLAY_LIMIT: int = int(os.getenv("EVENTS_REPLAY_LIMIT", "1000"))
+    # Eventos anteriores a Last-Event-ID que se reenvían igual: los ids se asignan
+    # al escribir pero los avisos salen en orden de commit, así que un id menor
+    # puede llegar después del que el cliente dio por último
+    EVENTS_REPLAY_WINDOW: int = int(os.getenv("EVENTS_REPLAY_WINDOW", "100"))
+    # Escrituras de más filas que esto (PATCH /requests/status, chunks de
+    # /requests/bulk) publican un único reset en lugar de un evento por fila
+    EVENTS_BULK_THRESHOLD: int = int(os.getenv("EVENTS_BULK_THRESHOLD", "100"))
+    EVENTS_RETENTION_HOURS: int = int(os.getenv("EVENTS_RETENTION_HOURS", "24"))
+    EVENTS_RETRY_MS: int = int(os.getenv("EVENTS_RETRY_MS", "3000"))
+
+    # Pool de conexiones
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = _env_bool("DB_POOL_PRE_PING", "true")
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    DB_ECHO: bool = _env_bool("DB_ECHO", "false")
+    # PgBouncer en modo transacción: sin pool propio ni prepared statements
+    DB_PGBOUNCER: bool = _env_bool("DB_PGBOUNCER", "false")
+
+    # Peticiones más lentas que esto se loguean con sus sentencias SQL (0 = nunca)
+    SLOW_REQUEST_SECONDS: float = float(os.getenv("SLOW_REQUEST_SECONDS", "1"))
+
+    # Réplica de lectura (vacío = todo va al primario)
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+    # Sobre este retraso de replicación las lecturas vuelven al primario
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_CHECK_INTERVAL: float = float(os.getenv("REPLICA_CHECK_INTERVAL", "1"))
+    # Tras un error de conexión la réplica se deja de usar este tiempo
+    REPLICA_RETRY_SECONDS: float = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+    REPLICA_CONNECT_TIMEOUT: float = float(os.getenv("REPLICA_CONNECT_TIMEOUT", "2"))
+    # Read-your-writes: tras escribir, el cliente lee del primario este tiempo
+    READ_YOUR_WRITES_SECONDS: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
 
 settings = Settings()
@@ -1,17 +1,170 @@
-from sqlalchemy import create_engine
+import asyncio
+import logging
+import time
+import uuid
+from fastapi import Request, Response
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import NullPool
 from app.config import settings
+from app.services.metrics import DB_POOL_CHECKOUT_SECONDS, DB_POOL_IN_USE, DB_READ_ROUTING
+
+logger = logging.getLogger(__name__)
 
 class Base(DeclarativeBase):
     pass
 
-engine = create_engine(settings.DATABASE_URL, future=True, echo=True)
+def _with_driver(url: str, driver: str):
+    # DATABASE_URL puede venir con cualquiera de los dos drivers;
+    # cada engine usa el suyo sobre el mismo servidor.
+    url = make_url(url).set(drivername=f"postgresql+{driver}")
+    if driver == "asyncpg" and settings.DB_PGBOUNCER:
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+    return url
+
+def _engine_options(driver: str) -> dict:
+    options = {"echo": settings.DB_ECHO, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    connect_args = {}
+
+    if settings.DB_PGBOUNCER:
+        # PgBouncer ya hace de pool y en modo transacción no admite
+        # prepared statements con nombre ni parámetros de arranque.
+        options["poolclass"] = NullPool
+        if driver == "asyncpg":
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    else:
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+            if driver == "asyncpg":
+                connect_args["server_settings"] = {"statement_timeout": timeout}
+            else:
+                connect_args["options"] = f"-c statement_timeout={timeout}"
+
+    options["connect_args"] = connect_args
+    return options
+
+# Engine síncrono: migraciones, scripts (seed_data.py) y tareas batch
+engine = create_engine(_with_driver(settings.DATABASE_URL, "psycopg2"), **_engine_options("psycopg2"))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine asíncrono (asyncpg) que usan las rutas de la API
+async_engine = create_async_engine(_with_driver(settings.DATABASE_URL, "asyncpg"), **_engine_options("asyncpg"))
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if hasattr(async_engine.pool, "checkedout"):
+    DB_POOL_IN_USE.set_function(async_engine.pool.checkedout)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db(request: Request, response: Response):
+    # Read-your-writes: tras una escritura el cliente lee del primario un rato.
+    # FastAPI solo copia esta cookie a la respuesta si la ruta no falla.
+    if replica is not None and request.method not in SAFE_METHODS:
+        response.set_cookie(
+            STICKY_COOKIE, "1", max_age=settings.READ_YOUR_WRITES_SECONDS, httponly=True, samesite="lax"
+        )
+    async with AsyncSessionLocal() as db:
+        # Tomo la conexión al inicio para medir la espera en el pool
+        with DB_POOL_CHECKOUT_SECONDS.time():
+            await db.connection()
+        yield db
+
+# --- Réplica de lectura ------------------------------------------------------
+
+STICKY_COOKIE = "db_primary"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Retraso en segundos; 0 si la réplica está al día (o si en realidad es un primario)
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class ReplicaRouter:
+    """Decide si las lecturas pueden ir a la réplica.
+
+    El retraso de replicación se consulta como mucho cada
+    REPLICA_CHECK_INTERVAL segundos; si la réplica no responde se deja de
+    usar durante REPLICA_RETRY_SECONDS.
+    """
+
+    def __init__(self, url: str):
+        options = _engine_options("asyncpg")
+        options["connect_args"]["timeout"] = settings.REPLICA_CONNECT_TIMEOUT
+        self.engine = create_async_engine(_with_driver(url, "asyncpg"), **options)
+        self.sessionmaker = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+        self._available = False
+        self._checked_until = 0.0
+
+    def mark_down(self) -> None:
+        self._available = False
+        self._checked_until = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+    async def available(self) -> bool:
+        now = time.monotonic()
+        if now < self._checked_until:
+            return self._available
+        # Reservo el próximo chequeo antes de esperar, así no se solapan
+        self._checked_until = now + settings.REPLICA_CHECK_INTERVAL
+        try:
+            async with self.engine.connect() as conn:
+                lag = float(await conn.scalar(REPLICA_LAG_SQL))
+        except (OSError, SQLAlchemyError, asyncio.TimeoutError):
+            logger.warning("Read replica unreachable, reading from primary", exc_info=True)
+            self.mark_down()
+            return False
+        self._available = lag <= settings.REPLICA_MAX_LAG_SECONDS
+        if not self._available:
+            logger.warning("Read replica is %.1fs behind, reading from primary", lag)
+        return self._available
+
+replica = ReplicaRouter(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+
+async def read_sessionmaker(request: Request) -> async_sessionmaker:
+    """Réplica si está configurada, al día y el cliente no acaba de escribir."""
+    if replica is None or request.cookies.get(STICKY_COOKIE) or not await replica.available():
+        DB_READ_ROUTING.labels("primary").inc()
+        return AsyncSessionLocal
+    DB_READ_ROUTING.labels("replica").inc()
+    return replica.sessionmaker
+
+async def get_read_db(request: Request):
+    sessionmaker = await read_sessionmaker(request)
+    db = sessionmaker()
+    try:
+        with DB_POOL_CHECKOUT_SECONDS.time():
+            await db.connection()
+    except (OSError, SQLAlchemyError, asyncio.TimeoutError):
+        if sessionmaker is AsyncSessionLocal:
+            await db.close()
+            raise
+        # La réplica cayó entre el chequeo y el checkout: sigo con el primario
+        logger.warning("Read replica checkout failed, reading from primary", exc_info=True)
+        replica.mark_down()
+        await db.close()
+        db = AsyncSessionLocal()
+        await db.connection()
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -1,13 +1,29 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.openapi.utils import get_openapi
-from app.api import auth, companies, requests
+from app.api import admin, auth, companies, jobs, requests
+from app.db import async_engine
+from app.services.events import broadcaster
+from app.services.instrumentation import RequestMetricsMiddleware
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-app = FastAPI(title="Solicitudes de Evaluación de Proveedores")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await broadcaster.close()
+    # Cierro las conexiones de asyncpg ligadas al event loop que termina
+    await async_engine.dispose()
+
+
+app = FastAPI(title="Solicitudes de Evaluación de Proveedores", lifespan=lifespan)
 
 app.include_router(auth.router)
 app.include_router(companies.router)
 app.include_router(requests.router)
+app.include_router(admin.router)
+app.include_router(jobs.router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,12 +31,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Estimate", "ETag"],
 )
+# Último en agregarse = más externo: mide también el paso por CORS
+app.add_middleware(RequestMetricsMiddleware)
 
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
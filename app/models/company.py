@@ -1,9 +1,16 @@
-from sqlalchemy import Column, String, DateTime
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Computed, String, DateTime, Index, Integer
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 import uuid
 from datetime import datetime
+from sqlalchemy.orm import deferred
 from app.db import Base
 
+# La puntuación se normaliza a espacios: "76.123.456-K" -> 76 123 456 k
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple', regexp_replace("
+    "lower(name || ' ' || coalesce(tax_id, '')), '[^[:alnum:]]+', ' ', 'g'))"
+)
+
 class Company(Base):
     __tablename__ = "companies"
 
@@ -12,3 +19,21 @@ class Company(Base):
     tax_id = Column(String, nullable=True)
     country = Column(String, default="CL")
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Revisión de la fila: base del ETag y del control optimista (If-Match)
+    version = Column(Integer, nullable=False, server_default="1")
+    # Palabras de name y tax_id para GET /companies/search (app/services/company_search.py)
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+
+    __table_args__ = (
+        # Índice trigram (pg_trgm) para búsquedas ILIKE '%q%'
+        Index(
+            "ix_companies_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_companies_tax_id_trgm", "tax_id",
+            postgresql_using="gin", postgresql_ops={"tax_id": "gin_trgm_ops"},
+        ),
+        Index("ix_companies_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    __mapper_args__ = {"version_id_col": version}
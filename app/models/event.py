@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, DateTime, Identity, Index, String, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from app.db import Base
+
+class RequestEvent(Base):
+    """Cambio en requests; lo escribe el trigger requests_events (ver app/services/events.py)."""
+    __tablename__ = "request_events"
+
+    # Es el id del evento SSE (Last-Event-ID)
+    id = Column(BigInteger, Identity(), primary_key=True)
+    op = Column(String, nullable=False)  # insert, update, delete o reset
+    # NULL en reset (cambio masivo: los clientes recargan el listado)
+    request_id = Column(UUID(as_uuid=True), nullable=True)
+    # La fila con la forma de RequestRead (solo id y company_id en delete)
+    data = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=text("(now() at time zone 'utc')"))
+
+    __table_args__ = (
+        Index("ix_request_events_created_at", "created_at"),
+    )
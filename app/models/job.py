@@ -0,0 +1,37 @@
+from sqlalchemy import Column, DateTime, Enum, Index, Integer, JSON, String, text
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+from datetime import datetime
+import enum
+from app.db import Base
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+class Job(Base):
+    """Trabajo en segundo plano; lo toman los workers de app/services/jobs.py."""
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(Enum(JobStatus), default=JobStatus.queued, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    # No se toma antes de esta fecha (backoff entre reintentos)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    # Worker que lo tiene tomado y desde cuándo (lease)
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Cola: solo las filas pendientes, en el orden en que se toman
+        Index("ix_jobs_queued", "run_after", "created_at", postgresql_where=text("status = 'queued'")),
+    )
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Boolean, Column, Computed, DateTime, Enum, ForeignKey, Index, Integer, String, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
@@ -12,14 +12,67 @@ class RequestStatus(str, enum.Enum):
     approved = "approved"
     rejected = "rejected"
 
+# Cambios de estado permitidos; approved y rejected son finales
+STATUS_TRANSITIONS = {
+    RequestStatus.pending: {RequestStatus.in_review, RequestStatus.approved, RequestStatus.rejected},
+    RequestStatus.in_review: {RequestStatus.approved, RequestStatus.rejected},
+    RequestStatus.approved: set(),
+    RequestStatus.rejected: set(),
+}
+
+
+def can_transition(current: RequestStatus, target: RequestStatus) -> bool:
+    return target in STATUS_TRANSITIONS[current]
+
+
+def source_statuses(target: RequestStatus) -> list[RequestStatus]:
+    """Estados desde los que se puede pasar a `target`."""
+    return [status for status, targets in STATUS_TRANSITIONS.items() if target in targets]
+
+# Inputs de riesgo consultables como columnas generadas (STORED). Las
+# expresiones no fallan con JSON inesperado: flag ausente = false, conteo no
+# numérico = 0.
+PEP_FLAG_SQL = "coalesce(risk_inputs -> 'pep_flag' = 'true'::jsonb, false)"
+SANCTION_LIST_SQL = "coalesce(risk_inputs -> 'sanction_list' = 'true'::jsonb, false)"
+LATE_PAYMENTS_SQL = (
+    "CASE WHEN jsonb_typeof(risk_inputs -> 'late_payments') = 'number' "
+    "THEN (risk_inputs ->> 'late_payments')::numeric::integer ELSE 0 END"
+)
+
 class Request(Base):
     __tablename__ = "requests"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
     status = Column(Enum(RequestStatus), default=RequestStatus.pending, nullable=False)
-    risk_inputs = Column(JSON, nullable=False)
+    risk_inputs = Column(JSONB, nullable=False)
+    pep_flag = Column(Boolean, Computed(PEP_FLAG_SQL, persisted=True), nullable=False)
+    sanction_list = Column(Boolean, Computed(SANCTION_LIST_SQL, persisted=True), nullable=False)
+    late_payments = Column(Integer, Computed(LATE_PAYMENTS_SQL, persisted=True), nullable=False)
     risk_score = Column(Integer, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Versión de las reglas de riesgo que produjo risk_score
+    risk_rules_version = Column(String, nullable=True)
+    # Clave de partición (mensual): parte de la PK, ver app/services/partitions.py
+    created_at = Column(
+        DateTime, primary_key=True, default=datetime.utcnow, server_default=text("(now() at time zone 'utc')")
+    )
+    # Revisión de la fila: base del ETag y del control optimista (If-Match)
+    version = Column(Integer, nullable=False, server_default="1")
 
     company = relationship("Company", backref="requests")
+
+    __table_args__ = (
+        Index("ix_requests_created_at_id", "created_at", "id"),
+        Index("ix_requests_status_created_at", "status", "created_at"),
+        Index("ix_requests_company_id_created_at", "company_id", "created_at"),
+        Index("ix_requests_risk_score", "risk_score"),
+        # Los flags son poco frecuentes: índices parciales solo con las filas marcadas
+        Index("ix_requests_pep_flag_status_created_at", "status", "created_at", postgresql_where=text("pep_flag")),
+        Index(
+            "ix_requests_sanction_list_status_created_at", "status", "created_at",
+            postgresql_where=text("sanction_list"),
+        ),
+        Index("ix_requests_late_payments", "late_payments"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    __mapper_args__ = {"version_id_col": version}
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, DateTime, Enum, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+from datetime import datetime
+import enum
+from app.db import Base
+
+class RescoreStatus(str, enum.Enum):
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+class RescoreRun(Base):
+    __tablename__ = "rescore_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status = Column(Enum(RescoreStatus), default=RescoreStatus.running, nullable=False)
+    # Checkpoint: último id de requests ya procesado (orden por PK)
+    last_id = Column(UUID(as_uuid=True), nullable=True)
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    # Filas que otra escritura cambió entre la lectura y el UPDATE (se re-puntúan)
+    conflicts = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    @property
+    def progress(self) -> float:
+        if not self.total:
+            return 1.0 if self.status == RescoreStatus.completed else 0.0
+        return min(self.processed / self.total, 1.0)
@@ -0,0 +1,19 @@
+from sqlalchemy import BigInteger, Column, Date, Enum, SmallInteger
+from sqlalchemy.dialects.postgresql import UUID
+from app.db import Base
+from app.models.request import RequestStatus
+
+class RequestStats(Base):
+    """Rollup de requests por día, empresa, estado y tramo de riesgo.
+
+    Lo mantienen triggers en requests (ver migración request_stats); la
+    aplicación solo lo lee.
+    """
+    __tablename__ = "request_stats"
+
+    bucket_date = Column(Date, primary_key=True)
+    company_id = Column(UUID(as_uuid=True), primary_key=True)
+    status = Column(Enum(RequestStatus), primary_key=True)
+    # risk_score // 10, acotado a 0..10 (el 10 es el puntaje máximo, 100)
+    risk_bucket = Column(SmallInteger, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class TotalMode(str, Enum):
+    exact = "exact"
+    estimate = "estimate"
@@ -1,7 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import List
 from uuid import UUID
 
+from app.config import settings
+
 class CompanyCreate(BaseModel):
     name: str
     tax_id: str | None = None
@@ -21,3 +24,15 @@ class CompanyRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+class CompanySearchResult(CompanyRead):
+    score: float
+
+class CompanySummary(BaseModel):
+    """Proyección compacta que se embebe en las solicitudes (expand=company)."""
+    id: UUID
+    name: str
+    country: str
+
+class CompanyBatchGet(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, max_length=settings.COMPANY_BATCH_MAX_IDS)
@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from uuid import UUID
+from enum import Enum
+from typing import Any, Dict
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+class JobCreate(BaseModel):
+    kind: str
+    payload: Dict[str, Any] = {}
+    max_attempts: int = Field(3, ge=1, le=20)
+
+class JobRead(BaseModel):
+    id: UUID
+    kind: str
+    status: JobStatus
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    result: Any = None
+    error: str | None
+    created_at: datetime
+    finished_at: datetime | None
+
+    class Config:
+        from_attributes = True
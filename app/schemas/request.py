@@ -1,8 +1,11 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, StrictBool, StrictInt, model_validator
+from datetime import date, datetime
 from uuid import UUID
 from enum import Enum
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, List
+
+from app.config import settings
+from app.schemas.company import CompanySummary
 
 class RequestStatus(str, Enum):
     pending = "pending"
@@ -10,13 +13,26 @@ class RequestStatus(str, Enum):
     approved = "approved"
     rejected = "rejected"
 
+# Tope de late_payments: muy por encima de cualquier caso real y dentro del
+# integer de la columna generada
+MAX_LATE_PAYMENTS = 10_000
+
+class RiskInputs(BaseModel):
+    # Estricto: sin coerción de tipos ni claves desconocidas. Cada input nuevo
+    # de las reglas de riesgo se agrega aquí (y, si se filtra, en el modelo).
+    model_config = ConfigDict(extra="forbid")
+
+    pep_flag: StrictBool = False
+    sanction_list: StrictBool = False
+    late_payments: StrictInt = Field(0, ge=0, le=MAX_LATE_PAYMENTS)
+
 class RequestCreate(BaseModel):
     company_id: UUID
-    risk_inputs: Dict
+    risk_inputs: RiskInputs
 
 class RequestUpdate(BaseModel):
     status: Optional[RequestStatus] = None
-    risk_inputs: Optional[Dict] = None
+    risk_inputs: Optional[RiskInputs] = None
 
 class RequestRead(BaseModel):
     id: UUID
@@ -24,7 +40,106 @@ class RequestRead(BaseModel):
     status: RequestStatus
     risk_inputs: Dict
     risk_score: int
+    risk_rules_version: str | None = None
     created_at: datetime
+    # Revisión de la fila (la del ETag y de los eventos de /requests/events)
+    version: int
 
     class Config:
         from_attributes = True
+
+class RequestListItem(RequestRead):
+    # Solo con GET /requests?expand=company
+    company: CompanySummary | None = None
+
+class RequestExpand(str, Enum):
+    company = "company"
+
+class RequestFilter(BaseModel):
+    """Los mismos filtros que GET /requests."""
+    model_config = ConfigDict(extra="forbid")
+
+    q: str | None = None
+    status: RequestStatus | None = None
+    risk_min: int | None = None
+    risk_max: int | None = None
+    company_id: UUID | None = None
+    pep_flag: bool | None = None
+    sanction_list: bool | None = None
+    late_payments_min: int | None = Field(None, ge=0, le=MAX_LATE_PAYMENTS)
+    late_payments_max: int | None = Field(None, ge=0, le=MAX_LATE_PAYMENTS)
+    created_from: date | None = None
+    created_to: date | None = None
+
+class RequestStatusChange(BaseModel):
+    status: RequestStatus
+    # Una de las dos: ids concretos o un filtro
+    ids: List[UUID] | None = Field(None, min_length=1, max_length=settings.STATUS_CHANGE_MAX_ROWS)
+    filter: RequestFilter | None = None
+    # Con filtro se cambian a lo sumo `limit` solicitudes por llamada
+    limit: int = Field(settings.STATUS_CHANGE_MAX_ROWS, ge=1, le=settings.STATUS_CHANGE_MAX_ROWS)
+
+    @model_validator(mode="after")
+    def ids_or_filter(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide either ids or filter")
+        if self.filter is not None and not self.filter.model_dump(exclude_none=True):
+            raise ValueError("filter must have at least one condition")
+        return self
+
+class SkipReason(str, Enum):
+    not_found = "not_found"
+    unchanged = "unchanged"
+    transition_not_allowed = "transition_not_allowed"
+
+class SkippedRequest(BaseModel):
+    id: UUID
+    status: RequestStatus | None = None
+    reason: SkipReason
+
+class RequestStatusChangeResult(BaseModel):
+    status: RequestStatus
+    updated: List[UUID]
+    skipped: List[SkippedRequest]
+
+class BulkIngestError(BaseModel):
+    line: int
+    error: str
+
+class BulkIngestResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: List[BulkIngestError]
+    errors_truncated: bool = False
+
+class RiskContribution(BaseModel):
+    input: str
+    type: str
+    value: Any = None
+    points: int
+
+class RiskExplanation(BaseModel):
+    request_id: UUID
+    risk_score: int
+    risk_rules_version: str
+    contributions: List[RiskContribution]
+
+class CompanyCount(BaseModel):
+    company_id: UUID
+    name: str | None = None
+    count: int
+
+class RiskBucketCount(BaseModel):
+    min_score: int
+    max_score: int
+    count: int
+
+class RequestStatsRead(BaseModel):
+    date_from: date | None
+    date_to: date | None
+    total: int
+    by_status: Dict[RequestStatus, int]
+    by_country: Dict[str, int]
+    by_company: List[CompanyCount]
+    risk_histogram: List[RiskBucketCount]
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from datetime import datetime
+from uuid import UUID
+from enum import Enum
+
+class RescoreStatus(str, Enum):
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+class RescoreRunRead(BaseModel):
+    id: UUID
+    status: RescoreStatus
+    total: int
+    processed: int
+    updated: int
+    conflicts: int
+    progress: float
+    error: str | None
+    started_at: datetime
+    updated_at: datetime
+    finished_at: datetime | None
+
+    class Config:
+        from_attributes = True
+
+class RescoreJobRead(RescoreRunRead):
+    # Trabajo de la cola que procesa la ejecución (GET /jobs/{job_id})
+    job_id: UUID
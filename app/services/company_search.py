@@ -0,0 +1,166 @@
+"""
+Búsqueda de empresas (GET /companies/search).
+
+Dos caminos sobre companies.search_vector, un tsvector generado a partir de
+name y tax_id (con la puntuación normalizada a espacios):
+
+    prefijo  cada palabra de la consulta es prefijo de alguna palabra
+             (to_tsquery 'acm:* & co:*', índice GIN)
+    fuzzy    además, similitud trigram (pg_trgm) contra name y tax_id,
+             para tolerar errores de tipeo
+
+Puntaje: 1 por coincidencia de prefijo, 1 más si el nombre empieza con la
+consulta, y en modo fuzzy la similitud trigram (0 a 1).
+
+Opcionalmente (COMPANY_PREFIX_INDEX=true) las búsquedas de prefijo se
+responden desde un índice en memoria, sin ir a la base de datos.
+"""
+
+import asyncio
+import bisect
+import logging
+import re
+import time
+from typing import NamedTuple
+
+from sqlalchemy import case, event, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.company import Company
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = (Company.id, Company.name, Company.tax_id, Company.country, Company.created_at)
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Misma normalización que la columna generada search_vector."""
+    return _TOKEN.findall(text.lower())
+
+
+def search_statement(q: str, fuzzy: bool, limit: int):
+    tokens = tokenize(q)
+    tsquery = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+    matches = Company.search_vector.op("@@")(tsquery)
+    starts = func.lower(Company.name).startswith(q.lower(), autoescape=True)
+
+    score = case((matches, 1.0), else_=0.0) + case((starts, 1.0), else_=0.0)
+    condition = matches
+    if fuzzy:
+        # word_similarity: la consulta contra la palabra más parecida del nombre
+        score = score + func.greatest(
+            func.word_similarity(q, Company.name),
+            func.similarity(q, func.coalesce(Company.tax_id, "")),
+        )
+        condition = or_(matches, literal(q).op("<%")(Company.name), Company.tax_id.op("%")(q))
+    elif not tokens:
+        return None
+
+    return (
+        select(*SEARCH_COLUMNS, score.label("score"))
+        .where(condition)
+        .order_by(score.desc(), Company.name)
+        .limit(limit)
+    )
+
+
+class _PrefixState(NamedTuple):
+    tokens: list[str]
+    positions: list[int]
+    companies: list[dict]
+    too_large: bool
+
+
+class CompanyPrefixIndex:
+    """Índice en memoria token -> empresas para autocompletado por prefijo.
+
+    Se reconstruye desde la base tras COMPANY_PREFIX_INDEX_TTL segundos o al
+    cambiar una empresa en este proceso. Con más de COMPANY_PREFIX_INDEX_MAX_SIZE
+    empresas no se usa y la búsqueda va a la base. Mientras se reconstruye (o
+    si la reconstrucción falla) search devuelve None y se consulta la base.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._expires = 0.0
+        self._state: _PrefixState | None = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._expires = 0.0
+        self._generation += 1
+
+    async def _build(self, db: AsyncSession) -> _PrefixState:
+        rows = (await db.execute(select(*SEARCH_COLUMNS).limit(self.max_size + 1))).all()
+        if len(rows) > self.max_size:
+            return _PrefixState([], [], [], True)
+        companies = [dict(row._mapping) for row in rows]
+        pairs = sorted(
+            (token, position)
+            for position, company in enumerate(companies)
+            for token in set(tokenize(f"{company['name']} {company['tax_id'] or ''}"))
+        )
+        return _PrefixState([token for token, _ in pairs], [position for _, position in pairs], companies, False)
+
+    async def _refresh(self, db: AsyncSession) -> bool:
+        """Reconstruye el índice; False si no quedó vigente."""
+        async with self._lock:
+            if time.monotonic() < self._expires:
+                return True  # lo reconstruyó otra búsqueda mientras esperaba
+            generation = self._generation
+            try:
+                state = await self._build(db)
+            except Exception:
+                logger.warning("Company prefix index refresh failed", exc_info=True)
+                return False
+            # Se publica entero de una vez; si una empresa cambió durante la
+            # carga queda vencido y la próxima búsqueda lo vuelve a armar
+            self._state = state
+            if generation == self._generation:
+                self._expires = time.monotonic() + self.ttl
+            return True
+
+    def _matching(self, state: _PrefixState, prefix: str) -> set[int]:
+        start = bisect.bisect_left(state.tokens, prefix)
+        end = bisect.bisect_left(state.tokens, prefix + "\U0010ffff")
+        return set(state.positions[start:end])
+
+    async def search(self, db: AsyncSession, q: str, limit: int) -> list[dict] | None:
+        """Resultados como los de search_statement(fuzzy=False), o None si no aplica."""
+        if time.monotonic() >= self._expires:
+            # Otra búsqueda ya lo está reconstruyendo: esta va a la base
+            if self._lock.locked() or not await self._refresh(db):
+                return None
+        state = self._state
+        tokens = tokenize(q)
+        if state is None or state.too_large or not tokens:
+            return None
+
+        positions = set.intersection(*(self._matching(state, token) for token in tokens))
+        lowered = q.lower()
+        results = [
+            {**company, "score": 2.0 if company["name"].lower().startswith(lowered) else 1.0}
+            for company in (state.companies[p] for p in positions)
+        ]
+        results.sort(key=lambda r: (-r["score"], r["name"]))
+        return results[:limit]
+
+
+prefix_index = (
+    CompanyPrefixIndex(settings.COMPANY_PREFIX_INDEX_TTL, settings.COMPANY_PREFIX_INDEX_MAX_SIZE)
+    if settings.COMPANY_PREFIX_INDEX
+    else None
+)
+
+
+@event.listens_for(Company, "after_insert")
+@event.listens_for(Company, "after_update")
+@event.listens_for(Company, "after_delete")
+def _invalidate_prefix_index(mapper, connection, target):
+    if prefix_index is not None:
+        prefix_index.invalidate()
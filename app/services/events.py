@@ -0,0 +1,236 @@
+"""
+Feed de cambios de requests para GET /requests/events (Server-Sent Events).
+
+El trigger requests_events guarda cada insert/update/delete en
+request_events y lo avisa con NOTIFY request_events. Cada proceso de la API
+mantiene una sola conexión con LISTEN (EventBroadcaster) y reparte los
+eventos, ya formateados, a las colas de sus clientes. Las colas son
+acotadas: un cliente que no da abasto se desconecta y, al reconectar con
+Last-Event-ID, recupera lo que le faltó desde request_events.
+
+Si lo perdido supera EVENTS_REPLAY_LIMIT eventos (o ya se purgó), se envía
+un evento `reset` para que el cliente recargue el listado completo.
+
+Las escrituras masivas (re-scoring, PATCH /requests/status por filtro,
+movimientos de partición) no generan un evento por fila: ejecutan
+SUPPRESS_EVENTS dentro de su transacción y, si cambiaron filas visibles,
+PUBLISH_RESET deja un único `reset` (con id, para Last-Event-ID).
+
+Los ids de request_events se toman al insertar, dentro de la transacción
+que escribe, pero NOTIFY se entrega en orden de commit: con transacciones
+solapadas un cliente puede recibir el 101 antes que el 100. Por eso al
+retomar se reenvían también los EVENTS_REPLAY_WINDOW eventos anteriores a
+Last-Event-ID; el cliente descarta lo que ya tiene comparando la version
+de cada solicitud.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import AsyncIterator, NamedTuple
+
+import asyncpg
+from sqlalchemy import delete, func, or_, select, text
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.db import AsyncSessionLocal, engine
+from app.models.event import RequestEvent
+from app.services.metrics import SSE_CLIENTS, SSE_CLIENTS_DROPPED
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "request_events"
+
+# Solo para la transacción en curso (SET LOCAL); lo lee request_events_notify()
+SUPPRESS_EVENTS = text("SET LOCAL app.request_events = 'off'")
+# Un único evento reset en lugar de uno por fila; sale al confirmar
+PUBLISH_RESET = text("SELECT request_events_reset()")
+
+
+class Event(NamedTuple):
+    id: int
+    company_id: str | None
+    message: str
+
+
+def format_event(event_id: int, op: str, data: dict) -> Event:
+    message = f"id: {event_id}\nevent: {op}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
+    return Event(event_id, data.get("company_id"), message)
+
+
+RESET_MESSAGE = "event: reset\ndata: {}\n\n"
+HEARTBEAT_MESSAGE = ": ping\n\n"
+
+
+class Subscription:
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[Event | None] = asyncio.Queue(maxsize)
+
+
+class EventBroadcaster:
+    """Una conexión LISTEN por proceso que reparte los eventos a todos los clientes."""
+
+    def __init__(self):
+        self._subscribers: set[Subscription] = set()
+        self._task: asyncio.Task | None = None
+        self._ready: asyncio.Event | None = None
+
+    def _dsn(self) -> str:
+        # LISTEN necesita una sesión propia: con PgBouncer en modo transacción
+        # se usa EVENTS_DATABASE_URL apuntando directo a PostgreSQL
+        url = make_url(settings.EVENTS_DATABASE_URL or settings.DATABASE_URL).set(drivername="postgresql")
+        return url.render_as_string(hide_password=False)
+
+    async def subscribe(self) -> Subscription:
+        """Registra un cliente; vuelve cuando el LISTEN ya está activo."""
+        subscription = Subscription(settings.EVENTS_CLIENT_BUFFER)
+        self._subscribers.add(subscription)
+        SSE_CLIENTS.inc()
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._ready.wait(), settings.EVENTS_CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.unsubscribe(subscription)
+            raise
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.discard(subscription)
+            SSE_CLIENTS.dec()
+
+    def publish(self, event: Event) -> None:
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        # Se vacía la cola y None le indica al stream que cierre
+        self.unsubscribe(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+        SSE_CLIENTS_DROPPED.inc()
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        event = json.loads(payload)
+        self.publish(format_event(event["id"], event["op"], event["data"]))
+
+    async def _listen(self) -> None:
+        backoff = 1.0
+        while self._subscribers:
+            lost = asyncio.Event()
+            try:
+                connection = await asyncpg.connect(self._dsn(), timeout=settings.EVENTS_CONNECT_TIMEOUT)
+            except (OSError, asyncpg.PostgresError, asyncio.TimeoutError):
+                logger.warning("Event listener could not connect, retrying in %.0fs", backoff, exc_info=True)
+            else:
+                try:
+                    connection.add_termination_listener(lambda _: lost.set())
+                    await connection.add_listener(CHANNEL, self._on_notify)
+                    self._ready.set()
+                    backoff = 1.0
+                    # Sin clientes se suelta la conexión; el próximo la vuelve a abrir
+                    while self._subscribers and not lost.is_set():
+                        try:
+                            await asyncio.wait_for(lost.wait(), settings.EVENTS_HEARTBEAT_SECONDS)
+                        except asyncio.TimeoutError:
+                            pass
+                finally:
+                    self._ready.clear()
+                    if not connection.is_closed():
+                        await connection.close()
+                if not lost.is_set():
+                    continue  # sin clientes (o llegó uno nuevo mientras se cerraba)
+                logger.warning("Event listener connection lost")
+            # Lo que llegó mientras no había LISTEN se recupera con Last-Event-ID
+            for subscription in list(self._subscribers):
+                self._drop(subscription)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    async def close(self) -> None:
+        for subscription in list(self._subscribers):
+            self._drop(subscription)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+broadcaster = EventBroadcaster()
+
+
+async def replay_events(last_event_id: int, company_id: str | None = None) -> list[Event] | None:
+    """Eventos posteriores a `last_event_id`; None si hay que recargar todo."""
+    async with AsyncSessionLocal() as db:
+        oldest = await db.scalar(select(func.min(RequestEvent.id)))
+        if oldest is not None and last_event_id < oldest - 1:
+            return None  # ya purgados
+        start = max(last_event_id - settings.EVENTS_REPLAY_WINDOW, 0)
+        # Los reset de la ventana ya se procesaron: solo harían recargar otra vez
+        stmt = select(RequestEvent.id, RequestEvent.op, RequestEvent.data).where(
+            RequestEvent.id > start, or_(RequestEvent.op != "reset", RequestEvent.id > last_event_id)
+        )
+        if company_id:
+            stmt = stmt.where(or_(RequestEvent.data["company_id"].astext == company_id,
+                                  RequestEvent.op == "reset"))
+        # La ventana aporta a lo sumo EVENTS_REPLAY_WINDOW filas además de las nuevas
+        limit = settings.EVENTS_REPLAY_LIMIT + settings.EVENTS_REPLAY_WINDOW + 1
+        rows = (await db.execute(stmt.order_by(RequestEvent.id).limit(limit))).all()
+    if sum(1 for row in rows if row.id > last_event_id) > settings.EVENTS_REPLAY_LIMIT:
+        return None
+    return [format_event(*row) for row in rows]
+
+
+async def event_stream(subscription: Subscription, last_event_id: int | None = None,
+                       company_id: str | None = None) -> AsyncIterator[str]:
+    """Stream SSE de un cliente ya suscrito.
+
+    La suscripción (LISTEN activo) va antes de consultar lo pendiente, así
+    no queda un hueco entre ambos; lo repetido se descarta por id.
+    """
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        replayed: set[int] = set()
+        if last_event_id is not None:
+            backlog = await replay_events(last_event_id, company_id)
+            if backlog is None:
+                yield RESET_MESSAGE
+            else:
+                for event in backlog:
+                    replayed.add(event.id)
+                    yield event.message
+
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT_MESSAGE
+                continue
+            if event is None:
+                return  # cola llena o listener caído: el cliente reconecta
+            if event.id in replayed:
+                continue
+            # Los reset no tienen company_id: van a todos los clientes
+            if company_id and event.company_id is not None and event.company_id != company_id:
+                continue
+            yield event.message
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+def prune_events() -> int:
+    """Borra los eventos más antiguos que EVENTS_RETENTION_HOURS."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.EVENTS_RETENTION_HOURS)
+    with engine.begin() as conn:
+        return conn.execute(delete(RequestEvent).where(RequestEvent.created_at < cutoff)).rowcount
@@ -0,0 +1,68 @@
+"""
+Exportación de solicitudes en streaming (CSV o NDJSON, opcionalmente gzip).
+
+Las filas se leen con un cursor del lado del servidor (yield_per) y se
+serializan directamente desde las tuplas, sin construir objetos ORM ni
+modelos Pydantic, así la memoria no depende del tamaño del export.
+"""
+
+import csv
+import io
+import zlib
+from typing import AsyncIterator
+
+import orjson
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.models.request import Request
+
+EXPORT_COLUMNS = (
+    Request.id,
+    Request.company_id,
+    Request.status,
+    Request.risk_score,
+    Request.risk_rules_version,
+    Request.risk_inputs,
+    Request.created_at,
+)
+EXPORT_HEADER = [column.key for column in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _ndjson(rows) -> bytes:
+    # default=str cubre el UUID propio de asyncpg, que orjson no reconoce
+    return b"".join(orjson.dumps(dict(zip(EXPORT_HEADER, row)), default=str) + b"\n" for row in rows)
+
+
+def _csv(rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        (str(id_), str(company_id), status.value, score, version, orjson.dumps(inputs).decode(), created_at.isoformat())
+        for id_, company_id, status, score, version, inputs, created_at in rows
+    )
+    return buffer.getvalue().encode()
+
+
+async def stream_export(sessionmaker: async_sessionmaker, stmt, fmt: str, compress: bool) -> AsyncIterator[bytes]:
+    # La sesión es propia del generador: vive lo que dura la respuesta
+    encode = _csv if fmt == "csv" else _ndjson
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: formato gzip
+
+    def emit(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    if fmt == "csv":
+        yield emit((",".join(EXPORT_HEADER) + "\r\n").encode())
+
+    async with sessionmaker() as db:
+        result = await db.stream(stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            chunk = emit(encode(rows))
+            if chunk:
+                yield chunk
+
+    if compressor:
+        yield compressor.flush()
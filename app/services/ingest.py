@@ -0,0 +1,193 @@
+import csv
+import json
+import uuid
+from datetime import datetime
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.company import Company
+from app.models.request import Request
+from app.schemas.request import RequestCreate
+from app.services.events import PUBLISH_RESET, SUPPRESS_EVENTS
+from app.services.risk import RISK_RULES_VERSION, calculate_risk_many
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines"}
+CSV_TYPES = {"text/csv", "application/csv"}
+
+_BOOLEAN_STRINGS = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False, "": False}
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+class InvalidCsvHeader(Exception):
+    """La cabecera CSV no sirve: se rechaza la carga entera, no una línea."""
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes | None]:
+    """Corta el cuerpo en líneas sin cargarlo entero; None marca una línea demasiado larga."""
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+                yield None
+            else:
+                # Una línea completa dentro del chunk también puede exceder el límite
+                yield line if len(line) <= max_line_bytes else None
+        if len(buffer) > max_line_bytes:
+            skipping = True
+            buffer = b""
+    if skipping:
+        yield None
+    elif buffer:
+        yield buffer
+
+
+def _parse_csv_value(column: str, value: str):
+    if column in ("pep_flag", "sanction_list"):
+        try:
+            return _BOOLEAN_STRINGS[value.strip().lower()]
+        except KeyError:
+            raise ValueError(f"Invalid boolean for {column}: {value!r}")
+    if column == "late_payments":
+        return int(value or 0)
+    return value
+
+
+class RecordParser:
+    """Convierte cada línea NDJSON o CSV en un RequestCreate."""
+
+    def __init__(self, content_type: str):
+        self.is_csv = content_type in CSV_TYPES
+        self.header: list[str] | None = None
+
+    def parse(self, line: str) -> RequestCreate | None:
+        if not self.is_csv:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Line must be a JSON object")
+            return RequestCreate(**record)
+
+        if self.header is None:
+            # Excel y otros guardan el CSV en UTF-8 con BOM
+            header = [column.strip() for column in next(csv.reader([line.removeprefix("\ufeff")]))]
+            if "company_id" not in header:
+                raise InvalidCsvHeader("CSV header must include company_id")
+            self.header = header
+            return None
+        values = next(csv.reader([line]))
+        if len(values) != len(self.header):
+            raise ValueError(f"Expected {len(self.header)} columns, got {len(values)}")
+
+        row = dict(zip(self.header, values))
+        company_id = row.pop("company_id")
+        risk_inputs = {column: _parse_csv_value(column, value) for column, value in row.items()}
+        return RequestCreate(company_id=company_id, risk_inputs=risk_inputs)
+
+
+class BulkIngest:
+    """Valida, puntúa e inserta por chunks; la memoria depende del chunk, no del archivo."""
+
+    def __init__(self, db: AsyncSession, content_type: str):
+        self.db = db
+        self.parser = RecordParser(content_type)
+        self.pending: list[tuple[int, RequestCreate]] = []
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def _error(self, line_no: int, message: str):
+        self.failed += 1
+        if len(self.errors) < settings.BULK_MAX_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    async def add(self, line_no: int, raw: bytes | None):
+        if raw is None:
+            self.received += 1
+            self._error(line_no, "Line too long")
+            return
+        line = raw.decode("utf-8", errors="replace").strip()
+        if not line:
+            return
+
+        try:
+            record = self.parser.parse(line)
+        except ValidationError as exc:
+            self.received += 1
+            first = exc.errors()[0]
+            location = ".".join(str(part) for part in first["loc"])
+            self._error(line_no, f"{location}: {first['msg']}" if location else first["msg"])
+            return
+        except ValueError as exc:
+            self.received += 1
+            self._error(line_no, str(exc) or "Invalid line")
+            return
+        if record is None:  # cabecera CSV
+            return
+
+        self.received += 1
+        self.pending.append((line_no, record))
+        if len(self.pending) >= settings.BULK_CHUNK_SIZE:
+            await self.flush()
+
+    async def flush(self):
+        if not self.pending:
+            return
+        chunk, self.pending = self.pending, []
+
+        # Una sola consulta por chunk para validar todas las empresas
+        company_ids = {record.company_id for _, record in chunk}
+        existing = set(await self.db.scalars(select(Company.id).where(Company.id.in_(company_ids))))
+
+        valid = []
+        for line_no, record in chunk:
+            if record.company_id in existing:
+                valid.append(record)
+            else:
+                self._error(line_no, "Company not found")
+        if not valid:
+            return
+
+        inputs = [record.risk_inputs.model_dump() for record in valid]
+        scores = calculate_risk_many(inputs)
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "company_id": record.company_id,
+                "risk_inputs": risk_inputs,
+                "risk_score": score,
+                "risk_rules_version": RISK_RULES_VERSION,
+                "created_at": now,
+            }
+            for record, risk_inputs, score in zip(valid, inputs, scores)
+        ]
+        bulk = len(rows) > settings.EVENTS_BULK_THRESHOLD
+        if bulk:
+            await self.db.execute(SUPPRESS_EVENTS)
+        # executemany: SQLAlchemy arma los INSERT en lotes dentro del límite de
+        # parámetros por sentencia (32767 en asyncpg), sea cual sea BULK_CHUNK_SIZE
+        await self.db.execute(insert(Request), rows)
+        if bulk:
+            await self.db.execute(PUBLISH_RESET)
+        await self.db.commit()
+        self.inserted += len(rows)
+
+    def result(self) -> dict:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
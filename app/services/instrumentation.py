@@ -0,0 +1,144 @@
+"""
+Instrumentación por petición HTTP.
+
+RequestMetricsMiddleware mide latencia, peticiones en curso y, con los
+eventos de SQLAlchemy, cuántas sentencias SQL ejecutó cada petición y cuánto
+tardaron. Todo se publica en GET /metrics. Las peticiones más lentas que
+SLOW_REQUEST_SECONDS se loguean con las sentencias que más tiempo tomaron,
+lo que deja a la vista patrones N+1 (la misma sentencia repetida muchas veces).
+
+Los streams SSE (text/event-stream) duran lo que dure la conexión del
+cliente: dejan de contar como en curso al empezar la respuesta y no entran
+en la latencia ni en el log de peticiones lentas.
+
+Las sentencias se atribuyen a la petición mediante un ContextVar, que
+SQLAlchemy propaga a los greenlets del driver asíncrono.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.services.metrics import (
+    HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_FLIGHT, SQL_SECONDS_PER_REQUEST, SQL_STATEMENTS_PER_REQUEST
+)
+
+logger = logging.getLogger(__name__)
+
+SLOW_LOG_STATEMENTS = 5
+SLOW_LOG_STATEMENT_CHARS = 500
+
+
+def _is_event_stream(headers) -> bool:
+    return any(
+        name.lower() == b"content-type" and value.startswith(b"text/event-stream")
+        for name, value in headers
+    )
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.closed = False
+        # sentencia -> [veces, segundos]
+        self.statements = defaultdict(lambda: [0, 0.0])
+
+    def record(self, statement: str, seconds: float) -> None:
+        if self.closed:
+            return
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements[statement]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def slowest(self, limit: int) -> list[tuple[str, int, float]]:
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return [(statement, count, seconds) for statement, (count, seconds) in ranked[:limit]]
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+# Se registra sobre Engine: cubre el primario, la réplica y el engine síncrono
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _query_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _query_stats.get()
+    if stats is not None and conn.info.get("query_started"):
+        stats.record(statement, time.perf_counter() - conn.info["query_started"].pop())
+
+
+class RequestMetricsMiddleware:
+    """Middleware ASGI: la medición termina con el último byte de la respuesta,
+    así las background tasks no se cuentan en la latencia."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+        finished = False
+
+        def finish(observe: bool = True):
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            stats.closed = True
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            if observe:
+                self._observe(scope, status, time.perf_counter() - started, stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if _is_event_stream(message.get("headers", [])):
+                    finish(observe=False)
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
+            _query_stats.reset(token)
+
+    @staticmethod
+    def _observe(scope, status: int, seconds: float, stats: QueryStats) -> None:
+        method = scope["method"]
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        HTTP_REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+        SQL_STATEMENTS_PER_REQUEST.labels(method, route).observe(stats.count)
+        SQL_SECONDS_PER_REQUEST.labels(method, route).observe(stats.seconds)
+
+        if settings.SLOW_REQUEST_SECONDS and seconds >= settings.SLOW_REQUEST_SECONDS:
+            statements = "".join(
+                f"\n  {count}x {total * 1000:.1f}ms  {' '.join(statement.split())[:SLOW_LOG_STATEMENT_CHARS]}"
+                for statement, count, total in stats.slowest(SLOW_LOG_STATEMENTS)
+            )
+            logger.warning(
+                "Slow request %s %s -> %s in %.3fs (%d SQL statements, %.3fs in SQL)%s",
+                method, scope["path"], status, seconds, stats.count, stats.seconds, statements,
+            )
@@ -0,0 +1,282 @@
+"""
+Cola de trabajos sobre PostgreSQL, sin broker externo.
+
+Los trabajos se guardan en la tabla jobs y los toman procesos worker con
+UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED LIMIT 1): varios
+workers leen la misma cola sin bloquearse entre sí ni tomar dos veces el
+mismo trabajo. La API avisa con NOTIFY jobs al encolar; los workers esperan
+con LISTEN y, si se pierde un aviso, igual revisan cada JOB_POLL_INTERVAL.
+
+Un trabajo que falla vuelve a la cola con backoff exponencial hasta agotar
+max_attempts. Mientras corre, el worker renueva locked_at; si el proceso
+muere, el trabajo se devuelve a la cola al vencer JOB_LEASE_SECONDS.
+
+Uso:
+    python -m app.services.jobs --workers 4
+    python -m app.services.jobs --kinds rescore
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import select as select_module
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db import engine
+import app.models.company  # noqa: F401  relación Request.company al correr como worker
+from app.models.job import Job, JobStatus
+from app.services.events import prune_events
+from app.services.partitions import maintain_partitions
+from app.services.rescore import run_rescore, start_run
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "jobs"
+
+# tipo de trabajo -> función que recibe el payload y devuelve el resultado (JSON)
+HANDLERS: dict[str, Callable[[dict], Any]] = {}
+
+# Trabajo que corre en este hilo (para save_payload)
+_current = threading.local()
+
+
+def handler(kind: str):
+    def register(func: Callable[[dict], Any]):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+async def enqueue(db: AsyncSession, kind: str, payload: dict, max_attempts: int | None = None) -> Job:
+    """Agrega un trabajo a la transacción de `db`; el llamador confirma."""
+    job = Job(kind=kind, payload=payload)
+    if max_attempts is not None:
+        job.max_attempts = max_attempts
+    db.add(job)
+    # El aviso sale al confirmar la transacción: el worker ya ve la fila
+    await db.execute(text("SELECT pg_notify(:channel, :kind)"), {"channel": NOTIFY_CHANNEL, "kind": kind})
+    return job
+
+
+def save_payload(payload: dict) -> None:
+    """Guarda el payload del trabajo en curso: un reintento parte de lo anotado."""
+    with engine.begin() as conn:
+        conn.execute(
+            update(Job)
+            .where(Job.id == _current.job_id, Job.locked_by == _current.worker_id)
+            .values(payload=payload)
+        )
+
+
+@handler("rescore")
+def _rescore(payload: dict) -> dict:
+    # Con run_id se retoma esa ejecución desde su checkpoint; la nueva se
+    # anota en el payload para que los reintentos no creen otra
+    if not payload.get("run_id"):
+        payload["run_id"] = str(start_run().id)
+        save_payload(payload)
+    run_id = uuid.UUID(payload["run_id"])
+    # Si otra ejecución tiene el lock, RescoreLockBusy hace que se reintente
+    run_rescore(run_id, payload.get("chunk_size"), payload.get("workers"), payload.get("max_rows_per_second"))
+    return {"rescore_run_id": str(run_id)}
+
+
+@handler("requests.partitions")
+def _partitions(payload: dict) -> dict:
+    return maintain_partitions()
+
+
+# --- Cola --------------------------------------------------------------------
+
+def claim_job(conn, worker_id: str, kinds: list[str] | None = None):
+    """Toma el próximo trabajo disponible, o None. Queda tomado al confirmar `conn`."""
+    now = datetime.utcnow()
+    candidate = (
+        select(Job.id)
+        .where(Job.status == JobStatus.queued, Job.run_after <= now)
+        .order_by(Job.run_after, Job.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if kinds:
+        candidate = candidate.where(Job.kind.in_(kinds))
+    return conn.execute(
+        update(Job)
+        .where(Job.id == candidate.scalar_subquery())
+        .values(status=JobStatus.running, attempts=Job.attempts + 1, locked_by=worker_id, locked_at=now)
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+    ).first()
+
+
+def _finish(conn, job_id, worker_id: str, **values) -> None:
+    # Solo si sigue siendo nuestro: pudo vencer el lease y tomarlo otro worker
+    conn.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id)
+        .values(locked_by=None, locked_at=None, **values)
+    )
+
+
+def complete_job(conn, job, worker_id: str, result: Any) -> None:
+    _finish(conn, job.id, worker_id, status=JobStatus.succeeded, result=result, error=None,
+            finished_at=datetime.utcnow())
+
+
+def fail_job(conn, job, worker_id: str, error: str) -> None:
+    now = datetime.utcnow()
+    if job.attempts < job.max_attempts:
+        delay = settings.JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+        _finish(conn, job.id, worker_id, status=JobStatus.queued, error=error,
+                run_after=now + timedelta(seconds=delay))
+    else:
+        _finish(conn, job.id, worker_id, status=JobStatus.failed, error=error, finished_at=now)
+
+
+def requeue_stale_jobs(conn) -> int:
+    """Devuelve a la cola (o da por fallidos) los trabajos cuyo worker dejó de renovar el lease."""
+    now = datetime.utcnow()
+    expired = (Job.status == JobStatus.running, Job.locked_at < now - timedelta(seconds=settings.JOB_LEASE_SECONDS))
+    released = dict(error="Worker lease expired", locked_by=None, locked_at=None)
+    failed = conn.execute(
+        update(Job)
+        .where(*expired, Job.attempts >= Job.max_attempts)
+        .values(status=JobStatus.failed, finished_at=now, **released)
+    ).rowcount
+    requeued = conn.execute(
+        update(Job).where(*expired).values(status=JobStatus.queued, **released)
+    ).rowcount
+    return failed + requeued
+
+
+class _Heartbeat(threading.Thread):
+    """Renueva locked_at mientras corre el trabajo."""
+
+    def __init__(self, job_id, worker_id: str):
+        super().__init__(daemon=True)
+        self.job_id, self.worker_id = job_id, worker_id
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(settings.JOB_LEASE_SECONDS / 3):
+            with engine.begin() as conn:
+                conn.execute(
+                    update(Job)
+                    .where(Job.id == self.job_id, Job.locked_by == self.worker_id)
+                    .values(locked_at=datetime.utcnow())
+                )
+
+
+def run_one(worker_id: str, kinds: list[str] | None = None) -> bool:
+    """Toma y ejecuta un trabajo; False si la cola está vacía."""
+    with engine.begin() as conn:
+        job = claim_job(conn, worker_id, kinds)
+    if job is None:
+        return False
+
+    logger.info("Job %s (%s) started, attempt %d/%d", job.id, job.kind, job.attempts, job.max_attempts)
+    heartbeat = _Heartbeat(job.id, worker_id)
+    heartbeat.start()
+    _current.job_id, _current.worker_id = job.id, worker_id
+    try:
+        func = HANDLERS.get(job.kind)
+        if func is None:
+            raise LookupError(f"Unknown job kind: {job.kind}")
+        result = func(job.payload or {})
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", job.id, job.kind)
+        with engine.begin() as conn:
+            fail_job(conn, job, worker_id, f"{type(exc).__name__}: {exc}")
+    else:
+        with engine.begin() as conn:
+            complete_job(conn, job, worker_id, result)
+        logger.info("Job %s (%s) succeeded", job.id, job.kind)
+    finally:
+        heartbeat.stopped.set()
+        _current.job_id = _current.worker_id = None
+    return True
+
+
+def run_pending(kinds: list[str] | None = None, worker_id: str = "inline") -> int:
+    """Ejecuta en este proceso los trabajos disponibles hasta vaciar la cola."""
+    done = 0
+    while run_one(worker_id, kinds):
+        done += 1
+    return done
+
+
+# --- Worker ------------------------------------------------------------------
+
+def work(kinds: list[str] | None = None, stop: threading.Event | None = None) -> None:
+    """Bucle de un worker: un trabajo a la vez, despierta con NOTIFY o cada JOB_POLL_INTERVAL."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stop = stop or threading.Event()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as listener:
+        listener.exec_driver_sql(f"LISTEN {NOTIFY_CHANNEL}")
+        connection = listener.connection.driver_connection
+        logger.info("Worker %s listening (kinds: %s)", worker_id, ", ".join(kinds) if kinds else "all")
+        last_requeue = last_maintenance = 0.0
+        while not stop.is_set():
+            if time.monotonic() - last_requeue > settings.JOB_LEASE_SECONDS / 3:
+                with engine.begin() as conn:
+                    if requeue_stale_jobs(conn):
+                        logger.warning("Requeued jobs with expired leases")
+                last_requeue = time.monotonic()
+            # Particiones futuras, retención de requests y purga de request_events
+            if settings.PARTITION_MAINTENANCE_SECONDS and \
+                    time.monotonic() - last_maintenance > settings.PARTITION_MAINTENANCE_SECONDS:
+                try:
+                    maintain_partitions()
+                    prune_events()
+                except Exception:
+                    logger.exception("Partition maintenance failed")
+                last_maintenance = time.monotonic()
+            if run_one(worker_id, kinds):
+                continue
+            if select_module.select([connection], [], [], settings.JOB_POLL_INTERVAL)[0]:
+                connection.poll()
+                connection.notifies.clear()
+        listener.exec_driver_sql(f"UNLISTEN {NOTIFY_CHANNEL}")
+
+
+def _work_process(kinds: list[str] | None) -> None:
+    logging.basicConfig(level=logging.INFO)
+    try:
+        work(kinds)
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Procesa la cola de trabajos (tabla jobs)")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos worker (por defecto JOB_WORKERS)")
+    parser.add_argument("--kinds", default=None, help="Tipos de trabajo a procesar, separados por coma")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    kinds = [kind.strip() for kind in args.kinds.split(",")] if args.kinds else None
+    workers = args.workers or settings.JOB_WORKERS
+    # spawn, como en rescore: no hereda conexiones abiertas del padre
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_work_process, args=(kinds,)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Tiempo de espera para obtener una conexión del pool",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_IN_USE = Gauge("db_pool_connections_in_use", "Conexiones del pool actualmente prestadas")
+
+PRINCIPAL_CACHE_HITS = Counter("principal_cache_hits", "Usuarios autenticados resueltos desde el cache")
+PRINCIPAL_CACHE_MISSES = Counter("principal_cache_misses", "Usuarios autenticados resueltos desde la base de datos")
+
+DB_READ_ROUTING = Counter("db_read_routing", "Lecturas por destino (replica/primary)", ["target"])
+
+# Por petición HTTP (app/services/instrumentation.py); route es la plantilla, p. ej. /requests/{request_id}
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP hasta el último byte de la respuesta",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Peticiones HTTP en curso")
+SQL_STATEMENTS_PER_REQUEST = Histogram(
+    "http_request_sql_statements",
+    "Sentencias SQL ejecutadas por petición HTTP",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100, 250),
+)
+SQL_SECONDS_PER_REQUEST = Histogram(
+    "http_request_sql_seconds",
+    "Tiempo total en sentencias SQL por petición HTTP",
+    ["method", "route"],
+)
+
+# Feed de cambios (GET /requests/events)
+SSE_CLIENTS = Gauge("sse_clients", "Clientes conectados al feed de eventos")
+SSE_CLIENTS_DROPPED = Counter("sse_clients_dropped", "Clientes desconectados por llenar su buffer")
@@ -0,0 +1,62 @@
+import base64
+import json
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services.cache import TTLCache
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps([str(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+    # encode_cursor solo produce strings: cualquier otra cosa es un cursor alterado
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, str) for v in values):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+total_cache = TTLCache(ttl=settings.TOTAL_CACHE_TTL)
+
+
+async def _exact_total(db: AsyncSession, stmt) -> int:
+    count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+    return (await db.execute(count_stmt)).scalar_one()
+
+
+async def _estimated_total(db: AsyncSession, stmt) -> int:
+    # Uso la estimación del planner en vez de contar filas: cuesta lo mismo
+    # con mil filas que con millones.
+    compiled = stmt.order_by(None).compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    conn = await db.connection()
+    plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def get_total(db: AsyncSession, stmt, mode: str, cache_key: tuple) -> int:
+    key = (mode, *cache_key)
+    total = total_cache.get(key)
+    if total is None:
+        if mode == "exact":
+            total = await _exact_total(db, stmt)
+        else:
+            total = await _estimated_total(db, stmt)
+        total_cache.set(key, total)
+    return total
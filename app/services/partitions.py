@@ -0,0 +1,198 @@
+"""
+Particiones mensuales de requests (RANGE sobre created_at) y retención.
+
+Cada mes vive en requests_yYYYYmMM; lo que cae fuera de las particiones
+existentes va a requests_default. maintain_partitions crea los meses
+siguientes por adelantado (lo corren los workers de app/services/jobs.py) y,
+si hace falta crear un mes que ya tiene filas en la partición default, las
+mueve a la nueva en la misma transacción.
+
+La retención separa (DETACH) los meses más antiguos que
+REQUEST_RETENTION_MONTHS, los vuelca a un CSV comprimido en
+REQUEST_ARCHIVE_DIR y los borra. Solo se archivan meses con todas sus
+solicitudes decididas (approved/rejected); request_stats conserva sus
+conteos, así los dashboards siguen viendo la historia.
+
+Uso:
+    python -m app.services.partitions                       # crea particiones futuras
+    python -m app.services.partitions --retention-months 24 --archive-dir /backups/requests
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.db import engine
+from app.services.events import SUPPRESS_EVENTS
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock que serializa la creación y retención de particiones
+PARTITIONS_LOCK_KEY = 727_002
+
+DEFAULT_PARTITION = "requests_default"
+PARTITION_NAME = re.compile(r"^requests_y(\d{4})m(\d{2})$")
+# Columnas no generadas de requests
+COLUMNS = "id, company_id, status, risk_inputs, risk_score, risk_rules_version, created_at, version"
+UNDECIDED = ("pending", "in_review")
+
+
+def add_months(day: date, months: int) -> date:
+    """Primer día del mes que está `months` meses después del de `day`."""
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"requests_y{month.year}m{month.month:02d}"
+
+
+def _partition_month(name: str) -> date | None:
+    match = PARTITION_NAME.match(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def attached_partitions(conn) -> dict[date, str]:
+    names = conn.scalars(text("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'requests'::regclass
+    """))
+    return {month: name for name in names if (month := _partition_month(name))}
+
+
+def _detached_partitions(conn) -> list[str]:
+    # Meses ya separados de requests pero sin archivar (una retención interrumpida)
+    names = conn.scalars(text("""
+        SELECT c.relname FROM pg_class c
+        WHERE c.relkind = 'r' AND c.relnamespace = 'public'::regnamespace AND c.relname LIKE 'requests\\_y%'
+          AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)
+    """))
+    return sorted(name for name in names if _partition_month(name))
+
+
+def _create_partition(conn, month: date) -> None:
+    lower, upper = month, add_months(month, 1)
+    bounds = {"lower": lower, "upper": upper}
+    # Las filas del mes que hayan caído en la default impedirían crear la
+    # partición: se sacan, se crea y se vuelven a insertar por el padre. El
+    # DELETE y el INSERT mueven el rollup request_stats en -1/+1 y se anulan;
+    # los eventos se suprimen porque las solicitudes no cambian.
+    conn.execute(SUPPRESS_EVENTS)
+    conn.execute(text(f"CREATE TEMP TABLE moving_requests ON COMMIT DROP AS SELECT {COLUMNS} FROM requests LIMIT 0"))
+    moved = conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :lower AND created_at < :upper RETURNING {COLUMNS}
+        )
+        INSERT INTO moving_requests SELECT * FROM moved
+    """), bounds).rowcount
+    conn.execute(text(
+        f"CREATE TABLE {partition_name(month)} PARTITION OF requests "
+        f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    ))
+    if moved:
+        conn.execute(text(f"INSERT INTO requests ({COLUMNS}) SELECT {COLUMNS} FROM moving_requests"))
+        logger.info("Moved %d rows from %s to %s", moved, DEFAULT_PARTITION, partition_name(month))
+
+
+def ensure_partitions(start: date, end: date) -> list[str]:
+    """Crea las particiones que falten para los meses entre `start` y `end` (inclusive)."""
+    created = []
+    month = start.replace(day=1)
+    while month <= end:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITIONS_LOCK_KEY})
+            if month not in attached_partitions(conn):
+                _create_partition(conn, month)
+                created.append(partition_name(month))
+        month = add_months(month, 1)
+    if created:
+        logger.info("Created partitions: %s", ", ".join(created))
+    return created
+
+
+# --- Retención ---------------------------------------------------------------
+
+def archive_partition(name: str, archive_dir: str) -> str:
+    """Vuelca una partición ya separada a <archive_dir>/<name>.csv.gz y la borra."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    partial = path + ".partial"
+    conn = engine.raw_connection()
+    try:
+        with gzip.open(partial, "wb") as f, conn.cursor() as cursor:
+            cursor.copy_expert(f"COPY (SELECT * FROM {name} ORDER BY created_at, id) TO STDOUT WITH CSV HEADER", f)
+        # Solo se borra la tabla con el archivo completo en disco
+        os.replace(partial, path)
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {name}")
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+def apply_retention(months: int, archive_dir: str, today: date | None = None) -> dict:
+    """Archiva los meses anteriores a `months` meses atrás que ya estén decididos."""
+    cutoff = add_months(today or date.today(), -months)
+    archived, skipped = [], []
+    with engine.connect() as conn:
+        pending = _detached_partitions(conn)
+        candidates = sorted(
+            (month, name) for month, name in attached_partitions(conn).items() if add_months(month, 1) <= cutoff
+        )
+
+    for _, name in candidates:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITIONS_LOCK_KEY})
+            undecided = conn.scalar(text(f"SELECT count(*) FROM {name} WHERE status IN {UNDECIDED}"))
+            if undecided:
+                logger.warning("Partition %s kept: %d requests are not decided yet", name, undecided)
+                skipped.append(name)
+                continue
+            conn.execute(text(f"ALTER TABLE requests DETACH PARTITION {name}"))
+        pending.append(name)
+
+    for name in pending:
+        path = archive_partition(name, archive_dir)
+        logger.info("Partition %s archived to %s", name, path)
+        archived.append(path)
+    return {"archived": archived, "skipped": skipped}
+
+
+def maintain_partitions(today: date | None = None) -> dict:
+    today = today or date.today()
+    created = ensure_partitions(today, add_months(today, settings.REQUEST_PARTITION_MONTHS_AHEAD))
+    result = {"created": created}
+    if settings.REQUEST_RETENTION_MONTHS:
+        result.update(apply_retention(settings.REQUEST_RETENTION_MONTHS, settings.REQUEST_ARCHIVE_DIR, today))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crea particiones mensuales de requests y aplica la retención")
+    parser.add_argument("--retention-months", type=int, default=None,
+                        help="Archiva los meses más antiguos que esto (por defecto REQUEST_RETENTION_MONTHS)")
+    parser.add_argument("--archive-dir", default=None, help="Por defecto REQUEST_ARCHIVE_DIR")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.retention_months is not None:
+        settings.REQUEST_RETENTION_MONTHS = args.retention_months
+    if args.archive_dir:
+        settings.REQUEST_ARCHIVE_DIR = args.archive_dir
+    result = maintain_partitions()
+    print(f"Particiones creadas: {', '.join(result['created']) or 'ninguna'}")
+    for path in result.get("archived", []):
+        print(f"Archivada: {path}")
+    for name in result.get("skipped", []):
+        print(f"Conservada (tiene solicitudes sin decidir): {name}")
+
+
+if __name__ == "__main__":
+    main()
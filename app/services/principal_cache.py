@@ -0,0 +1,170 @@
+"""
+Cache de usuarios autenticados para get_current_user.
+
+Evita la consulta a users (y el checkout de una conexión) en cada petición
+autenticada. Por defecto es un TTL/LRU en memoria por proceso; con
+PRINCIPAL_CACHE_URL=redis://... se comparte entre workers.
+
+Las entradas se invalidan al confirmar (commit) una sesión que actualizó o
+borró un User por el ORM: invalidar en el flush dejaría que otra petición
+vuelva a cachear la fila vieja antes del commit. Los UPDATE/DELETE directos
+sobre users deben llamar a principal_cache.invalidate.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.config import settings
+from app.models.user import User, UserRole
+from app.services.cache import TTLCache
+from app.services.metrics import PRINCIPAL_CACHE_HITS, PRINCIPAL_CACHE_MISSES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: UUID
+    email: str
+    role: UserRole
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, role=UserRole(user.role))
+
+    def to_json(self) -> str:
+        return json.dumps({"id": str(self.id), "email": self.email, "role": self.role.value})
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> "Principal":
+        data = json.loads(raw)
+        return cls(id=UUID(data["id"]), email=data["email"], role=UserRole(data["role"]))
+
+
+class LocalBackend:
+    def __init__(self, ttl: float, maxsize: int):
+        self._cache = TTLCache(ttl=ttl, maxsize=maxsize)
+
+    async def get(self, key: str) -> Principal | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, principal: Principal) -> None:
+        self._cache.set(key, principal)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class RedisBackend:
+    """Backend compartido; redis es opcional y solo se importa si se configura."""
+
+    prefix = "principal:"
+
+    def __init__(self, url: str, ttl: float):
+        import redis
+        import redis.asyncio
+
+        self.ttl = max(int(ttl), 1)
+        self._async = redis.asyncio.from_url(url)
+        # Cliente síncrono para invalidar desde sesiones que corren fuera del
+        # event loop (threadpool, workers de la cola)
+        self._sync = redis.from_url(url)
+        self._pending: set[asyncio.Task] = set()
+
+    async def get(self, key: str) -> Principal | None:
+        raw = await self._async.get(self.prefix + key)
+        return Principal.from_json(raw) if raw else None
+
+    async def set(self, key: str, principal: Principal) -> None:
+        await self._async.set(self.prefix + key, principal.to_json(), ex=self.ttl)
+
+    def delete(self, key: str) -> None:
+        # Los eventos del ORM son síncronos, pero con AsyncSession corren en el
+        # hilo del event loop: ahí el DEL va por el cliente asíncrono para no
+        # bloquear el loop
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._sync.delete(self.prefix + key)
+            return
+        task = loop.create_task(self._async.delete(self.prefix + key))
+        self._pending.add(task)
+        task.add_done_callback(self._delete_done)
+
+    def _delete_done(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Could not invalidate cached principal", exc_info=task.exception())
+
+    def clear(self) -> None:
+        for key in self._sync.scan_iter(self.prefix + "*"):
+            self._sync.delete(key)
+
+
+class PrincipalCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: UUID) -> Principal | None:
+        principal = await self.backend.get(str(user_id))
+        if principal is None:
+            self.misses += 1
+            PRINCIPAL_CACHE_MISSES.inc()
+        else:
+            self.hits += 1
+            PRINCIPAL_CACHE_HITS.inc()
+        return principal
+
+    async def set(self, principal: Principal) -> None:
+        await self.backend.set(str(principal.id), principal)
+
+    def invalidate(self, user_id: UUID) -> None:
+        self.backend.delete(str(user_id))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+def _build_backend():
+    if settings.PRINCIPAL_CACHE_URL:
+        return RedisBackend(settings.PRINCIPAL_CACHE_URL, settings.PRINCIPAL_CACHE_TTL)
+    return LocalBackend(settings.PRINCIPAL_CACHE_TTL, settings.PRINCIPAL_CACHE_MAXSIZE)
+
+
+principal_cache = PrincipalCache(_build_backend())
+
+
+_CHANGED_USERS = "principal_cache_changed_users"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_changed_user(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        principal_cache.invalidate(target.id)
+    else:
+        session.info.setdefault(_CHANGED_USERS, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop(_CHANGED_USERS, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changed_users(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_CHANGED_USERS, None)
@@ -0,0 +1,245 @@
+"""
+Re-scoring de la cartera: recalcula risk_score de todas las solicitudes
+con la versión activa de las reglas de riesgo (RISK_RULES_VERSION).
+
+Recorre requests por PK con cursores del lado del servidor, puntúa los
+chunks en un pool de procesos y escribe solo las filas que cambian con un
+UPDATE ... FROM (VALUES ...). Cada chunk guarda su checkpoint en la misma
+transacción, así que una ejecución interrumpida se puede retomar.
+
+El UPDATE exige la misma version que se leyó: si un PUT o un cambio de
+estado confirmó entre la lectura y la escritura, la fila no se pisa. Esos
+conflictos se vuelven a leer con FOR UPDATE y se puntúan en la misma
+transacción; RescoreRun.conflicts lleva la cuenta.
+
+Las filas reescritas no generan eventos SSE uno por uno: al terminar (bien o
+mal) la ejecución publica un único reset si cambió alguna solicitud.
+
+Uso:
+    python -m app.services.rescore            # nueva ejecución
+    python -m app.services.rescore --resume <run_id>
+"""
+
+import argparse
+import logging
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import Integer, String, column, func, select, text, update, values
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.models.request import Request
+from app.models.rescore import RescoreRun, RescoreStatus
+from app.services.events import PUBLISH_RESET, SUPPRESS_EVENTS
+from app.services.risk import RISK_RULES_VERSION, calculate_risk_many
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock que impide dos re-scorings a la vez
+RESCORE_LOCK_KEY = 727_001
+
+
+class RescoreLockBusy(RuntimeError):
+    """Otra ejecución tiene el lock: la pedida no se toca y se puede reintentar."""
+
+
+# Columnas que lee el re-scoring; version es la de la fila, para detectar conflictos
+SCORE_COLUMNS = (Request.id, Request.risk_inputs, Request.risk_score, Request.risk_rules_version, Request.version)
+
+
+def _score_chunk(rows: list[tuple]) -> list[tuple]:
+    """Se ejecuta en los procesos del pool: devuelve (id, score, versión de reglas, version leída)
+    de las filas que cambian."""
+    scores = calculate_risk_many([risk_inputs for _, risk_inputs, _, _, _ in rows])
+    return [
+        (row_id, new, RISK_RULES_VERSION, row_version)
+        for (row_id, _, old, rules_version, row_version), new in zip(rows, scores)
+        if new != old or rules_version != RISK_RULES_VERSION
+    ]
+
+
+def _iter_windows(last_id, chunk_size: int, chunks_per_window: int):
+    """Lee ventanas de varios chunks con un cursor del lado del servidor.
+
+    Cada ventana es una transacción corta de solo lectura, para no retener
+    un snapshot durante toda la ejecución.
+    """
+    while True:
+        stmt = select(*SCORE_COLUMNS).order_by(Request.id)
+        if last_id is not None:
+            stmt = stmt.where(Request.id > last_id)
+        stmt = stmt.limit(chunk_size * chunks_per_window)
+
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+            window = [[tuple(row) for row in chunk] for chunk in result.partitions()]
+        if not window:
+            return
+        yield window
+        last_id = window[-1][-1][0]
+
+
+def _update_scores(db, changed: list[tuple]) -> set:
+    """Escribe los puntajes de las filas que siguen en la version leída; devuelve sus ids."""
+    v = values(
+        column("id", UUID(as_uuid=True)), column("score", Integer), column("rules_version", String),
+        column("version", Integer), name="v",
+    ).data(changed)
+    return set(db.scalars(
+        update(Request)
+        .where(Request.id == v.c.id, Request.version == v.c.version)
+        .values(risk_score=v.c.score, risk_rules_version=v.c.rules_version, version=Request.version + 1)
+        .returning(Request.id),
+        execution_options={"synchronize_session": False},
+    ))
+
+
+def _write_chunk(run_id, chunk: list[tuple], changed: list[tuple]) -> None:
+    updated = conflicts = 0
+    with SessionLocal() as db:
+        if changed:
+            db.execute(SUPPRESS_EVENTS)
+            written = _update_scores(db, changed)
+            conflicted = [row[0] for row in changed if row[0] not in written]
+            updated = len(written)
+            if conflicted:
+                # Cambiaron después de la lectura: se releen bloqueadas, así
+                # nadie más las modifica antes de escribir
+                fresh = [tuple(row) for row in db.execute(
+                    select(*SCORE_COLUMNS).where(Request.id.in_(conflicted)).with_for_update()
+                )]
+                updated += len(_update_scores(db, _score_chunk(fresh)))
+                conflicts = len(conflicted)
+        db.execute(
+            update(RescoreRun)
+            .where(RescoreRun.id == run_id)
+            .values(
+                last_id=chunk[-1][0],
+                processed=RescoreRun.processed + len(chunk),
+                updated=RescoreRun.updated + updated,
+                conflicts=RescoreRun.conflicts + conflicts,
+                updated_at=datetime.utcnow(),
+            )
+        )
+        db.commit()
+
+
+def start_run() -> RescoreRun:
+    with SessionLocal() as db:
+        run = RescoreRun(
+            total=db.scalar(select(func.count()).select_from(Request)), processed=0, updated=0, conflicts=0
+        )
+        db.add(run)
+        db.commit()
+        db.refresh(run)
+        return run
+
+
+def run_rescore(run_id, chunk_size: int | None = None, workers: int | None = None,
+                max_rows_per_second: int | None = None) -> None:
+    chunk_size = chunk_size or settings.RESCORE_CHUNK_SIZE
+    workers = workers or settings.RESCORE_WORKERS
+    if max_rows_per_second is None:
+        max_rows_per_second = settings.RESCORE_MAX_ROWS_PER_SECOND
+
+    with engine.connect() as lock_conn:
+        if not lock_conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": RESCORE_LOCK_KEY}):
+            logger.warning("Rescore %s not started: another run holds the lock", run_id)
+            # Sin el lock este proceso no es dueño de la ejecución: puede ser la
+            # misma que está corriendo en otro lado. Si nadie la retoma,
+            # fail_stale_runs la da por fallida.
+            raise RescoreLockBusy(f"Rescore {run_id} not started: another run holds the lock")
+        try:
+            with SessionLocal() as db:
+                run = db.get(RescoreRun, run_id)
+                if run is None or run.status == RescoreStatus.completed:
+                    return
+                run.status = RescoreStatus.running
+                run.error = None
+                db.commit()
+                last_id = run.last_id
+
+            # spawn: el job puede correr en un hilo de la API y fork no es seguro ahí
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                for window in _iter_windows(last_id, chunk_size, workers):
+                    started = time.monotonic()
+                    for chunk, changed in zip(window, pool.map(_score_chunk, window)):
+                        _write_chunk(run_id, chunk, changed)
+                    # Throttling: cada ventana no baja de lo que marca el límite
+                    if max_rows_per_second:
+                        rows = sum(len(chunk) for chunk in window)
+                        time.sleep(max(0.0, rows / max_rows_per_second - (time.monotonic() - started)))
+
+            _finish(run_id, RescoreStatus.completed)
+        except Exception as exc:
+            logger.exception("Rescore %s failed", run_id)
+            _finish(run_id, RescoreStatus.failed, str(exc))
+            raise
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RESCORE_LOCK_KEY})
+
+
+def _finish(run_id, status: RescoreStatus, error: str | None = None) -> None:
+    with SessionLocal() as db:
+        updated = db.scalar(
+            update(RescoreRun)
+            .where(RescoreRun.id == run_id)
+            .values(status=status, error=error, finished_at=datetime.utcnow(), updated_at=datetime.utcnow())
+            .returning(RescoreRun.updated)
+        )
+        if updated:
+            db.execute(PUBLISH_RESET)
+        db.commit()
+
+
+def fail_stale_runs() -> int:
+    """Da por fallidas las ejecuciones en running que nadie está procesando.
+
+    Si el lock está libre no hay ningún proceso trabajando (el lock se suelta
+    solo cuando la conexión muere); RESCORE_STALE_SECONDS deja margen a una
+    ejecución recién creada que todavía no tomó el lock.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.RESCORE_STALE_SECONDS)
+    with engine.connect() as lock_conn:
+        if not lock_conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": RESCORE_LOCK_KEY}):
+            return 0
+        try:
+            with SessionLocal() as db:
+                failed = db.execute(
+                    update(RescoreRun)
+                    .where(RescoreRun.status == RescoreStatus.running, RescoreRun.updated_at < cutoff)
+                    .values(status=RescoreStatus.failed, error="Interrupted", finished_at=datetime.utcnow())
+                ).rowcount
+                db.commit()
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RESCORE_LOCK_KEY})
+    if failed:
+        logger.warning("Marked %d interrupted rescore runs as failed", failed)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula risk_score de todas las solicitudes")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Retoma una ejecución desde su checkpoint")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-rows-per-second", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run_id = uuid.UUID(args.resume) if args.resume else start_run().id
+    print(f"Rescore {run_id} en curso...")
+    run_rescore(run_id, args.chunk_size, args.workers, args.max_rows_per_second)
+    with SessionLocal() as db:
+        run = db.get(RescoreRun, run_id)
+        print(f"Rescore {run.status.value}: {run.processed}/{run.total} procesadas, {run.updated} actualizadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,194 @@
+"""
+Motor de reglas de riesgo.
+
+Las reglas se definen como datos (app/risk_rules/<version>.json) y se
+compilan una sola vez al importar el módulo en una función plana, así el
+camino caliente no interpreta la configuración en cada solicitud. Cada
+risk_score guarda la versión de reglas que lo produjo.
+
+Tipos de regla:
+    flag    suma `weight` si el input es verdadero
+    count   suma input * `weight`, con tope opcional `cap`
+    lookup  suma `weights[input]` (o `default`), p. ej. riesgo por país
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from app.config import settings
+
+RULE_TYPES = ("flag", "count", "lookup")
+
+
+def _number(rule: dict, key: str, required: bool = True):
+    value = rule.get(key)
+    if value is None and not required:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"Rule {rule.get('input')!r}: {key} must be an integer")
+    return value
+
+
+def _validate(data: dict) -> dict:
+    if not isinstance(data.get("version"), str) or not data["version"]:
+        raise ValueError("Ruleset needs a version")
+    _number(data, "max_score")
+    for rule in data.get("rules", []):
+        if not isinstance(rule.get("input"), str) or not rule["input"].isidentifier():
+            raise ValueError(f"Invalid rule input: {rule.get('input')!r}")
+        if rule.get("type") not in RULE_TYPES:
+            raise ValueError(f"Rule {rule['input']!r}: type must be one of {RULE_TYPES}")
+        if rule["type"] == "lookup":
+            weights = rule.get("weights")
+            if not isinstance(weights, dict) or not all(
+                isinstance(v, int) and not isinstance(v, bool) for v in weights.values()
+            ):
+                raise ValueError(f"Rule {rule['input']!r}: weights must map values to integers")
+            _number(rule, "default", required=False)
+        else:
+            _number(rule, "weight")
+            _number(rule, "cap", required=False)
+    return data
+
+
+def _generate_source(data: dict) -> str:
+    # Genero el cuerpo de la función una vez; los valores ya están validados
+    lines = ["def score(inputs):", "    get = inputs.get", "    score = 0"]
+    for i, rule in enumerate(data["rules"]):
+        key = repr(rule["input"])
+        if rule["type"] == "flag":
+            lines.append(f"    if get({key}):")
+            lines.append(f"        score += {rule['weight']}")
+        elif rule["type"] == "count":
+            term = f"get({key}, 0) * {rule['weight']}"
+            if rule.get("cap") is not None:
+                term = f"min({term}, {rule['cap']})"
+            lines.append(f"    score += {term}")
+        else:
+            lines.append(f"    score += _table_{i}.get(get({key}), {rule.get('default') or 0})")
+    lines.append(f"    return min(score, {data['max_score']})")
+    return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class CompiledRuleset:
+    version: str
+    rules: tuple
+    max_score: int
+    score: Callable[[dict], int]
+
+    def score_columns(self, columns: dict) -> np.ndarray:
+        """Puntúa columnas (un array por input) en una pasada vectorizada."""
+        size = len(next(iter(columns.values()))) if columns else 0
+        total = np.zeros(size, dtype=np.int64)
+        for rule in self.rules:
+            values = columns.get(rule["input"])
+            if rule["type"] == "flag":
+                if values is not None:
+                    total += np.asarray(values, dtype=bool) * rule["weight"]
+            elif rule["type"] == "count":
+                if values is None:
+                    continue
+                points = np.asarray(values, dtype=np.int64) * rule["weight"]
+                if rule.get("cap") is not None:
+                    points = np.minimum(points, rule["cap"])
+                total += points
+            else:
+                table, default = rule["weights"], rule.get("default") or 0
+                if values is None:
+                    total += default
+                else:
+                    total += np.fromiter((table.get(v, default) for v in values), dtype=np.int64, count=size)
+        return np.minimum(total, self.max_score)
+
+    def explain(self, inputs: dict) -> list[dict]:
+        """Puntos aportados por cada regla para un conjunto de inputs.
+
+        Si la suma supera max_score se agrega un aporte final (type "cap", con
+        puntos negativos), así la suma coincide con el puntaje guardado.
+        """
+        contributions = []
+        for rule in self.rules:
+            value = inputs.get(rule["input"])
+            if rule["type"] == "flag":
+                points = rule["weight"] if value else 0
+            elif rule["type"] == "count":
+                points = (value or 0) * rule["weight"]
+                if rule.get("cap") is not None:
+                    points = min(points, rule["cap"])
+            else:
+                points = rule["weights"].get(value, rule.get("default") or 0)
+            contributions.append({"input": rule["input"], "type": rule["type"], "value": value, "points": points})
+        total = sum(c["points"] for c in contributions)
+        if total > self.max_score:
+            contributions.append(
+                {"input": "max_score", "type": "cap", "value": self.max_score, "points": self.max_score - total}
+            )
+        return contributions
+
+
+def compile_ruleset(data: dict) -> CompiledRuleset:
+    data = _validate(data)
+    namespace = {
+        f"_table_{i}": dict(rule["weights"])
+        for i, rule in enumerate(data["rules"])
+        if rule["type"] == "lookup"
+    }
+    exec(compile(_generate_source(data), f"<risk rules {data['version']}>", "exec"), namespace)
+    return CompiledRuleset(
+        version=data["version"],
+        rules=tuple(data["rules"]),
+        max_score=data["max_score"],
+        score=namespace["score"],
+    )
+
+
+_rulesets: dict[str, CompiledRuleset] = {}
+
+
+def load_ruleset(version: str) -> CompiledRuleset:
+    """Carga y compila una versión de reglas (se cachea por proceso)."""
+    if version not in _rulesets:
+        path = Path(settings.RISK_RULES_DIR) / f"{version}.json"
+        with path.open() as f:
+            ruleset = compile_ruleset(json.load(f))
+        if ruleset.version != version:
+            raise ValueError(f"{path} declares version {ruleset.version!r}")
+        _rulesets[version] = ruleset
+    return _rulesets[version]
+
+
+# Reglas activas: se compilan al importar el módulo (arranque de la app)
+ruleset = load_ruleset(settings.RISK_RULES_VERSION)
+RISK_RULES_VERSION = ruleset.version
+
+
 def calculate_risk(inputs: dict) -> int:
-    score = 0
-    if inputs.get("pep_flag"):
-        score += 60
-    if inputs.get("sanction_list"):
-        score += 40
-    late = inputs.get("late_payments", 0)
-    score += min(late * 10, 30)
-    return min(score, 100)  
+    return ruleset.score(inputs)
+
+
+def calculate_risk_batch(pep_flag, sanction_list, late_payments, **other_columns) -> np.ndarray:
+    """Versión vectorizada de calculate_risk sobre columnas (una posición por solicitud)."""
+    columns = {"pep_flag": pep_flag, "sanction_list": sanction_list, "late_payments": late_payments}
+    columns.update(other_columns)
+    return ruleset.score_columns(columns)
+
+
+def calculate_risk_many(inputs: list[dict]) -> list[int]:
+    """Puntúa una lista de risk_inputs en una sola pasada."""
+    if not inputs:
+        return []
+    columns = {}
+    for rule in ruleset.rules:
+        key = rule["input"]
+        if rule["type"] == "flag":
+            columns[key] = [bool(i.get(key)) for i in inputs]
+        elif rule["type"] == "count":
+            columns[key] = [i.get(key, 0) for i in inputs]
+        else:
+            columns[key] = [i.get(key) for i in inputs]
+    return ruleset.score_columns(columns).tolist()
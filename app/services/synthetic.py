@@ -0,0 +1,251 @@
+"""
+Generador de datos sintéticos para reproducir volúmenes de producción.
+
+Los datos dependen solo de la semilla y de las cantidades: cada chunk de
+solicitudes usa su propio generador (semilla, chunk), así el resultado no
+cambia con la cantidad de procesos. La generación y la carga (COPY, una
+transacción por chunk) corren en paralelo en un pool de procesos, y los
+puntajes salen del motor de reglas compartido (calculate_risk_batch).
+
+Durante la carga se desactiva el trigger del rollup request_stats y al final
+se recalcula completo, en vez de pagar un upsert por fila. Tampoco se
+generan eventos del feed de cambios (trigger requests_events).
+
+Uso:
+    python -m app.services.synthetic --companies 100000 --requests 5000000 --seed 42
+"""
+
+import argparse
+import io
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import text
+
+from app.db import engine
+from app.services.partitions import ensure_partitions
+from app.services.risk import RISK_RULES_VERSION, calculate_risk_batch
+from app.services.security import hash_password
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("pending", "in_review", "approved", "rejected")
+STATUS_WEIGHTS = (0.4, 0.2, 0.25, 0.15)
+COUNTRIES = ("CL", "AR", "PE", "CO", "MX")
+SYLLABLES = ("ac", "me", "glo", "bex", "ini", "tech", "hoo", "li", "nor", "sur", "an", "des", "mar", "sol", "vi", "ta")
+
+REQUEST_COLUMNS = "id, company_id, status, risk_inputs, risk_score, risk_rules_version, created_at"
+
+# Mismas expresiones que los triggers de la migración request_stats
+REBUILD_STATS_SQL = """
+    INSERT INTO request_stats (bucket_date, company_id, status, risk_bucket, count)
+    SELECT coalesce(created_at, 'epoch')::date, company_id, status,
+           greatest(0, least(10, risk_score / 10))::smallint, count(*)
+    FROM requests
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+def _uuids(rng: np.random.Generator, n: int) -> list[str]:
+    raw = rng.bytes(16 * n)
+    return [str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * n, 16)]
+
+
+def _copy(conn, table: str, columns: str, data: str) -> None:
+    with conn.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", io.StringIO(data))
+
+
+# --- Empresas ----------------------------------------------------------------
+
+def company_rows(seed: int, count: int) -> list[tuple]:
+    rng = np.random.default_rng([seed, 0])
+    ids = _uuids(rng, count)
+    syllables = rng.integers(0, len(SYLLABLES), size=(count, 3)).tolist()
+    lengths = rng.integers(2, 4, count).tolist()
+    tax_ids = rng.integers(1_000_000, 99_999_999, count).tolist()
+    check_digits = rng.integers(0, 10, count).tolist()
+    countries = rng.integers(0, len(COUNTRIES), count).tolist()
+    return [
+        (
+            ids[i],
+            # El sufijo hace único el nombre (companies.name es UNIQUE)
+            "".join(SYLLABLES[s] for s in syllables[i][:lengths[i]]).capitalize() + f" {seed}-{i:07d}",
+            f"{tax_ids[i]}-{check_digits[i]}",
+            COUNTRIES[countries[i]],
+        )
+        for i in range(count)
+    ]
+
+
+def load_companies(seed: int, count: int) -> list[str]:
+    """Carga las empresas (las que ya existen se saltan) y devuelve sus ids."""
+    rows = company_rows(seed, count)
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE seed_companies (id uuid, name text, tax_id text, country text)")
+        _copy(conn, "seed_companies", "id, name, tax_id, country", "".join("\t".join(row) + "\n" for row in rows))
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO companies (id, name, tax_id, country, created_at)
+                SELECT id, name, tax_id, country, now() at time zone 'utc' FROM seed_companies
+                ON CONFLICT DO NOTHING
+            """)
+            cursor.execute("DROP TABLE seed_companies")
+        conn.commit()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+
+# --- Usuarios ----------------------------------------------------------------
+
+def load_users(seed: int, count: int, password: str) -> None:
+    # Un solo hash para todos: bcrypt por fila haría del seed una prueba de CPU
+    password_hash = hash_password(password)
+    rng = np.random.default_rng([seed, 2])
+    ids = _uuids(rng, count)
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO users (id, email, password_hash, role, created_at)
+                VALUES (:id, :email, :password_hash, 'analyst', now() at time zone 'utc')
+                ON CONFLICT DO NOTHING
+            """),
+            [
+                {"id": ids[i], "email": f"user{seed}-{i}@example.com", "password_hash": password_hash}
+                for i in range(count)
+            ],
+        )
+
+
+# --- Solicitudes -------------------------------------------------------------
+
+_company_ids: list[str] = []
+
+
+def _init_worker(company_ids: list[str]) -> None:
+    global _company_ids
+    _company_ids = company_ids
+
+
+def request_chunk(seed: int, index: int, size: int, until: datetime, days: int) -> str:
+    """Filas del chunk `index` en formato texto de COPY."""
+    rng = np.random.default_rng([seed, 1, index])
+    ids = _uuids(rng, size)
+    pep = rng.random(size) < 0.1
+    sanction = rng.random(size) < 0.05
+    late = rng.integers(0, 6, size)
+    scores = calculate_risk_batch(pep, sanction, late).tolist()
+    companies = rng.integers(0, len(_company_ids), size).tolist()
+    statuses = rng.choice(len(STATUSES), size, p=STATUS_WEIGHTS).tolist()
+    offsets = rng.integers(0, days * 86400, size).tolist()
+
+    flags = {True: "true", False: "false"}
+    lines = [
+        f"{ids[i]}\t{_company_ids[companies[i]]}\t{STATUSES[statuses[i]]}\t"
+        f'{{"pep_flag": {flags[p]}, "sanction_list": {flags[s]}, "late_payments": {l}}}\t'
+        f"{scores[i]}\t{RISK_RULES_VERSION}\t{until - timedelta(seconds=offsets[i])}\n"
+        for i, (p, s, l) in enumerate(zip(pep.tolist(), sanction.tolist(), late.tolist()))
+    ]
+    return "".join(lines)
+
+
+def _load_request_chunk(seed: int, index: int, size: int, until: datetime, days: int) -> int:
+    data = request_chunk(seed, index, size, until, days)
+    conn = engine.raw_connection()
+    try:
+        _copy(conn, "requests", REQUEST_COLUMNS, data)
+        conn.commit()
+    finally:
+        conn.close()
+    return size
+
+
+def load_requests(seed: int, count: int, company_ids: list[str], workers: int, chunk_size: int,
+                  until: datetime, days: int) -> None:
+    # Cada mes del rango con su partición; si no, las filas irían a requests_default
+    ensure_partitions((until - timedelta(days=days)).date(), until.date())
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE requests DISABLE TRIGGER requests_stats_insert_delete"))
+        conn.execute(text("ALTER TABLE requests DISABLE TRIGGER requests_events"))
+    try:
+        # spawn, como en rescore: no hereda conexiones abiertas del padre
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(company_ids,)) as pool:
+            futures = [
+                pool.submit(_load_request_chunk, seed, index, min(chunk_size, count - start), until, days)
+                for index, start in enumerate(range(0, count, chunk_size))
+            ]
+            loaded = 0
+            for future in as_completed(futures):
+                loaded += future.result()
+                logger.info("requests: %d/%d", loaded, count)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE requests ENABLE TRIGGER requests_events"))
+        rebuild_request_stats()
+
+
+def rebuild_request_stats() -> None:
+    with engine.begin() as conn:
+        # SHARE bloquea escrituras en requests mientras se recalcula
+        conn.execute(text("LOCK TABLE requests IN SHARE MODE"))
+        conn.execute(text("ALTER TABLE requests ENABLE TRIGGER requests_stats_insert_delete"))
+        conn.execute(text("DELETE FROM request_stats"))
+        conn.execute(text(REBUILD_STATS_SQL))
+
+
+def generate(companies: int, requests: int, seed: int = 42, users: int = 0, workers: int | None = None,
+             chunk_size: int = 50_000, until: datetime | None = None, days: int = 365,
+             password: str = "Password123!") -> None:
+    # Por defecto las fechas terminan hoy a medianoche: mismo día, mismos datos
+    until = until or datetime.combine(date.today(), datetime.min.time())
+    started = time.monotonic()
+
+    if companies:
+        company_ids = load_companies(seed, companies)
+    else:
+        with engine.connect() as conn:
+            company_ids = [str(i) for i in conn.scalars(text("SELECT id FROM companies ORDER BY id"))]
+    if requests and not company_ids:
+        raise SystemExit("No hay empresas: usa --companies")
+    if users:
+        load_users(seed, users, password)
+    if requests:
+        load_requests(seed, requests, company_ids, workers or os.cpu_count() or 1, chunk_size, until, days)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE companies"))
+        conn.execute(text("ANALYZE requests"))
+    logger.info("Seed listo en %.1fs: %d empresas, %d usuarios, %d solicitudes (semilla %d)",
+                time.monotonic() - started, companies, users, requests, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera y carga datos sintéticos reproducibles")
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto, uno por CPU)")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=365, help="Rango de created_at hacia atrás")
+    parser.add_argument("--until", type=date.fromisoformat, default=None, help="Fecha final (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    until = datetime.combine(args.until, datetime.min.time()) if args.until else None
+    generate(args.companies, args.requests, args.seed, args.users, args.workers, args.chunk_size, until, args.days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de una página del listado de solicitudes (por defecto 100
+filas): consulta + serialización, sin HTTP de por medio.
+
+    orm      select(Request) + joinedload(company) + validación RequestRead + json
+    columns  select de columnas + FastJSONResponse (orjson), camino actual
+
+Necesita al menos --page-size solicitudes en la base (seed_data.py).
+
+Uso:
+    python benchmarks/list_serialization.py --page-size 100 --iterations 500
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.requests import LIST_COLUMNS
+from app.api.responses import FastJSONResponse, rows_to_dicts
+from app.db import AsyncSessionLocal, async_engine
+from app.models.request import Request
+from app.schemas.request import RequestRead
+
+read_list = TypeAdapter(List[RequestRead])
+
+
+async def orm_page(db, page_size: int) -> bytes:
+    stmt = (
+        select(Request)
+        .options(joinedload(Request.company))
+        .order_by(Request.created_at.desc(), Request.id.desc())
+        .limit(page_size)
+    )
+    requests = (await db.execute(stmt)).scalars().all()
+    content = read_list.dump_python(read_list.validate_python(requests, from_attributes=True), mode="json")
+    return JSONResponse(content).body
+
+
+async def columns_page(db, page_size: int) -> bytes:
+    stmt = select(*LIST_COLUMNS).order_by(Request.created_at.desc(), Request.id.desc()).limit(page_size)
+    rows = (await db.execute(stmt)).all()
+    return FastJSONResponse(rows_to_dicts(rows)).body
+
+
+def percentile(samples: list[float], p: float) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(p) - 1]
+
+
+async def measure(page, page_size: int, iterations: int) -> list[float]:
+    samples = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(10):  # calentamiento
+            await page(db, page_size)
+            db.expunge_all()
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await page(db, page_size)
+            samples.append((time.perf_counter() - started) * 1000)
+            db.expunge_all()  # cada iteración parte con el identity map vacío
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    for name, page in (("orm", orm_page), ("columns", columns_page)):
+        samples = await measure(page, args.page_size, args.iterations)
+        print(f"{name:8} p50 {percentile(samples, 50):6.2f} ms   p99 {percentile(samples, 99):6.2f} ms")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga contra una API levantada (por ejemplo con docker compose).
+
+Lanza una mezcla ponderada de rutas de auth, empresas y solicitudes con una
+concurrencia fija y reporta, por ruta, throughput y latencias p50/p95/p99.
+El resultado se puede guardar en JSON y comparar contra una línea base.
+
+Uso:
+    # Dataset sintético (app/services/synthetic.py sobre DATABASE_URL) + carga mixta
+    python benchmarks/load.py --seed-companies 1000 --seed-requests 100000 \\
+        --concurrency 32 --total 20000 --output results.json
+
+    # Comparar contra una ejecución anterior (sale con código 1 si hay regresión)
+    python benchmarks/load.py --total 20000 --baseline baseline.json
+
+    # Una sola ruta
+    python benchmarks/load.py --path /requests/?page_size=20 --concurrency 64 --total 4000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STATUSES = ("pending", "in_review", "approved", "rejected")
+
+
+# --- Escenarios --------------------------------------------------------------
+
+@dataclass
+class Context:
+    company_ids: list[str]
+    company_names: list[str]
+    request_ids: list[str]
+    login: dict
+
+
+def risk_inputs(rng: random.Random) -> dict:
+    return {"pep_flag": rng.random() < 0.1, "sanction_list": rng.random() < 0.05, "late_payments": rng.randint(0, 5)}
+
+
+# nombre de la ruta -> (peso, función que arma (método, path, json))
+SCENARIOS = {
+    "POST /auth/login": (2, lambda rng, ctx: ("POST", "/auth/login", ctx.login)),
+    "GET /companies": (10, lambda rng, ctx: ("GET", "/companies/?page_size=20", None)),
+    "GET /companies/{id}": (10, lambda rng, ctx: ("GET", f"/companies/{rng.choice(ctx.company_ids)}", None)),
+    "GET /companies?ids": (5, lambda rng, ctx: (
+        "GET", "/companies/?ids=" + ",".join(rng.sample(ctx.company_ids, min(20, len(ctx.company_ids)))), None
+    )),
+    "GET /companies/search": (8, lambda rng, ctx: ("GET", f"/companies/search?q={rng.choice(ctx.company_names)[:4]}", None)),
+    "GET /requests": (20, lambda rng, ctx: ("GET", "/requests/?page_size=20", None)),
+    "GET /requests?expand": (10, lambda rng, ctx: ("GET", "/requests/?page_size=20&expand=company", None)),
+    "GET /requests?status": (10, lambda rng, ctx: ("GET", f"/requests/?page_size=20&status={rng.choice(STATUSES)}", None)),
+    "GET /requests?sanction_list": (5, lambda rng, ctx: (
+        "GET", f"/requests/?page_size=20&sanction_list=true&status={rng.choice(STATUSES)}", None
+    )),
+    "GET /requests/{id}": (15, lambda rng, ctx: ("GET", f"/requests/{rng.choice(ctx.request_ids)}", None)),
+    "GET /requests/stats": (5, lambda rng, ctx: ("GET", "/requests/stats", None)),
+    "POST /requests": (10, lambda rng, ctx: (
+        "POST", "/requests/", {"company_id": rng.choice(ctx.company_ids), "risk_inputs": risk_inputs(rng)}
+    )),
+    "PUT /requests/{id}": (5, lambda rng, ctx: (
+        "PUT", f"/requests/{rng.choice(ctx.request_ids)}", {"risk_inputs": risk_inputs(rng)}
+    )),
+}
+
+
+async def load_context(client: httpx.AsyncClient, email: str, password: str) -> Context:
+    companies = (await client.get("/companies/?page_size=100")).json()
+    requests = (await client.get("/requests/?page_size=100")).json()
+    if not companies or not requests:
+        raise SystemExit("La base no tiene empresas o solicitudes: usa --seed-companies/--seed-requests")
+    return Context(
+        company_ids=[c["id"] for c in companies],
+        company_names=[c["name"] for c in companies],
+        request_ids=[r["id"] for r in requests],
+        login={"email": email, "password": password},
+    )
+
+
+# --- Ejecución ---------------------------------------------------------------
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)  # código HTTP o tipo de excepción -> cantidad
+
+
+def percentile(samples: list[float], p: int) -> float:
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
+
+
+async def run(args, scenarios: dict) -> dict:
+    rng = random.Random(args.seed)
+    names = list(scenarios)
+    weights = [scenarios[name][0] for name in names]
+    stats = {name: RouteStats() for name in names}
+    remaining = args.warmup + args.total
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        ctx = await load_context(client, args.email, args.password) if not args.path else None
+        if ctx and "POST /auth/login" in scenarios:
+            response = await client.post("/auth/login", json=ctx.login)
+            if response.status_code == 200:
+                client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+            else:
+                print(f"Login falló ({response.status_code}): se omite POST /auth/login")
+                del weights[names.index("POST /auth/login")]
+                names.remove("POST /auth/login")
+
+        started = None
+
+        async def worker():
+            nonlocal remaining, started
+            while remaining > 0:
+                remaining -= 1
+                recording = remaining < args.total
+                if recording and started is None:
+                    started = time.perf_counter()
+                name = rng.choices(names, weights)[0]
+                method, path, body = scenarios[name][1](rng, ctx)
+                request_started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    error = str(response.status_code) if response.status_code >= 400 else None
+                except httpx.HTTPError as exc:
+                    error = type(exc).__name__
+                if recording:
+                    stats[name].latencies.append((time.perf_counter() - request_started) * 1000)
+                    if error:
+                        stats[name].errors[error] += 1
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    def summary(latencies: list[float], errors: Counter) -> dict:
+        return {
+            "count": len(latencies),
+            "errors": sum(errors.values()),
+            "error_codes": dict(errors),
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+        }
+
+    all_latencies = [latency for s in stats.values() for latency in s.latencies]
+    return {
+        "meta": {
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "total": args.total,
+            "seed": args.seed,
+            "elapsed_s": round(elapsed, 2),
+            "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "git_rev": _git_rev(),
+        },
+        "overall": summary(all_latencies, sum((s.errors for s in stats.values()), Counter())),
+        "routes": {name: summary(s.latencies, s.errors) for name, s in stats.items() if s.latencies},
+    }
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- Reporte -----------------------------------------------------------------
+
+def print_report(result: dict) -> None:
+    print(f"{'ruta':26} {'n':>7} {'err':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    rows = list(result["routes"].items()) + [("TOTAL", result["overall"])]
+    for name, r in rows:
+        codes = ", ".join(f"{code}: {n}" for code, n in r["error_codes"].items())
+        print(f"{name:26} {r['count']:7d} {r['errors']:5d} {r['rps']:9.1f} "
+              f"{r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f}" + (f"  ({codes})" if codes else ""))
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> bool:
+    """Imprime la variación contra la línea base; True si alguna ruta empeora más que threshold."""
+    print(f"\nContra línea base {baseline['meta'].get('git_rev') or ''} (umbral {threshold:.0%}):")
+    regressed = False
+    current = {**result["routes"], "TOTAL": result["overall"]}
+    previous = {**baseline["routes"], "TOTAL": baseline["overall"]}
+    for name in [name for name in current if name in previous]:
+        now, before = current[name], previous[name]
+        changes = {key: now[key] / before[key] - 1 for key in ("p50_ms", "p95_ms", "p99_ms", "rps") if before[key]}
+        # Empeora si sube la latencia p95 o si baja el throughput
+        worse = [key for key, change in changes.items() if (key == "p95_ms" and change > threshold)
+                 or (key == "rps" and change < -threshold)]
+        regressed |= bool(worse)
+        print(f"  {name:26} " + "  ".join(f"{key} {change:+.1%}" for key, change in changes.items())
+              + (f"  <- regresión ({', '.join(worse)})" if worse else ""))
+    return regressed
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"debe ser al menos 1: {value}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", help="Carga sobre un único GET en vez de la mezcla de rutas")
+    parser.add_argument("--routes", help="Subconjunto de rutas de la mezcla, separadas por coma")
+    parser.add_argument("--concurrency", type=positive_int, default=32)
+    parser.add_argument("--total", type=positive_int, default=4000, help="Peticiones medidas")
+    parser.add_argument("--warmup", type=int, default=200, help="Peticiones previas que no se miden")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla del dataset y de la mezcla")
+    parser.add_argument("--email", default="admin@example.com")
+    parser.add_argument("--password", default="Admin123!")
+    parser.add_argument("--seed-companies", type=int, default=0)
+    parser.add_argument("--seed-requests", type=int, default=0)
+    parser.add_argument("--output", help="Guarda el resultado en este JSON")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Empeoramiento tolerado de p95 y throughput (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    if args.seed_companies or args.seed_requests:
+        from app.services.synthetic import generate
+
+        generate(args.seed_companies, args.seed_requests, seed=args.seed)
+
+    if args.path:
+        scenarios = {f"GET {args.path}": (1, lambda rng, ctx: ("GET", args.path, None))}
+    elif args.routes:
+        selected = [name.strip() for name in args.routes.split(",")]
+        unknown = set(selected) - SCENARIOS.keys()
+        if unknown:
+            parser.error(f"Rutas desconocidas: {', '.join(sorted(unknown))}. Disponibles: {', '.join(SCENARIOS)}")
+        scenarios = {name: SCENARIOS[name] for name in selected}
+    else:
+        scenarios = SCENARIOS
+
+    result = asyncio.run(run(args, scenarios))
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResultado guardado en {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            if compare(result, json.load(f), args.max_regression):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Compara calculate_risk (fila a fila) con calculate_risk_batch (NumPy)
+sobre un conjunto sintético de entradas.
+
+Uso:
+    python benchmarks/risk_batch.py --rows 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.risk import calculate_risk, calculate_risk_batch
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    pep = rng.random(args.rows) < 0.1
+    sanction = rng.random(args.rows) < 0.05
+    late = rng.integers(0, 6, args.rows)
+    inputs = [
+        {"pep_flag": bool(p), "sanction_list": bool(s), "late_payments": int(l)}
+        for p, s, l in zip(pep, sanction, late)
+    ]
+
+    started = time.perf_counter()
+    scalar = [calculate_risk(i) for i in inputs]
+    scalar_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = calculate_risk_batch(pep, sanction, late)
+    batch_elapsed = time.perf_counter() - started
+
+    assert batch.tolist() == scalar
+    print(f"escalar: {args.rows / scalar_elapsed:,.0f} filas/s ({scalar_elapsed:.3f}s)")
+    print(f"batch:   {args.rows / batch_elapsed:,.0f} filas/s ({batch_elapsed:.3f}s)")
+    print(f"speedup: {scalar_elapsed / batch_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+#!/bin/sh
+# Permite conexiones de replicación desde la red de docker compose
+# (las usa el servicio db-replica). Solo corre al inicializar el volumen.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -2,6 +2,10 @@
 // Esto me permite cambiar fácilmente entre desarrollo y producción
 const API_URL = import.meta.env.VITE_API_URL;
 
+// La API está en otro origen: todas las peticiones van con credentials: "include"
+// para que el navegador guarde y envíe la cookie db_primary. Tras una escritura
+// esa cookie manda las lecturas a la base primaria (leer lo recién escrito).
+
 /**
  * Función para registrar un nuevo usuario en el sistema
  * @param {Object} data - Datos del usuario (email, password, role)
@@ -10,6 +14,7 @@ const API_URL = import.meta.env.VITE_API_URL;
 export async function registerUser(data) {
   // Hago una petición POST al endpoint de registro
   const res = await fetch(`${API_URL}/auth/register`, {
+    credentials: "include",
     method: "POST",
     headers: { "Content-Type": "application/json" }, // Indico que envío JSON
     body: JSON.stringify(data), // Convierto el objeto a JSON
@@ -26,6 +31,7 @@ export async function registerUser(data) {
 export async function login(data) {
   // Envío las credenciales al servidor
   const res = await fetch(`${API_URL}/auth/login`, {
+    credentials: "include",
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(data),
@@ -52,6 +58,7 @@ export async function login(data) {
  */
 export async function createCompany(data, token) {
   const res = await fetch(`${API_URL}/companies/`, {
+    credentials: "include",
     method: "POST",
     headers: {
       "Content-Type": "application/json",
@@ -79,6 +86,7 @@ export async function createCompany(data, token) {
 export async function listCompanies(token) {
   // Pido hasta 100 empresas de una vez (suficiente para el dropdown)
   const res = await fetch(`${API_URL}/companies/?page_size=100`, {
+    credentials: "include",
     headers: { 
       // Solo necesito el token para autenticarme, es una petición GET
       "Authorization": `Bearer ${token}` 
@@ -92,6 +100,32 @@ export async function listCompanies(token) {
   return res.json();
 }
 
+/**
+ * Función para obtener varias empresas por id en una sola petición
+ * (evita pedirlas de a una o descargar el listado completo)
+ * @param {Array<string>} ids - Ids de las empresas
+ * @param {string} token - Token JWT para autenticación
+ * @returns {Promise} - Array con las empresas encontradas, en el orden pedido
+ * @throws {Error} - Si no se pueden cargar las empresas
+ */
+export async function getCompaniesByIds(ids, token) {
+  const res = await fetch(`${API_URL}/companies/batch-get`, {
+    credentials: "include",
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      "Authorization": `Bearer ${token}`,
+    },
+    body: JSON.stringify({ ids }),
+  });
+
+  if (!res.ok) {
+    const error = await res.json().catch(() => ({}));
+    throw new Error(error.detail || "Error obteniendo empresas");
+  }
+  return res.json();
+}
+
 /**
  * Función para crear una nueva solicitud de evaluación de riesgo
  * @param {Object} data - Datos de la solicitud (company_id, risk_inputs)
@@ -100,6 +134,7 @@ export async function listCompanies(token) {
  */
 export async function createRequest(data, token) {
   const res = await fetch(`${API_URL}/requests/`, {
+    credentials: "include",
     method: "POST",
     headers: {
       "Content-Type": "application/json",
@@ -120,8 +155,10 @@ export async function createRequest(data, token) {
  * @throws {Error} - Si no se pueden cargar las solicitudes
  */
 export async function listRequests(token) {
-  // Pido hasta 100 solicitudes de una vez para mostrar en la tabla
-  const res = await fetch(`${API_URL}/requests/?page_size=100`, {
+  // Pido hasta 100 solicitudes de una vez para mostrar en la tabla;
+  // expand=company trae id, nombre y país de la empresa en cada fila
+  const res = await fetch(`${API_URL}/requests/?page_size=100&expand=company`, {
+    credentials: "include",
     headers: { "Authorization": `Bearer ${token}` },
   });
   
@@ -132,3 +169,19 @@ export async function listRequests(token) {
   return res.json();
 }
 
+
+/**
+ * Función para suscribirse a los cambios de solicitudes en tiempo real (SSE)
+ * El navegador reconecta solo y envía Last-Event-ID, así no se pierden cambios
+ * @param {Function} onChange - Recibe (op, request) con op = insert | update | delete
+ * @param {Function} onReset - Se llama cuando hay que recargar el listado completo
+ * @returns {Function} - Función para cerrar la suscripción
+ */
+export function subscribeRequestEvents(onChange, onReset) {
+  const source = new EventSource(`${API_URL}/requests/events`, { withCredentials: true });
+  for (const op of ["insert", "update", "delete"]) {
+    source.addEventListener(op, (event) => onChange(op, JSON.parse(event.data)));
+  }
+  source.addEventListener("reset", () => onReset());
+  return () => source.close();
+}
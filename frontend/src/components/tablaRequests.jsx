@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { useAuth } from "../AuthContext";
-import { listRequests, listCompanies } from "../api";
+import { listRequests, getCompaniesByIds, subscribeRequestEvents } from "../api";
 import "./Login.css";
 
 /**
@@ -13,7 +13,7 @@ export default function TablaRequests() {
   
   // Estados para los datos principales
   const [requests, setRequests] = useState([]); // Lista completa de solicitudes
-  const [companies, setCompanies] = useState([]); // Lista de empresas para filtros
+  const [companies, setCompanies] = useState({}); // Empresas de las solicitudes cargadas, por id
   const [filteredRequests, setFilteredRequests] = useState([]); // Solicitudes filtradas
   const [loading, setLoading] = useState(true); // Estado de carga
   
@@ -38,15 +38,10 @@ export default function TablaRequests() {
       
       setLoading(true);
       try {
-        // Hago ambas peticiones en paralelo para mejor rendimiento
-        const [requestsData, companiesData] = await Promise.all([
-          listRequests(token), // Obtengo todas las solicitudes
-          listCompanies(token) // Obtengo todas las empresas para los filtros
-        ]);
-        
-        // Guardo los datos, manejando diferentes formatos de respuesta del backend
+        // Cada solicitud ya trae su empresa (expand=company): no hace falta
+        // descargar el listado de empresas aparte
+        const requestsData = await listRequests(token);
         setRequests(requestsData.items || requestsData);
-        setCompanies(companiesData.items || companiesData);
       } catch (err) {
         console.error("Error al obtener datos:", err);
       } finally {
@@ -57,6 +52,53 @@ export default function TablaRequests() {
     fetchData();
   }, [token]); // Se ejecuta cuando cambia el token
 
+  /**
+   * Effect para aplicar los cambios en vivo (GET /requests/events) sin
+   * volver a pedir los listados completos
+   */
+  useEffect(() => {
+    if (!token) return;
+
+    const applyChange = (op, changed) => {
+      // Los eventos traen solo company_id: la empresa de cada alta se pide por id
+      if (op === "insert") {
+        getCompaniesByIds([changed.company_id], token)
+          .then(found => setCompanies(current => ({
+            ...current,
+            ...Object.fromEntries(found.map(company => [company.id, company])),
+          })))
+          .catch(err => console.error("Error al obtener empresa:", err));
+      }
+      setRequests((current) => {
+        if (op === "delete") return current.filter(request => request.id !== changed.id);
+        const existing = current.find(request => request.id === changed.id);
+        // Al reconectar el servidor reenvía algunos eventos ya vistos: se
+        // descartan los que no traen una versión más nueva que la que tengo
+        if (existing && existing.version >= changed.version) return current;
+        // Las nuevas van primero, como en el listado (más recientes arriba)
+        if (!existing) return op === "insert" ? [changed, ...current] : current;
+        return current.map(request => request.id === changed.id ? { ...request, ...changed } : request);
+      });
+    };
+    // El servidor pide recargar si el cliente estuvo desconectado demasiado tiempo
+    const reload = () => listRequests(token)
+      .then(data => setRequests(data.items || data))
+      .catch(err => console.error("Error al recargar solicitudes:", err));
+
+    return subscribeRequestEvents(applyChange, reload);
+  }, [token]);
+
+  // Effect para reunir las empresas que vienen embebidas en las solicitudes
+  useEffect(() => {
+    setCompanies(current => {
+      const next = { ...current };
+      for (const request of requests) {
+        if (request.company) next[request.company.id] = request.company;
+      }
+      return next;
+    });
+  }, [requests]);
+
   // Effect para aplicar filtros y búsqueda cuando cambian los criterios
   useEffect(() => {
     let filtered = requests;
@@ -66,7 +108,7 @@ export default function TablaRequests() {
       filtered = filtered.filter(request => 
         request.id.toString().includes(searchTerm.toLowerCase()) ||
         request.company_id.toString().includes(searchTerm.toLowerCase()) ||
-        (request.company?.name && request.company.name.toLowerCase().includes(searchTerm.toLowerCase()))
+        (companies[request.company_id]?.name || "").toLowerCase().includes(searchTerm.toLowerCase())
       );
     }
 
@@ -92,8 +134,12 @@ export default function TablaRequests() {
     }
 
     setFilteredRequests(filtered);
-    setCurrentPage(1); // Reset a primera página cuando se filtra
-  }, [requests, searchTerm, statusFilter, riskFilter, companyFilter]);
+  }, [requests, companies, searchTerm, statusFilter, riskFilter, companyFilter]);
+
+  // Reset a primera página cuando se filtra (no cuando llega un cambio en vivo)
+  useEffect(() => {
+    setCurrentPage(1);
+  }, [searchTerm, statusFilter, riskFilter, companyFilter]);
 
   // Calcular items para la página actual
   const indexOfLastItem = currentPage * itemsPerPage;
@@ -117,7 +163,7 @@ export default function TablaRequests() {
   };
 
   const getCompanyName = (companyId) => {
-    const company = companies.find(c => c.id === companyId);
+    const company = companies[companyId];
     return company ? company.name : `ID: ${companyId}`;
   };
 
@@ -175,7 +221,7 @@ export default function TablaRequests() {
           onChange={(e) => setCompanyFilter(e.target.value)}
         >
           <option value="all">Todas las empresas</option>
-          {companies.map(company => (
+          {Object.values(companies).map(company => (
             <option key={company.id} value={company.id}>
               {company.name}
             </option>
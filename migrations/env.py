@@ -5,16 +5,25 @@ from sqlalchemy import pool
 
 from alembic import context
 
-from app.db import Base
+from app.db import Base, engine
 import app.models.user
 import app.models.company
 import app.models.request
+import app.models.rescore
+import app.models.stats
+import app.models.job
+import app.models.event
 
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
+# La URL sale de Settings.DATABASE_URL (con el driver síncrono), igual que la app
+config.set_main_option(
+    "sqlalchemy.url", engine.url.render_as_string(hide_password=False).replace("%", "%%")
+)
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
@@ -0,0 +1,41 @@
+"""rescore runs
+
+Revision ID: 1db15dfc265e
+Revises: bb8b6ba84920
+Create Date: 2026-10-18 11:40:02.531977
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1db15dfc265e'
+down_revision: Union[str, Sequence[str], None] = 'bb8b6ba84920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rescore_runs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.Enum('running', 'completed', 'failed', name='rescorestatus'), nullable=False),
+    sa.Column('last_id', sa.UUID(), nullable=True),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('updated', sa.Integer(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rescore_runs')
+    sa.Enum(name='rescorestatus').drop(op.get_bind(), checkfirst=False)
@@ -0,0 +1,46 @@
+"""company search vector
+
+Revision ID: 4d2e8b61f0a9
+Revises: c3f1a7d95b20
+Create Date: 2026-10-18 17:20:33.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d2e8b61f0a9'
+down_revision: Union[str, Sequence[str], None] = 'c3f1a7d95b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple', regexp_replace("
+    "lower(name || ' ' || coalesce(tax_id, '')), '[^[:alnum:]]+', ' ', 'g'))"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Columna generada STORED: el ADD COLUMN reescribe companies una vez
+    op.add_column('companies', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True
+    ))
+    op.create_index(
+        'ix_companies_search_vector', 'companies', ['search_vector'], unique=False, postgresql_using='gin'
+    )
+    op.create_index(
+        'ix_companies_tax_id_trgm', 'companies', ['tax_id'], unique=False,
+        postgresql_using='gin', postgresql_ops={'tax_id': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_companies_tax_id_trgm', table_name='companies')
+    op.drop_index('ix_companies_search_vector', table_name='companies')
+    op.drop_column('companies', 'search_vector')
@@ -0,0 +1,87 @@
+"""request stats rollup
+
+Revision ID: 5e0243d6592c
+Revises: 8a61cea26468
+Create Date: 2026-10-18 16:22:09.847310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0243d6592c'
+down_revision: Union[str, Sequence[str], None] = '8a61cea26468'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Fecha (día) y tramo de riesgo de una fila de requests
+BUCKET_DATE = "coalesce({row}.created_at, 'epoch')::date"
+RISK_BUCKET = "greatest(0, least(10, {row}.risk_score / 10))::smallint"
+
+
+def _apply(row: str, delta: int) -> str:
+    return f"""
+        INSERT INTO request_stats (bucket_date, company_id, status, risk_bucket, count)
+        VALUES ({BUCKET_DATE.format(row=row)}, {row}.company_id, {row}.status,
+                {RISK_BUCKET.format(row=row)}, {delta})
+        ON CONFLICT (bucket_date, company_id, status, risk_bucket)
+        DO UPDATE SET count = request_stats.count + EXCLUDED.count;
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('request_stats',
+    sa.Column('bucket_date', sa.Date(), nullable=False),
+    sa.Column('company_id', sa.UUID(), nullable=False),
+    sa.Column('status', postgresql.ENUM('pending', 'in_review', 'approved', 'rejected', name='requeststatus', create_type=False), nullable=False),
+    sa.Column('risk_bucket', sa.SmallInteger(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket_date', 'company_id', 'status', 'risk_bucket')
+    )
+
+    op.execute(f"""
+        CREATE FUNCTION request_stats_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                {_apply('OLD', -1)}
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                {_apply('NEW', 1)}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER requests_stats_insert_delete
+        AFTER INSERT OR DELETE ON requests
+        FOR EACH ROW EXECUTE FUNCTION request_stats_apply();
+    """)
+    # Solo las columnas que cambian el tramo de la fila
+    op.execute("""
+        CREATE TRIGGER requests_stats_update
+        AFTER UPDATE OF status, risk_score, company_id, created_at ON requests
+        FOR EACH ROW EXECUTE FUNCTION request_stats_apply();
+    """)
+
+    op.execute(f"""
+        INSERT INTO request_stats (bucket_date, company_id, status, risk_bucket, count)
+        SELECT {BUCKET_DATE.format(row='requests')}, company_id, status,
+               {RISK_BUCKET.format(row='requests')}, count(*)
+        FROM requests
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER requests_stats_update ON requests")
+    op.execute("DROP TRIGGER requests_stats_insert_delete ON requests")
+    op.execute("DROP FUNCTION request_stats_apply()")
+    op.drop_table('request_stats')
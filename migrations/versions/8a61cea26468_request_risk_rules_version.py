@@ -0,0 +1,30 @@
+"""request risk rules version
+
+Revision ID: 8a61cea26468
+Revises: 1db15dfc265e
+Create Date: 2026-10-18 14:05:51.402733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a61cea26468'
+down_revision: Union[str, Sequence[str], None] = '1db15dfc265e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('requests', sa.Column('risk_rules_version', sa.String(), nullable=True))
+    # Los puntajes existentes se calcularon con las reglas originales (v1)
+    op.execute("UPDATE requests SET risk_rules_version = 'v1'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('requests', 'risk_rules_version')
@@ -0,0 +1,75 @@
+"""request events feed
+
+Revision ID: a4e8c1f3d2b7
+Revises: f7c2b9e04d51
+Create Date: 2026-10-18 21:14:52.332810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e8c1f3d2b7'
+down_revision: Union[str, Sequence[str], None] = 'f7c2b9e04d51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('request_events',
+    sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+    sa.Column('op', sa.String(), nullable=False),
+    sa.Column('request_id', sa.UUID(), nullable=False),
+    sa.Column('data', postgresql.JSONB(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text("(now() at time zone 'utc')"), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_request_events_created_at', 'request_events', ['created_at'], unique=False)
+
+    # Cada cambio queda en request_events (para retomar con Last-Event-ID) y
+    # se avisa con NOTIFY; el aviso sale recién al confirmar la transacción
+    op.execute("""
+        CREATE FUNCTION request_events_notify() RETURNS trigger AS $$
+        DECLARE
+            row_data jsonb;
+            event_id bigint;
+            event_op text := lower(TG_OP);
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                row_data := jsonb_build_object('id', OLD.id, 'company_id', OLD.company_id);
+            ELSE
+                row_data := jsonb_build_object(
+                    'id', NEW.id, 'company_id', NEW.company_id, 'status', NEW.status,
+                    'risk_inputs', NEW.risk_inputs, 'risk_score', NEW.risk_score,
+                    'risk_rules_version', NEW.risk_rules_version, 'created_at', NEW.created_at,
+                    'version', NEW.version
+                );
+            END IF;
+            INSERT INTO request_events (op, request_id, data)
+            VALUES (event_op, (row_data ->> 'id')::uuid, row_data)
+            RETURNING id INTO event_id;
+            PERFORM pg_notify('request_events', jsonb_build_object(
+                'id', event_id, 'op', event_op, 'data', row_data
+            )::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER requests_events
+        AFTER INSERT OR UPDATE OR DELETE ON requests
+        FOR EACH ROW EXECUTE FUNCTION request_events_notify();
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER requests_events ON requests")
+    op.execute("DROP FUNCTION request_events_notify()")
+    op.drop_index('ix_request_events_created_at', table_name='request_events')
+    op.drop_table('request_events')
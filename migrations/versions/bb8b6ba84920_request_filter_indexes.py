@@ -0,0 +1,40 @@
+"""request filter indexes
+
+Revision ID: bb8b6ba84920
+Revises: cb466aa8c8c7
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bb8b6ba84920'
+down_revision: Union[str, Sequence[str], None] = 'cb466aa8c8c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_requests_created_at_id', 'requests', ['created_at', 'id'], unique=False)
+    op.create_index('ix_requests_status_created_at', 'requests', ['status', 'created_at'], unique=False)
+    op.create_index('ix_requests_company_id_created_at', 'requests', ['company_id', 'created_at'], unique=False)
+    op.create_index('ix_requests_risk_score', 'requests', ['risk_score'], unique=False)
+    op.create_index(
+        'ix_companies_name_trgm', 'companies', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_companies_name_trgm', table_name='companies')
+    op.drop_index('ix_requests_risk_score', table_name='requests')
+    op.drop_index('ix_requests_company_id_created_at', table_name='requests')
+    op.drop_index('ix_requests_status_created_at', table_name='requests')
+    op.drop_index('ix_requests_created_at_id', table_name='requests')
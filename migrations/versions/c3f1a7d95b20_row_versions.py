@@ -0,0 +1,31 @@
+"""row versions for etags
+
+Revision ID: c3f1a7d95b20
+Revises: 5e0243d6592c
+Create Date: 2026-10-18 16:42:10.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1a7d95b20'
+down_revision: Union[str, Sequence[str], None] = '5e0243d6592c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Con server_default el ADD COLUMN no reescribe la tabla (PG >= 11)
+    op.add_column('companies', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('requests', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('requests', 'version')
+    op.drop_column('companies', 'version')
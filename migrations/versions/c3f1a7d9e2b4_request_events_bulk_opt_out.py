@@ -0,0 +1,88 @@
+"""request events opt-out for bulk writes
+
+Revision ID: c3f1a7d9e2b4
+Revises: a4e8c1f3d2b7
+Create Date: 2026-10-19 10:41:07.215493
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1a7d9e2b4'
+down_revision: Union[str, Sequence[str], None] = 'a4e8c1f3d2b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROW_DATA = """
+            IF TG_OP = 'DELETE' THEN
+                row_data := jsonb_build_object('id', OLD.id, 'company_id', OLD.company_id);
+            ELSE
+                row_data := jsonb_build_object(
+                    'id', NEW.id, 'company_id', NEW.company_id, 'status', NEW.status,
+                    'risk_inputs', NEW.risk_inputs, 'risk_score', NEW.risk_score,
+                    'risk_rules_version', NEW.risk_rules_version, 'created_at', NEW.created_at,
+                    'version', NEW.version
+                );
+            END IF;
+            INSERT INTO request_events (op, request_id, data)
+            VALUES (event_op, (row_data ->> 'id')::uuid, row_data)
+            RETURNING id INTO event_id;
+            PERFORM pg_notify('request_events', jsonb_build_object(
+                'id', event_id, 'op', event_op, 'data', row_data
+            )::text);
+            RETURN NULL;
+"""
+
+
+def _notify_function(opt_out: bool) -> str:
+    # Con SET LOCAL app.request_events = 'off' la transacción no genera un
+    # evento por fila (re-scoring, cambios masivos, movimientos de partición)
+    check = """
+            IF current_setting('app.request_events', true) = 'off' THEN
+                RETURN NULL;
+            END IF;""" if opt_out else ""
+    return f"""
+        CREATE OR REPLACE FUNCTION request_events_notify() RETURNS trigger AS $$
+        DECLARE
+            row_data jsonb;
+            event_id bigint;
+            event_op text := lower(TG_OP);
+        BEGIN{check}
+{ROW_DATA}
+        END;
+        $$ LANGUAGE plpgsql;
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Los eventos reset no corresponden a una solicitud
+    op.alter_column('request_events', 'request_id', existing_type=sa.UUID(), nullable=True)
+    op.execute(_notify_function(opt_out=True))
+    # Un único evento para un cambio masivo: los clientes recargan el listado
+    op.execute("""
+        CREATE FUNCTION request_events_reset() RETURNS bigint AS $$
+        DECLARE
+            event_id bigint;
+        BEGIN
+            INSERT INTO request_events (op, request_id, data) VALUES ('reset', NULL, '{}')
+            RETURNING id INTO event_id;
+            PERFORM pg_notify('request_events', jsonb_build_object(
+                'id', event_id, 'op', 'reset', 'data', '{}'::jsonb
+            )::text);
+            RETURN event_id;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP FUNCTION request_events_reset()")
+    op.execute(_notify_function(opt_out=False))
+    op.execute("DELETE FROM request_events WHERE request_id IS NULL")
+    op.alter_column('request_events', 'request_id', existing_type=sa.UUID(), nullable=False)
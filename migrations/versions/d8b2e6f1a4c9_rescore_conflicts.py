@@ -0,0 +1,28 @@
+"""rescore run conflicts
+
+Revision ID: d8b2e6f1a4c9
+Revises: c3f1a7d9e2b4
+Create Date: 2026-10-19 15:12:44.530217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b2e6f1a4c9'
+down_revision: Union[str, Sequence[str], None] = 'c3f1a7d9e2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rescore_runs', sa.Column('conflicts', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('rescore_runs', 'conflicts')
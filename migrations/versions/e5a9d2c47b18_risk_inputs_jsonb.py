@@ -0,0 +1,61 @@
+"""risk_inputs jsonb with generated input columns
+
+Revision ID: e5a9d2c47b18
+Revises: 9b7c4e1a2f36
+Create Date: 2026-10-18 19:20:31.540127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9d2c47b18'
+down_revision: Union[str, Sequence[str], None] = '9b7c4e1a2f36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PEP_FLAG_SQL = "coalesce(risk_inputs -> 'pep_flag' = 'true'::jsonb, false)"
+SANCTION_LIST_SQL = "coalesce(risk_inputs -> 'sanction_list' = 'true'::jsonb, false)"
+LATE_PAYMENTS_SQL = (
+    "CASE WHEN jsonb_typeof(risk_inputs -> 'late_payments') = 'number' "
+    "THEN (risk_inputs ->> 'late_payments')::numeric::integer ELSE 0 END"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Un solo ALTER TABLE: el cambio de tipo y las columnas STORED reescriben
+    # requests una sola vez (con ACCESS EXCLUSIVE durante la reescritura)
+    op.execute(f"""
+        ALTER TABLE requests
+            ALTER COLUMN risk_inputs TYPE jsonb USING risk_inputs::jsonb,
+            ADD COLUMN pep_flag boolean GENERATED ALWAYS AS ({PEP_FLAG_SQL}) STORED NOT NULL,
+            ADD COLUMN sanction_list boolean GENERATED ALWAYS AS ({SANCTION_LIST_SQL}) STORED NOT NULL,
+            ADD COLUMN late_payments integer GENERATED ALWAYS AS ({LATE_PAYMENTS_SQL}) STORED NOT NULL
+    """)
+    op.create_index(
+        'ix_requests_pep_flag_status_created_at', 'requests', ['status', 'created_at'], unique=False,
+        postgresql_where=sa.text('pep_flag'),
+    )
+    op.create_index(
+        'ix_requests_sanction_list_status_created_at', 'requests', ['status', 'created_at'], unique=False,
+        postgresql_where=sa.text('sanction_list'),
+    )
+    op.create_index('ix_requests_late_payments', 'requests', ['late_payments'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_requests_late_payments', table_name='requests')
+    op.drop_index('ix_requests_sanction_list_status_created_at', table_name='requests')
+    op.drop_index('ix_requests_pep_flag_status_created_at', table_name='requests')
+    op.execute("""
+        ALTER TABLE requests
+            DROP COLUMN late_payments,
+            DROP COLUMN sanction_list,
+            DROP COLUMN pep_flag,
+            ALTER COLUMN risk_inputs TYPE json USING risk_inputs::json
+    """)
@@ -0,0 +1,145 @@
+"""partition requests by month
+
+Revision ID: f7c2b9e04d51
+Revises: e5a9d2c47b18
+Create Date: 2026-10-18 20:02:14.903381
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7c2b9e04d51'
+down_revision: Union[str, Sequence[str], None] = 'e5a9d2c47b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Particiones creadas por adelantado (después las mantiene app/services/partitions.py)
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, company_id, status, risk_inputs, risk_score, risk_rules_version, created_at, version"
+
+PEP_FLAG_SQL = "coalesce(risk_inputs -> 'pep_flag' = 'true'::jsonb, false)"
+SANCTION_LIST_SQL = "coalesce(risk_inputs -> 'sanction_list' = 'true'::jsonb, false)"
+LATE_PAYMENTS_SQL = (
+    "CASE WHEN jsonb_typeof(risk_inputs -> 'late_payments') = 'number' "
+    "THEN (risk_inputs ->> 'late_payments')::numeric::integer ELSE 0 END"
+)
+
+GENERATED_COLUMNS = f"""
+    pep_flag boolean GENERATED ALWAYS AS ({PEP_FLAG_SQL}) STORED NOT NULL,
+    sanction_list boolean GENERATED ALWAYS AS ({SANCTION_LIST_SQL}) STORED NOT NULL,
+    late_payments integer GENERATED ALWAYS AS ({LATE_PAYMENTS_SQL}) STORED NOT NULL
+"""
+
+INDEXES = [
+    ('ix_requests_created_at_id', ['created_at', 'id'], None),
+    ('ix_requests_status_created_at', ['status', 'created_at'], None),
+    ('ix_requests_company_id_created_at', ['company_id', 'created_at'], None),
+    ('ix_requests_risk_score', ['risk_score'], None),
+    ('ix_requests_pep_flag_status_created_at', ['status', 'created_at'], 'pep_flag'),
+    ('ix_requests_sanction_list_status_created_at', ['status', 'created_at'], 'sanction_list'),
+    ('ix_requests_late_payments', ['late_payments'], None),
+]
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _create_indexes_and_triggers() -> None:
+    for name, columns, where in INDEXES:
+        op.create_index(
+            name, 'requests', columns, unique=False,
+            postgresql_where=sa.text(where) if where else None,
+        )
+    op.execute("""
+        CREATE TRIGGER requests_stats_insert_delete
+        AFTER INSERT OR DELETE ON requests
+        FOR EACH ROW EXECUTE FUNCTION request_stats_apply();
+    """)
+    op.execute("""
+        CREATE TRIGGER requests_stats_update
+        AFTER UPDATE OF status, risk_score, company_id, created_at ON requests
+        FOR EACH ROW EXECUTE FUNCTION request_stats_apply();
+    """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # La tabla se reconstruye: requiere una ventana de mantenimiento
+    # proporcional al tamaño de requests (copia completa con bloqueo).
+    op.execute("ALTER TABLE requests RENAME TO requests_unpartitioned")
+    op.execute("ALTER INDEX requests_pkey RENAME TO requests_unpartitioned_pkey")
+    for name, _, _ in INDEXES:
+        op.drop_index(name, table_name='requests_unpartitioned')
+
+    # La clave de partición debe estar en la PK; created_at pasa a NOT NULL
+    op.execute(f"""
+        CREATE TABLE requests (
+            id uuid NOT NULL,
+            company_id uuid NOT NULL REFERENCES companies (id),
+            status requeststatus NOT NULL,
+            risk_inputs jsonb NOT NULL,
+            risk_score integer NOT NULL,
+            risk_rules_version varchar,
+            created_at timestamp without time zone NOT NULL DEFAULT (now() at time zone 'utc'),
+            version integer NOT NULL DEFAULT 1,
+            {GENERATED_COLUMNS},
+            CONSTRAINT requests_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE requests_default PARTITION OF requests DEFAULT")
+
+    oldest = op.get_bind().scalar(sa.text("SELECT min(created_at) FROM requests_unpartitioned"))
+    current = date.today().replace(day=1)
+    month = min(oldest.date(), current).replace(day=1) if oldest else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE requests_y{month.year}m{month.month:02d} PARTITION OF requests "
+            f"FOR VALUES FROM ('{month}') TO ('{upper}')"
+        )
+        month = upper
+
+    # Sin fecha se usa 'epoch', el mismo día con que request_stats ya las contaba
+    op.execute(f"""
+        INSERT INTO requests ({COLUMNS})
+        SELECT id, company_id, status, risk_inputs, risk_score, risk_rules_version,
+               coalesce(created_at, 'epoch'), version
+        FROM requests_unpartitioned
+    """)
+    # Sus triggers del rollup se van con ella; los datos ya están contados
+    op.execute("DROP TABLE requests_unpartitioned")
+    _create_indexes_and_triggers()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE requests RENAME TO requests_partitioned")
+    op.execute("ALTER INDEX requests_pkey RENAME TO requests_partitioned_pkey")
+    for name, _, _ in INDEXES:
+        op.drop_index(name, table_name='requests_partitioned')
+    op.execute(f"""
+        CREATE TABLE requests (
+            id uuid NOT NULL,
+            company_id uuid NOT NULL REFERENCES companies (id),
+            status requeststatus NOT NULL,
+            risk_inputs jsonb NOT NULL,
+            risk_score integer NOT NULL,
+            risk_rules_version varchar,
+            created_at timestamp without time zone,
+            version integer NOT NULL DEFAULT 1,
+            {GENERATED_COLUMNS},
+            CONSTRAINT requests_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"INSERT INTO requests ({COLUMNS}) SELECT {COLUMNS} FROM requests_partitioned")
+    # Borra también todas las particiones
+    op.execute("DROP TABLE requests_partitioned")
+    _create_indexes_and_triggers()
@@ -18,9 +18,8 @@ from app.models.company import Company
 from app.models.request import Request
 from app.schemas.user import UserRole
 from app.schemas.request import RequestStatus
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+from app.services.risk import RISK_RULES_VERSION, calculate_risk
+from app.services.security import hash_password
 
 def create_admin_user(db: Session):
     print("🔑 Creando usuario administrador...")
@@ -32,7 +31,7 @@ def create_admin_user(db: Session):
 
     admin_user = User(
         email="admin@example.com",
-        password_hash=pwd_context.hash("Admin123!"),
+        password_hash=hash_password("Admin123!"),
         role=UserRole.admin
     )
     db.add(admin_user)
@@ -84,24 +83,20 @@ def create_requests(db: Session, companies: list):
 
     created_requests = []
     for i, r in enumerate(requests_data, 1):
-        score = 0
-        if r["pep_flag"]:
-            score += 60
-        if r["sanction_list"]:
-            score += 40
-        score += min(r["late_payments"], 3) * 10
-        score = min(score, 100)
+        risk_inputs = {
+            "pep_flag": r["pep_flag"],
+            "sanction_list": r["sanction_list"],
+            "late_payments": r["late_payments"]
+        }
+        score = calculate_risk(risk_inputs)
 
         created_at = datetime.utcnow() - timedelta(days=r["created_days_ago"])
 
         request = Request(
             company_id=r["company"].id,
-            risk_inputs={
-                "pep_flag": r["pep_flag"],
-                "sanction_list": r["sanction_list"],
-                "late_payments": r["late_payments"]
-            },
+            risk_inputs=risk_inputs,
             risk_score=score,
+            risk_rules_version=RISK_RULES_VERSION,
             status=r["status"],
             created_at=created_at
         )
@@ -1,4 +1,5 @@
 import pytest
+import uuid
 from fastapi.testclient import TestClient
 from app.main import app
 import sys, os
@@ -12,3 +13,17 @@ sys.path.insert(0, BASE_DIR)
 def client():
     with TestClient(app) as c:
         yield c
+
+
+@pytest.fixture
+def admin_headers(client):
+    from app.db import SessionLocal
+    from app.models.user import User, UserRole
+
+    email = f"admin_{uuid.uuid4().hex[:6]}@test.com"
+    assert client.post("/auth/register", json={"email": email, "password": "Admin123!"}).status_code == 201
+    with SessionLocal() as db:
+        db.query(User).filter(User.email == email).update({"role": UserRole.admin})
+        db.commit()
+    token = client.post("/auth/login", json={"email": email, "password": "Admin123!"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
@@ -30,3 +30,101 @@ def test_register_and_login(client):
     assert "access_token" in data
     assert data["token_type"] == "bearer"
 
+
+
+def test_current_user_is_cached_and_invalidated(client):
+    from app.db import SessionLocal
+    from app.models.user import User, UserRole
+    from app.services.principal_cache import principal_cache
+
+    email = f"analyst_{uuid.uuid4().hex[:6]}@test.com"
+    assert client.post("/auth/register", json={"email": email, "password": "Analyst123!"}).status_code == 201
+    token = client.post("/auth/login", json={"email": email, "password": "Analyst123!"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    missing_run = f"/admin/rescore/{uuid.uuid4()}"
+
+    # Un analista no puede usar las rutas de admin; la segunda vez sale del cache
+    hits = principal_cache.hits
+    assert client.get(missing_run, headers=headers).status_code == 403
+    assert client.get(missing_run, headers=headers).status_code == 403
+    assert principal_cache.hits == hits + 1
+
+    # Al cambiar el rol se invalida la entrada (recién con el commit) y se ve el rol nuevo
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == email).first()
+        user.role = UserRole.admin
+        db.flush()
+        # Entre el flush y el commit otra petición todavía ve (y cachea) la fila vieja
+        assert client.get(missing_run, headers=headers).status_code == 403
+        db.commit()
+    assert client.get(missing_run, headers=headers).status_code == 404
+
+    with SessionLocal() as db:
+        db.delete(db.query(User).filter(User.email == email).first())
+        db.commit()
+    assert client.get(missing_run, headers=headers).status_code == 401
+
+
+def test_login_rehashes_password_with_configured_cost(client):
+    from passlib.context import CryptContext
+    from app.db import SessionLocal
+    from app.models.user import User
+    from app.services.security import pwd_context
+
+    email = f"legacy_{uuid.uuid4().hex[:6]}@test.com"
+    legacy_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("Legacy123!")
+    with SessionLocal() as db:
+        db.add(User(email=email, password_hash=legacy_hash))
+        db.commit()
+
+    response = client.post("/auth/login", json={"email": email, "password": "Legacy123!"})
+    assert response.status_code == 200
+
+    with SessionLocal() as db:
+        stored = db.query(User).filter(User.email == email).first().password_hash
+    assert stored != legacy_hash
+    assert not pwd_context.needs_update(stored)
+
+
+def test_password_hasher_rejects_when_saturated():
+    import asyncio
+    from app.services.security import PasswordHasher, PasswordHasherBusy
+
+    async def burst():
+        hasher = PasswordHasher(workers=1, max_pending=1)
+        return await asyncio.gather(
+            hasher.hash("uno"), hasher.hash("dos"), return_exceptions=True
+        )
+
+    results = asyncio.run(burst())
+    assert isinstance(results[0], str)
+    assert isinstance(results[1], PasswordHasherBusy)
+
+
+def test_redis_invalidation_does_not_block_the_event_loop():
+    import asyncio
+    from app.services.principal_cache import RedisBackend
+
+    deleted = []
+
+    class SyncClient:
+        def delete(self, key):
+            deleted.append(("sync", key))
+
+    class AsyncClient:
+        async def delete(self, key):
+            deleted.append(("async", key))
+
+    # Sin redis instalado: se arma el backend con clientes de prueba
+    backend = RedisBackend.__new__(RedisBackend)
+    backend._sync, backend._async, backend._pending = SyncClient(), AsyncClient(), set()
+
+    backend.delete("fuera-del-loop")
+
+    async def inside_loop():
+        backend.delete("en-el-loop")
+        await asyncio.gather(*backend._pending)
+
+    asyncio.run(inside_loop())
+    assert deleted == [("sync", "principal:fuera-del-loop"), ("async", "principal:en-el-loop")]
+    assert not backend._pending
@@ -1,5 +1,10 @@
+import asyncio
+import base64
+import json
 import uuid
 
+from app.services import company_search
+
 def test_create_and_list_companies(client):
     unique_name = f"Acme-{uuid.uuid4().hex[:6]}"
     unique_tax_id = f"{uuid.uuid4().hex[:8]}-1"
@@ -19,3 +24,135 @@ def test_create_and_list_companies(client):
     assert response.status_code == 200
     companies = response.json()
     assert any(c["name"] == unique_name for c in companies)
+
+
+def test_list_companies_cursor_pagination(client):
+    prefix = f"Page-{uuid.uuid4().hex[:6]}"
+    for i in range(3):
+        client.post("/companies", json={"name": f"{prefix}-{i}", "country": "CL"})
+
+    response = client.get("/companies", params={"q": prefix, "page_size": 2, "total": "estimate"})
+    assert response.status_code == 200
+    assert "X-Total-Estimate" in response.headers
+    assert [c["name"] for c in response.json()] == [f"{prefix}-0", f"{prefix}-1"]
+
+    response = client.get("/companies", params={
+        "q": prefix, "page_size": 2, "cursor": response.headers["X-Next-Cursor"]
+    })
+    assert [c["name"] for c in response.json()] == [f"{prefix}-2"]
+
+    # Un cursor alterado con elementos que no son strings es un 400, no un 500
+    for values in ([1, {}], [None, 5]):
+        cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+        assert client.get("/companies", params={"cursor": cursor}).status_code == 400
+
+
+def test_company_etags_and_if_match(client):
+    company = client.post("/companies", json={"name": f"Etag-{uuid.uuid4().hex[:6]}", "country": "CL"}).json()
+    url = f"/companies/{company['id']}"
+
+    response = client.get(url)
+    etag = response.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    # PUT con la versión vigente avanza el ETag; con una vieja responde 412
+    response = client.put(url, json={"country": "AR"}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    new_etag = response.headers["ETag"]
+    assert new_etag != etag
+    assert client.put(url, json={"country": "PE"}, headers={"If-Match": etag}).status_code == 412
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+    # Los listados llevan un ETag del cuerpo
+    response = client.get("/companies", params={"q": company["name"]})
+    response = client.get("/companies", params={"q": company["name"]}, headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+
+def test_company_search_prefix(client, monkeypatch):
+    word = f"srch{uuid.uuid4().hex[:6]}"
+    starts = client.post("/companies", json={"name": f"{word}alpha Holdings", "tax_id": "76.555.123-K"}).json()
+    inside = client.post("/companies", json={"name": f"Beta {word}beta"}).json()
+
+    response = client.get("/companies/search", params={"q": word[:7], "fuzzy": False})
+    assert response.status_code == 200
+    results = response.json()
+    # Ambas coinciden por prefijo; la que empieza con la consulta va primero
+    assert [r["id"] for r in results] == [starts["id"], inside["id"]]
+    assert results[0]["score"] > results[1]["score"]
+
+    # Varias palabras y tax_id con puntuación
+    results = client.get("/companies/search", params={"q": f"{word} hold", "fuzzy": False}).json()
+    assert [r["id"] for r in results] == [starts["id"]]
+    results = client.get("/companies/search", params={"q": f"76.555 {word}", "fuzzy": False}).json()
+    assert [r["id"] for r in results] == [starts["id"]]
+
+    # El índice en memoria responde igual que la base
+    monkeypatch.setattr(company_search, "prefix_index", company_search.CompanyPrefixIndex(ttl=60, max_size=100000))
+    cached = client.get("/companies/search", params={"q": word[:7], "fuzzy": False}).json()
+    assert [(r["id"], r["score"]) for r in cached] == [(starts["id"], 2.0), (inside["id"], 1.0)]
+
+
+def test_company_search_fuzzy(client):
+    word = f"fzzy{uuid.uuid4().hex[:6]}"
+    company = client.post("/companies", json={"name": f"{word} Mining"}).json()
+
+    # Un error de tipeo no encuentra nada por prefijo, pero sí por similitud
+    typo = word[:-1] + "x"
+    assert client.get("/companies/search", params={"q": typo, "fuzzy": False}).json() == []
+    results = client.get("/companies/search", params={"q": typo}).json()
+    assert results[0]["id"] == company["id"]
+
+
+def test_batch_lookup_by_ids(client):
+    companies = [
+        client.post("/companies", json={"name": f"Batch-{uuid.uuid4().hex[:6]}", "country": "CL"}).json()
+        for _ in range(3)
+    ]
+    ids = [c["id"] for c in companies]
+    missing = str(uuid.uuid4())
+
+    # En el orden pedido, sin repetidos y sin los que no existen
+    response = client.get("/companies", params={"ids": ",".join([ids[2], ids[0], missing, ids[2]])})
+    assert response.status_code == 200
+    assert [c["id"] for c in response.json()] == [ids[2], ids[0]]
+
+    response = client.post("/companies/batch-get", json={"ids": [ids[1], missing]})
+    assert response.status_code == 200
+    assert response.json() == [companies[1]]
+
+    assert client.get("/companies", params={"ids": "not-a-uuid"}).status_code == 422
+    assert client.post("/companies/batch-get", json={"ids": []}).status_code == 422
+
+
+def test_prefix_index_falls_back_while_loading_or_failing():
+    class Row:
+        _mapping = {"id": "1", "name": "Acme Corp", "tax_id": None, "country": "CL", "created_at": None}
+
+    class SlowDb:
+        def __init__(self, fail=False):
+            self.release, self.fail = asyncio.Event(), fail
+
+        async def execute(self, stmt):
+            await self.release.wait()
+            if self.fail:
+                raise OSError("connection lost")
+            return type("Result", (), {"all": lambda self: [Row()]})()
+
+    async def scenario():
+        index = company_search.CompanyPrefixIndex(ttl=60, max_size=100)
+        # Una carga que falla no deja el índice vacío como si fuera vigente
+        db = SlowDb(fail=True)
+        db.release.set()
+        assert await index.search(db, "acme", 10) is None
+
+        # Durante la primera carga las demás búsquedas van a la base (None), no a un índice vacío
+        db = SlowDb()
+        loading = asyncio.create_task(index.search(db, "acme", 10))
+        await asyncio.sleep(0)
+        assert await index.search(db, "acme", 10) is None
+        db.release.set()
+        assert [r["name"] for r in await loading] == ["Acme Corp"]
+        assert [r["name"] for r in await index.search(db, "ac", 10)] == ["Acme Corp"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import uuid
+
+from sqlalchemy import func, insert, select
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models.event import RequestEvent
+from app.models.request import Request
+from app.services.events import RESET_MESSAGE, EventBroadcaster, Subscription, broadcaster, event_stream, format_event
+
+
+def _last_event_id():
+    with SessionLocal() as db:
+        return db.scalar(select(func.coalesce(func.max(RequestEvent.id), 0)))
+
+
+def _parse(message):
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines())
+    return int(fields["id"]), fields["event"], json.loads(fields["data"])
+
+
+async def _next_event(stream):
+    # Se saltan los comentarios de heartbeat
+    while True:
+        message = await asyncio.wait_for(stream.__anext__(), 5)
+        if not message.startswith(":"):
+            return message
+
+
+def test_event_stream_replays_and_follows_changes(client):
+    company = client.post("/companies", json={"name": f"EventsCo-{uuid.uuid4().hex[:6]}", "country": "CL"}).json()
+    last_id = _last_event_id()
+    created = client.post("/requests", json={"company_id": company["id"], "risk_inputs": {"pep_flag": True}}).json()
+
+    async def open_stream():
+        subscription = await broadcaster.subscribe()
+        stream = event_stream(subscription, last_id, company["id"])
+        assert (await stream.__anext__()).startswith("retry:")
+        return stream, await _next_event(stream)
+
+    # Al reconectar con Last-Event-ID se recupera lo que pasó mientras tanto
+    stream, message = client.portal.call(open_stream)
+    event_id, op, data = _parse(message)
+    assert event_id > last_id and op == "insert"
+    assert data["id"] == created["id"] and data["risk_score"] == 60
+
+    # Y después siguen los cambios en vivo
+    client.put(f"/requests/{created['id']}", json={"status": "approved"})
+    event_id, op, data = _parse(client.portal.call(_next_event, stream))
+    assert op == "update" and data["status"] == "approved" and data["version"] == 2
+    client.portal.call(stream.aclose)
+
+
+def test_event_stream_resets_when_too_far_behind(client, monkeypatch):
+    company = client.post("/companies", json={"name": f"ResetCo-{uuid.uuid4().hex[:6]}", "country": "CL"}).json()
+    last_id = _last_event_id()
+    for _ in range(3):
+        client.post("/requests", json={"company_id": company["id"], "risk_inputs": {}})
+    monkeypatch.setattr(settings, "EVENTS_REPLAY_LIMIT", 2)
+
+    async def first_events():
+        subscription = await broadcaster.subscribe()
+        stream = event_stream(subscription, last_id)
+        try:
+            return [await stream.__anext__(), await stream.__anext__()]
+        finally:
+            await stream.aclose()
+
+    assert client.portal.call(first_events)[1] == RESET_MESSAGE
+
+
+def test_slow_subscriber_is_dropped(client, monkeypatch):
+    monkeypatch.setattr(settings, "EVENTS_CLIENT_BUFFER", 2)
+    local = EventBroadcaster()
+    slow, fast = Subscription(2), Subscription(10)
+    local._subscribers.update({slow, fast})
+
+    for event_id in range(1, 4):
+        local.publish(format_event(event_id, "insert", {"id": str(uuid.uuid4())}))
+
+    # El lento queda fuera con la señal de cierre; el resto sigue recibiendo
+    assert slow not in local._subscribers and slow.queue.get_nowait() is None
+    assert fast in local._subscribers and fast.queue.qsize() == 3
+
+
+def test_replay_includes_events_committed_out_of_order(client):
+    company = client.post("/companies", json={"name": f"OrderCo-{uuid.uuid4().hex[:6]}", "country": "CL"}).json()
+    body = {"company_id": company["id"], "risk_inputs": {}}
+    with SessionLocal() as slow:
+        # La transacción lenta toma su id de evento primero pero confirma después
+        # (otro tramo de riesgo, para no esperar por la misma fila de request_stats)
+        slow.execute(insert(Request).values(company_id=company["id"], risk_inputs={}, risk_score=90))
+        fast = client.post("/requests", json=body).json()
+        slow.commit()
+    seen_last = _last_event_id()  # el cliente recibió primero el evento de `fast`
+
+    async def replay():
+        subscription = await broadcaster.subscribe()
+        stream = event_stream(subscription, seen_last, company["id"])
+        try:
+            await stream.__anext__()
+            return [_parse(await _next_event(stream)) for _ in range(2)]
+        finally:
+            await stream.aclose()
+
+    events = client.portal.call(replay)
+    assert [data["id"] for _, _, data in events][1] == fast["id"]
+    assert events[0][0] < events[1][0] == seen_last
+
+
+def test_bulk_status_change_publishes_a_single_reset(client, monkeypatch):
+    monkeypatch.setattr(settings, "EVENTS_BULK_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "EVENTS_REPLAY_WINDOW", 0)
+    company = client.post("/companies", json={"name": f"BulkCo-{uuid.uuid4().hex[:6]}", "country": "CL"}).json()
+    for _ in range(3):
+        client.post("/requests", json={"company_id": company["id"], "risk_inputs": {}})
+    last_id = _last_event_id()
+
+    body = {"status": "in_review", "filter": {"company_id": company["id"]}}
+    assert len(client.patch("/requests/status", json=body).json()["updated"]) == 3
+    with SessionLocal() as db:
+        ops = db.scalars(select(RequestEvent.op).where(RequestEvent.id > last_id)).all()
+    assert ops == ["reset"]
+
+    # El reset no tiene company_id pero llega también a los clientes filtrados
+    async def replay():
+        subscription = await broadcaster.subscribe()
+        stream = event_stream(subscription, last_id, company["id"])
+        try:
+            await stream.__anext__()
+            return await _next_event(stream)
+        finally:
+            await stream.aclose()
+
+    event_id, op, data = _parse(client.portal.call(replay))
+    assert event_id > last_id and op == "reset" and data == {}
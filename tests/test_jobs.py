@@ -0,0 +1,128 @@
+import uuid
+
+from sqlalchemy import delete, insert, text
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.models.job import Job, JobStatus
+from app.models.rescore import RescoreRun, RescoreStatus
+from app.services import jobs
+from app.services.rescore import RESCORE_LOCK_KEY
+
+
+@jobs.handler("test.echo")
+def _echo(payload):
+    return {"echo": payload["value"]}
+
+
+@jobs.handler("test.broken")
+def _broken(payload):
+    raise RuntimeError("boom")
+
+
+def test_jobs_require_admin(client):
+    assert client.post("/jobs/", json={"kind": "test.echo"}).status_code == 401
+    assert client.get(f"/jobs/{uuid.uuid4()}").status_code == 401
+
+
+def test_submit_and_poll_job(client, admin_headers):
+    headers = admin_headers
+    assert client.post("/jobs/", json={"kind": "nope"}, headers=headers).status_code == 422
+
+    response = client.post("/jobs/", json={"kind": "test.echo", "payload": {"value": 7}}, headers=headers)
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued"
+
+    assert jobs.run_pending(kinds=["test.echo"]) >= 1
+    done = client.get(f"/jobs/{job['id']}", headers=headers).json()
+    assert done["status"] == "succeeded"
+    assert done["attempts"] == 1
+    assert done["result"] == {"echo": 7}
+    assert client.get(f"/jobs/{uuid.uuid4()}", headers=headers).status_code == 404
+
+
+def test_failed_job_is_retried_until_max_attempts(client, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 0)
+    job_id = uuid.uuid4()
+    with SessionLocal() as db:
+        db.execute(insert(Job), [{"id": job_id, "kind": "test.broken", "payload": {}, "max_attempts": 3}])
+        db.commit()
+
+    assert jobs.run_pending(kinds=["test.broken"]) == 3
+    with SessionLocal() as db:
+        job = db.get(Job, job_id)
+        assert job.status.value == "failed"
+        assert job.attempts == 3
+        assert job.error == "RuntimeError: boom"
+        assert job.locked_by is None
+
+
+def test_workers_skip_locked_jobs(client):
+    kind = f"test.skip-{uuid.uuid4().hex[:6]}"
+    with SessionLocal() as db:
+        db.execute(insert(Job), [{"id": uuid.uuid4(), "kind": kind, "payload": {}} for _ in range(2)])
+        db.commit()
+
+    # Dos workers con la transacción abierta no se bloquean ni toman el mismo trabajo
+    with engine.connect() as first, engine.connect() as second, engine.connect() as third:
+        a = jobs.claim_job(first, "a", [kind])
+        b = jobs.claim_job(second, "b", [kind])
+        assert a is not None and b is not None and a.id != b.id
+        assert jobs.claim_job(third, "c", [kind]) is None
+        first.rollback()
+        second.rollback()
+
+    with SessionLocal() as db:
+        db.execute(delete(Job).where(Job.kind == kind))
+        db.commit()
+
+
+def test_expired_lease_returns_job_to_queue(client):
+    from datetime import datetime, timedelta
+
+    kind = f"test.lease-{uuid.uuid4().hex[:6]}"
+    stale = datetime.utcnow() - timedelta(seconds=settings.JOB_LEASE_SECONDS + 1)
+    retry_id, exhausted_id = uuid.uuid4(), uuid.uuid4()
+    with SessionLocal() as db:
+        db.execute(insert(Job), [
+            {"id": retry_id, "kind": kind, "payload": {}, "status": "running", "attempts": 1,
+             "max_attempts": 3, "locked_by": "dead", "locked_at": stale},
+            {"id": exhausted_id, "kind": kind, "payload": {}, "status": "running", "attempts": 3,
+             "max_attempts": 3, "locked_by": "dead", "locked_at": stale},
+        ])
+        db.commit()
+
+    with engine.begin() as conn:
+        assert jobs.requeue_stale_jobs(conn) >= 2
+    with SessionLocal() as db:
+        assert db.get(Job, retry_id).status.value == "queued"
+        assert db.get(Job, exhausted_id).status.value == "failed"
+        db.execute(delete(Job).where(Job.kind == kind))
+        db.commit()
+
+
+def test_rescore_job_retries_the_same_run_while_locked(client, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 0)
+    job_id = uuid.uuid4()
+    with SessionLocal() as db:
+        db.execute(insert(Job), [{"id": job_id, "kind": "rescore", "max_attempts": 3,
+                                  "payload": {"chunk_size": 1000, "workers": 1, "max_rows_per_second": 0}}])
+        db.commit()
+
+    # Con otra ejecución en curso el trabajo falla y vuelve a la cola con su run_id
+    with engine.connect() as other:
+        other.execute(text("SELECT pg_advisory_lock(:key)"), {"key": RESCORE_LOCK_KEY})
+        assert jobs.run_one("test-worker", kinds=["rescore"])
+        other.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RESCORE_LOCK_KEY})
+    with SessionLocal() as db:
+        job = db.get(Job, job_id)
+        assert job.status == JobStatus.queued and "RescoreLockBusy" in job.error
+        run_id = job.payload["run_id"]
+
+    assert jobs.run_pending(kinds=["rescore"]) >= 1
+    with SessionLocal() as db:
+        job = db.get(Job, job_id)
+        assert job.status == JobStatus.succeeded
+        assert job.result == {"rescore_run_id": run_id}
+        assert db.get(RescoreRun, uuid.UUID(run_id)).status == RescoreStatus.completed
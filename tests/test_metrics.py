@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import uuid
+
+from app.config import settings
+from app.services.instrumentation import RequestMetricsMiddleware
+from app.services.metrics import HTTP_REQUESTS_IN_FLIGHT
+
+def test_metrics_exposes_pool_checkout_wait(client):
+    # Cualquier ruta con base de datos registra la espera en el pool
+    assert client.get("/companies").status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "db_pool_checkout_seconds_count" in response.text
+    assert "db_pool_connections_in_use" in response.text
+
+
+def test_metrics_per_route_latency_and_sql(client):
+    company = client.post("/companies", json={"name": f"Metrics-{uuid.uuid4().hex[:6]}"}).json()
+    assert client.get(f"/companies/{company['id']}").status_code == 200
+
+    text = client.get("/metrics").text
+    # Etiquetas por plantilla de ruta, no por URL concreta
+    assert 'http_request_duration_seconds_count{method="GET",route="/companies/{company_id}",status="200"}' in text
+    assert company["id"] not in text
+    assert 'http_request_sql_statements_count{method="GET",route="/companies/{company_id}"}' in text
+    assert "http_requests_in_flight" in text
+
+
+def test_slow_requests_are_logged_with_sql(client, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_REQUEST_SECONDS", 0.000001)
+    with caplog.at_level(logging.WARNING, logger="app.services.instrumentation"):
+        assert client.get("/companies/", params={"page_size": 1}).status_code == 200
+    message = next(r.getMessage() for r in caplog.records if "Slow request" in r.getMessage())
+    assert "GET /companies/ -> 200" in message
+    assert "FROM companies" in message
+
+
+def test_event_streams_are_not_timed(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_REQUEST_SECONDS", 0.000001)
+    in_flight = []
+
+    async def sse_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream; charset=utf-8")]})
+        # Mientras el stream sigue abierto ya no cuenta como petición en curso
+        in_flight.append(HTTP_REQUESTS_IN_FLIGHT._value.get())
+        await send({"type": "http.response.body", "body": b"retry: 3000\n\n", "more_body": False})
+
+    async def send(message):
+        pass
+
+    before = HTTP_REQUESTS_IN_FLIGHT._value.get()
+    scope = {"type": "http", "method": "GET", "path": "/requests/events"}
+    with caplog.at_level(logging.WARNING, logger="app.services.instrumentation"):
+        asyncio.run(RequestMetricsMiddleware(sse_app)(scope, None, send))
+    assert in_flight == [before]
+    assert HTTP_REQUESTS_IN_FLIGHT._value.get() == before
+    assert not any("Slow request" in r.getMessage() for r in caplog.records)
@@ -0,0 +1,71 @@
+import gzip
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import func, insert, select, text, update
+
+from app.api.requests import apply_request_filters
+from app.db import SessionLocal, engine
+from app.models.company import Company
+from app.models.event import RequestEvent
+from app.models.request import Request, RequestStatus
+from app.models.stats import RequestStats
+from app.services.partitions import apply_retention, ensure_partitions
+
+
+def _partition_of(db, request_id):
+    return db.scalar(text("SELECT tableoid::regclass::text FROM requests WHERE id = :id"), {"id": request_id})
+
+
+def test_old_month_is_partitioned_then_archived(client, tmp_path):
+    company_id = uuid.uuid4()
+    approved, pending = uuid.uuid4(), uuid.uuid4()
+    with SessionLocal() as db:
+        db.execute(insert(Company), [{"id": company_id, "name": f"Partition-{company_id.hex[:6]}"}])
+        db.execute(insert(Request), [
+            {"id": request_id, "company_id": company_id, "status": status, "risk_inputs": {},
+             "risk_score": 0, "created_at": datetime(2001, 3, 15)}
+            for request_id, status in ((approved, RequestStatus.approved), (pending, RequestStatus.pending))
+        ])
+        db.commit()
+        # Sin partición para el mes, las filas caen en la default
+        assert _partition_of(db, approved) == "requests_default"
+        stats_total = db.scalar(select(func.sum(RequestStats.count)))
+        last_event = db.scalar(select(func.max(RequestEvent.id)))
+
+    # Al crear el mes se mueven desde la default sin alterar el rollup ni generar eventos
+    assert ensure_partitions(date(2001, 3, 1), date(2001, 3, 31)) == ["requests_y2001m03"]
+    with SessionLocal() as db:
+        assert _partition_of(db, approved) == "requests_y2001m03"
+        assert db.scalar(select(func.sum(RequestStats.count))) == stats_total
+        assert db.scalar(select(func.max(RequestEvent.id))) == last_event
+
+    # Con solicitudes sin decidir el mes se conserva
+    result = apply_retention(2, str(tmp_path), today=date(2001, 6, 1))
+    assert result == {"archived": [], "skipped": ["requests_y2001m03"]}
+
+    with SessionLocal() as db:
+        db.execute(update(Request).where(Request.id == pending).values(status=RequestStatus.rejected))
+        db.commit()
+    result = apply_retention(2, str(tmp_path), today=date(2001, 6, 1))
+    assert result["skipped"] == []
+    [path] = result["archived"]
+    with gzip.open(path, "rt") as f:
+        lines = f.read().splitlines()
+    assert lines[0].startswith("id,company_id,status")
+    assert {line.split(",")[0] for line in lines[1:]} == {str(approved), str(pending)}
+
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count()).where(Request.company_id == company_id)) == 0
+        assert db.scalar(text("SELECT to_regclass('requests_y2001m03')")) is None
+
+
+def test_date_window_prunes_partitions(client):
+    today = date.today()
+    stmt = apply_request_filters(select(Request.id), created_from=today, created_to=today)
+    compiled = stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        plan = "\n".join(row[0] for row in conn.exec_driver_sql(f"EXPLAIN {compiled}"))
+    scanned = {name for name in ("requests_default", f"requests_y{today.year}m{today.month:02d}") if name in plan}
+    assert scanned == {f"requests_y{today.year}m{today.month:02d}"}, plan
+    assert plan.count(" on requests_") == 1, plan
@@ -0,0 +1,47 @@
+import uuid
+
+from prometheus_client import REGISTRY
+
+import app.db as db
+from app.config import settings
+
+
+def routed(target):
+    return REGISTRY.get_sample_value("db_read_routing_total", {"target": target}) or 0
+
+
+def use_replica(monkeypatch, client, url):
+    replica = db.ReplicaRouter(url)
+    monkeypatch.setattr(db, "replica", replica)
+    client.cookies.clear()
+    return replica
+
+
+def test_reads_go_to_replica_until_client_writes(client, monkeypatch):
+    # El mismo servidor hace de réplica: pg_is_in_recovery() = false, retraso 0
+    replica = use_replica(monkeypatch, client, settings.DATABASE_URL)
+    try:
+        before = routed("replica")
+        assert client.get("/companies").status_code == 200
+        assert routed("replica") == before + 1
+
+        # Tras escribir, el cliente queda pegado al primario
+        response = client.post("/companies", json={"name": f"Sticky-{uuid.uuid4().hex[:6]}", "country": "CL"})
+        assert db.STICKY_COOKIE in response.cookies
+        before = routed("primary")
+        assert client.get(f"/companies/{response.json()['id']}").status_code == 200
+        assert routed("primary") == before + 1
+    finally:
+        client.cookies.clear()
+        client.portal.call(replica.engine.dispose)
+
+
+def test_unreachable_replica_falls_back_to_primary(client, monkeypatch):
+    replica = use_replica(monkeypatch, client, "postgresql+asyncpg://postgres@127.0.0.1:1/appdb")
+    try:
+        before = routed("primary")
+        assert client.get("/requests").status_code == 200
+        assert routed("primary") == before + 1
+        assert not replica._available
+    finally:
+        client.portal.call(replica.engine.dispose)
@@ -1,5 +1,11 @@
+import base64
+import gzip
+import json
 import uuid
 
+from app.config import settings
+
+
 def test_create_request_and_risk_score(client):
     unique_name = f"RiskCo-{uuid.uuid4().hex[:6]}"
     unique_tax_id = f"{uuid.uuid4().hex[:8]}-2"
@@ -25,3 +31,270 @@ def test_create_request_and_risk_score(client):
     assert response.status_code == 201
     req = response.json()
     assert 0 <= req["risk_score"] <= 100   # 👈 validamos tope máximo
+    assert req["risk_rules_version"] == "v1"
+
+    # El puntaje se explica regla por regla con la versión que lo produjo
+    response = client.get(f"/requests/{req['id']}/risk")
+    assert response.status_code == 200
+    explanation = response.json()
+    assert explanation["risk_rules_version"] == "v1"
+    # Las reglas suman 130; el tope de max_score aparece como último aporte
+    assert explanation["contributions"][-1] == {"input": "max_score", "type": "cap", "value": 100, "points": -30}
+    assert sum(c["points"] for c in explanation["contributions"]) == req["risk_score"] == 100
+
+
+def test_list_requests_cursor_pagination(client):
+    company = client.post("/companies", json={
+        "name": f"CursorCo-{uuid.uuid4().hex[:6]}",
+        "tax_id": f"{uuid.uuid4().hex[:8]}-3",
+        "country": "CL"
+    }).json()
+    for late in range(3):
+        client.post("/requests", json={
+            "company_id": company["id"],
+            "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": late}
+        })
+
+    # Primera página con total exacto
+    response = client.get("/requests", params={"company_id": company["id"], "page_size": 2, "total": "exact"})
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "3"
+    first_page = response.json()
+    assert len(first_page) == 2
+    cursor = response.headers["X-Next-Cursor"]
+
+    # La segunda página sigue desde el cursor sin repetir filas
+    response = client.get("/requests", params={"company_id": company["id"], "page_size": 2, "cursor": cursor})
+    assert response.status_code == 200
+    second_page = response.json()
+    assert len(second_page) == 1
+    assert "X-Next-Cursor" not in response.headers
+    assert {r["id"] for r in first_page}.isdisjoint(r["id"] for r in second_page)
+
+    # El listado codifica filas sin response_model: debe coincidir con el detalle
+    for item in first_page + second_page:
+        assert client.get(f"/requests/{item['id']}").json() == item
+
+    response = client.get("/requests", params={"cursor": "no-es-un-cursor"})
+    assert response.status_code == 400
+    # Base64 y JSON válidos pero con elementos que no son strings
+    for values in ([1, {}], [None, 5]):
+        cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+        response = client.get("/requests", params={"cursor": cursor})
+        assert response.status_code == 400
+
+
+def test_bulk_ingest_ndjson_and_csv(client):
+    company = client.post("/companies", json={
+        "name": f"BulkCo-{uuid.uuid4().hex[:6]}",
+        "country": "CL"
+    }).json()
+    missing_company = str(uuid.uuid4())
+
+    # NDJSON: dos líneas válidas, una con empresa inexistente, una mal formada,
+    # una que no es un objeto y una demasiado larga dentro del mismo chunk
+    body = "\n".join([
+        json.dumps({"company_id": company["id"], "risk_inputs": {"pep_flag": True}}),
+        json.dumps({"company_id": company["id"], "risk_inputs": {"late_payments": 2}}),
+        json.dumps({"company_id": missing_company, "risk_inputs": {}}),
+        "{no es json",
+        "[1, 2]",
+        json.dumps({"company_id": company["id"], "risk_inputs": {}, "pad": "x" * 70000}),
+        "",
+    ])
+    response = client.post("/requests/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["received"] == 6
+    assert result["inserted"] == 2
+    assert result["failed"] == 4
+    errors = {e["line"]: e["error"] for e in result["errors"]}
+    assert set(errors) == {3, 4, 5, 6}
+    assert errors[5] == "Line must be a JSON object"
+    assert errors[6] == "Line too long"
+
+    body = "company_id,pep_flag,sanction_list,late_payments\n" \
+           f"{company['id']},false,true,1\n" \
+           f"{company['id']},maybe,false,0\n"
+    response = client.post("/requests/bulk", content=body, headers={"Content-Type": "text/csv"})
+    result = response.json()
+    assert result["inserted"] == 1
+    assert result["errors"][0]["line"] == 3
+
+    # Cabecera con BOM (UTF-8 de Excel)
+    body = f"\ufeffcompany_id,late_payments\n{company['id']},0\n".encode("utf-8")
+    result = client.post("/requests/bulk", content=body, headers={"Content-Type": "text/csv"}).json()
+    assert result["inserted"] == 1 and result["failed"] == 0
+
+    # Sin company_id en la cabecera se rechaza la carga entera
+    body = f"empresa,late_payments\n{company['id']},0\n"
+    response = client.post("/requests/bulk", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "CSV header must include company_id"
+
+    scores = sorted(r["risk_score"] for r in client.get("/requests", params={"company_id": company["id"]}).json())
+    assert scores == [0, 20, 50, 60]
+
+
+def test_bulk_ingest_chunk_above_parameter_limit(client, monkeypatch):
+    # 6000 filas x 6 columnas superan los 32767 parámetros de una sola sentencia
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 6000)
+    company = client.post("/companies", json={"name": f"ChunkCo-{uuid.uuid4().hex[:6]}"}).json()
+    line = json.dumps({"company_id": company["id"], "risk_inputs": {}})
+    body = "\n".join([line] * 6000)
+    response = client.post("/requests/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 6000
+
+
+def test_request_stats_follow_writes(client):
+    company = client.post("/companies", json={
+        "name": f"StatsCo-{uuid.uuid4().hex[:6]}",
+        "country": "PE"
+    }).json()
+
+    def stats():
+        response = client.get("/requests/stats")
+        assert response.status_code == 200
+        data = response.json()
+        histogram = {b["min_score"]: b["count"] for b in data["risk_histogram"]}
+        return data["by_status"].get("pending", 0), histogram, data["by_country"].get("PE", 0)
+
+    pending, histogram, peru = stats()
+    created = [
+        client.post("/requests", json={"company_id": company["id"], "risk_inputs": inputs}).json()
+        for inputs in ({"pep_flag": True}, {"pep_flag": True, "sanction_list": True})
+    ]
+
+    new_pending, new_histogram, new_peru = stats()
+    assert new_pending == pending + 2
+    assert new_peru == peru + 2
+    assert new_histogram[60] == histogram[60] + 1
+    assert new_histogram[100] == histogram[100] + 1
+
+    # Actualizar y borrar también se reflejan en el rollup
+    client.put(f"/requests/{created[0]['id']}", json={"status": "approved"})
+    client.delete(f"/requests/{created[1]['id']}")
+    final_pending, final_histogram, _ = stats()
+    assert final_pending == pending
+    assert final_histogram[100] == histogram[100]
+
+
+def test_export_streams_filtered_rows(client):
+    company = client.post("/companies", json={
+        "name": f"ExportCo-{uuid.uuid4().hex[:6]}",
+        "country": "CL"
+    }).json()
+    for late in range(3):
+        client.post("/requests", json={"company_id": company["id"], "risk_inputs": {"late_payments": late}})
+
+    response = client.get("/requests/export", params={"format": "ndjson", "company_id": company["id"]})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(r["risk_score"] for r in rows) == [0, 10, 20]
+    assert {r["company_id"] for r in rows} == {company["id"]}
+
+    # CSV comprimido al vuelo
+    response = client.get("/requests/export", params={"company_id": company["id"], "compress": True})
+    assert response.headers["content-type"] == "application/gzip"
+    lines = gzip.decompress(response.content).decode().splitlines()
+    assert lines[0].startswith("id,company_id,status")
+    assert len(lines) == 4
+
+
+def test_risk_inputs_are_strict_and_filterable(client):
+    company = client.post("/companies", json={
+        "name": f"InputsCo-{uuid.uuid4().hex[:6]}",
+        "country": "CL"
+    }).json()
+
+    # Sin coerción ni claves desconocidas
+    # ni valores que no caben en la columna generada (integer)
+    for inputs in ({"pep_flag": "yes"}, {"late_payments": "2"}, {"late_payments": -1}, {"country": "CL"},
+                   {"late_payments": 10_001}, {"late_payments": 2 ** 31}, {"late_payments": 2 ** 64}):
+        response = client.post("/requests", json={"company_id": company["id"], "risk_inputs": inputs})
+        assert response.status_code == 422, inputs
+
+    for inputs in ({"pep_flag": True}, {"sanction_list": True, "late_payments": 2}, {"late_payments": 4}):
+        response = client.post("/requests", json={"company_id": company["id"], "risk_inputs": inputs})
+        assert response.status_code == 201
+    # Los inputs se guardan normalizados, con los valores por defecto
+    assert response.json()["risk_inputs"] == {"pep_flag": False, "sanction_list": False, "late_payments": 4}
+
+    def scores(**params):
+        response = client.get("/requests", params={"company_id": company["id"], **params})
+        assert response.status_code == 200
+        return sorted(r["risk_score"] for r in response.json())
+
+    assert scores(pep_flag=True) == [60]
+    assert scores(sanction_list=True, pep_flag=False) == [60]
+    assert scores(late_payments_min=2) == [30, 60]
+    assert scores(late_payments_min=1, late_payments_max=3) == [60]
+    response = client.get("/requests", params={"late_payments_min": 2 ** 31})
+    assert response.status_code == 422
+
+    # En la carga masiva es un error de esa línea, no del chunk entero
+    body = "\n".join(
+        json.dumps({"company_id": company["id"], "risk_inputs": {"late_payments": late}}) for late in (1, 2 ** 64)
+    )
+    result = client.post("/requests/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}).json()
+    assert result["inserted"] == 1
+    assert [e["line"] for e in result["errors"]] == [2]
+
+
+def test_list_requests_expand_company(client):
+    name = f"ExpandCo-{uuid.uuid4().hex[:6]}"
+    company = client.post("/companies", json={"name": name, "country": "PE"}).json()
+    req = client.post("/requests", json={"company_id": company["id"], "risk_inputs": {}}).json()
+
+    plain = client.get("/requests", params={"company_id": company["id"]}).json()
+    assert "company" not in plain[0]
+
+    # La proyección viene en la misma fila, también combinada con q (que ya une companies)
+    for params in ({"company_id": company["id"]}, {"q": name}):
+        response = client.get("/requests", params={**params, "expand": "company"})
+        assert response.status_code == 200
+        [item] = response.json()
+        assert item["id"] == req["id"]
+        assert item["company"] == {"id": company["id"], "name": name, "country": "PE"}
+
+    assert client.get("/requests", params={"expand": "owner"}).status_code == 422
+
+
+def test_bulk_status_change_follows_state_machine(client):
+    company = client.post("/companies", json={"name": f"StatusCo-{uuid.uuid4().hex[:6]}", "country": "CL"}).json()
+    ids = [
+        client.post("/requests", json={"company_id": company["id"], "risk_inputs": {}}).json()["id"]
+        for _ in range(4)
+    ]
+    missing = str(uuid.uuid4())
+
+    response = client.patch("/requests/status", json={"status": "approved", "ids": ids[:1]})
+    assert response.json()["updated"] == ids[:1]
+
+    # pending -> in_review; approved es final y el resto se informa con su motivo
+    response = client.patch("/requests/status", json={"status": "in_review", "ids": ids + [missing]})
+    assert response.status_code == 200
+    result = response.json()
+    assert sorted(result["updated"]) == sorted(ids[1:])
+    assert result["skipped"] == [
+        {"id": ids[0], "status": "approved", "reason": "transition_not_allowed"},
+        {"id": missing, "status": None, "reason": "not_found"},
+    ]
+    response = client.patch("/requests/status", json={"status": "in_review", "ids": ids[1:2]})
+    assert response.json()["skipped"] == [{"id": ids[1], "status": "in_review", "reason": "unchanged"}]
+
+    # Con filtro, por lotes de `limit`; la versión (ETag) avanza
+    body = {"status": "rejected", "filter": {"company_id": company["id"], "status": "in_review"}, "limit": 2}
+    assert len(client.patch("/requests/status", json=body).json()["updated"]) == 2
+    assert len(client.patch("/requests/status", json=body).json()["updated"]) == 1
+    assert client.patch("/requests/status", json=body).json()["updated"] == []
+    assert client.get(f"/requests/{ids[1]}").headers["ETag"] == '"v3"'
+
+    # PUT respeta las mismas reglas
+    response = client.put(f"/requests/{ids[1]}", json={"status": "pending"})
+    assert response.status_code == 409
+
+    for body in ({"status": "approved"}, {"status": "approved", "filter": {}},
+                 {"status": "approved", "ids": ids, "filter": {"status": "pending"}}):
+        assert client.patch("/requests/status", json=body).status_code == 422
@@ -0,0 +1,131 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select, text, update
+
+from app.db import SessionLocal, engine
+from app.models.company import Company
+from app.models.job import Job, JobStatus
+from app.models.request import Request
+from app.models.rescore import RescoreRun, RescoreStatus
+from app.services import jobs
+from app.services.risk import calculate_risk
+from app.services.rescore import (
+    RESCORE_LOCK_KEY, SCORE_COLUMNS, RescoreLockBusy, _score_chunk, _write_chunk, fail_stale_runs, run_rescore,
+    start_run,
+)
+
+
+def test_rescore_fixes_stale_scores(client):
+    company_id = uuid.uuid4()
+    stale = {uuid.uuid4(): {"pep_flag": True, "late_payments": 1} for _ in range(5)}
+    with SessionLocal() as db:
+        db.execute(insert(Company), [{"id": company_id, "name": f"Rescore-{company_id.hex[:6]}"}])
+        # Puntajes desactualizados a propósito
+        db.execute(insert(Request), [
+            {"id": request_id, "company_id": company_id, "risk_inputs": inputs, "risk_score": 0}
+            for request_id, inputs in stale.items()
+        ])
+        db.commit()
+
+    run = start_run()
+    run_rescore(run.id, chunk_size=1000, workers=2, max_rows_per_second=0)
+
+    with SessionLocal() as db:
+        finished = db.get(RescoreRun, run.id)
+        assert finished.status == RescoreStatus.completed
+        assert finished.processed >= len(stale)
+        assert finished.updated >= len(stale)
+        scores = db.scalars(select(Request.risk_score).where(Request.company_id == company_id)).all()
+        assert scores == [70] * len(stale)
+
+
+def test_rescore_does_not_overwrite_concurrent_writes(client):
+    company_id, request_id = uuid.uuid4(), uuid.uuid4()
+    with SessionLocal() as db:
+        db.execute(insert(Company), [{"id": company_id, "name": f"Conflict-{company_id.hex[:6]}"}])
+        db.execute(insert(Request), [{"id": request_id, "company_id": company_id,
+                                      "risk_inputs": {"pep_flag": True}, "risk_score": 0}])
+        db.commit()
+        chunk = [tuple(db.execute(select(*SCORE_COLUMNS).where(Request.id == request_id)).one())]
+
+    # Un PUT confirma entre la lectura del re-scoring y su escritura
+    new_inputs = {"sanction_list": True, "late_payments": 1}
+    with SessionLocal() as db:
+        db.execute(update(Request).where(Request.id == request_id).values(
+            risk_inputs=new_inputs, version=Request.version + 1
+        ))
+        db.commit()
+
+    run = start_run()
+    _write_chunk(run.id, chunk, _score_chunk(chunk))
+    with SessionLocal() as db:
+        row = db.execute(select(Request.risk_score, Request.version).where(Request.id == request_id)).one()
+        # El puntaje sale de los datos nuevos, no del snapshot
+        assert tuple(row) == (calculate_risk(new_inputs), 3)
+        finished = db.get(RescoreRun, run.id)
+        assert (finished.updated, finished.conflicts) == (1, 1)
+        finished.status = RescoreStatus.failed
+        db.commit()
+
+
+def test_rescore_endpoint_requires_admin(client):
+    assert client.post("/admin/rescore").status_code == 401
+
+
+def test_rescore_lock_busy_and_stale_runs(client):
+    run = start_run()
+    with engine.connect() as other:
+        # Otra ejecución en curso: la pedida no arranca ni toca el estado de
+        # la ejecución (podría ser la misma que tiene el lock)
+        other.execute(text("SELECT pg_advisory_lock(:key)"), {"key": RESCORE_LOCK_KEY})
+        with pytest.raises(RescoreLockBusy):
+            run_rescore(run.id)
+        assert fail_stale_runs() == 0
+        other.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RESCORE_LOCK_KEY})
+
+    with SessionLocal() as db:
+        assert db.get(RescoreRun, run.id).status == RescoreStatus.running
+    run_rescore(run.id, chunk_size=1000, workers=1, max_rows_per_second=0)
+
+    # Una ejecución en running sin lock ni avance (el proceso murió) se da por fallida
+    crashed, fresh = start_run(), start_run()
+    with SessionLocal() as db:
+        db.execute(
+            update(RescoreRun).where(RescoreRun.id == crashed.id)
+            .values(updated_at=datetime.utcnow() - timedelta(hours=1))
+        )
+        db.commit()
+    assert fail_stale_runs() >= 1
+    with SessionLocal() as db:
+        assert db.get(RescoreRun, crashed.id).status == RescoreStatus.failed
+        assert db.get(RescoreRun, fresh.id).status == RescoreStatus.running
+    run_rescore(fresh.id, chunk_size=1000, workers=1, max_rows_per_second=0)
+
+
+def test_resume_rejects_a_running_run(client, admin_headers):
+    run = start_run()
+    # Retomarla lanzaría un segundo intento contra la ejecución que tiene el lock
+    response = client.post(f"/admin/rescore/{run.id}/resume", headers=admin_headers)
+    assert response.status_code == 409
+    with SessionLocal() as db:
+        db.execute(update(RescoreRun).where(RescoreRun.id == run.id).values(status=RescoreStatus.failed))
+        db.commit()
+
+
+def test_rescore_endpoint_enqueues_a_job(client, admin_headers):
+    response = client.post("/admin/rescore", headers=admin_headers)
+    assert response.status_code == 202
+    started = response.json()
+    assert started["status"] == "running"
+    # Mientras el trabajo espera en la cola la ejecución cuenta como en curso
+    assert client.post("/admin/rescore", headers=admin_headers).status_code == 409
+
+    with SessionLocal() as db:
+        job = db.get(Job, uuid.UUID(started["job_id"]))
+        assert job.kind == "rescore" and job.payload == {"run_id": started["id"]}
+    assert jobs.run_pending(kinds=["rescore"]) >= 1
+    with SessionLocal() as db:
+        assert db.get(Job, job.id).status == JobStatus.succeeded
+        assert db.get(RescoreRun, uuid.UUID(started["id"])).status == RescoreStatus.completed
@@ -0,0 +1,52 @@
+import pytest
+from hypothesis import given, strategies as st
+
+from app.services.risk import calculate_risk, calculate_risk_batch, calculate_risk_many, compile_ruleset
+
+risk_inputs = st.fixed_dictionaries(
+    {},
+    optional={
+        "pep_flag": st.booleans(),
+        "sanction_list": st.booleans(),
+        "late_payments": st.integers(min_value=-1000, max_value=1000),
+    },
+)
+
+
+@given(st.lists(risk_inputs, max_size=200))
+def test_batch_matches_scalar(inputs):
+    # La versión vectorizada debe dar exactamente lo mismo que la escalar
+    assert calculate_risk_many(inputs) == [calculate_risk(i) for i in inputs]
+
+
+def test_batch_columns():
+    scores = calculate_risk_batch([True, False, True], [True, True, False], [3, 0, 1])
+    assert scores.tolist() == [100, 40, 70]
+
+
+def test_compiled_ruleset_with_lookup():
+    ruleset = compile_ruleset({
+        "version": "test",
+        "max_score": 100,
+        "rules": [
+            {"input": "pep_flag", "type": "flag", "weight": 60},
+            {"input": "late_payments", "type": "count", "weight": 10, "cap": 30},
+            {"input": "country", "type": "lookup", "weights": {"VE": 25}, "default": 5},
+        ],
+    })
+    inputs = [
+        {"pep_flag": True, "late_payments": 5, "country": "VE"},
+        {"country": "CL"},
+        {},
+    ]
+    assert [ruleset.score(i) for i in inputs] == [100, 5, 5]
+    columns = {key: [i.get(key) for i in inputs] for key in ("pep_flag", "country")}
+    columns["late_payments"] = [i.get("late_payments", 0) for i in inputs]
+    assert ruleset.score_columns(columns).tolist() == [100, 5, 5]
+    assert [c["points"] for c in ruleset.explain(inputs[0])] == [60, 30, 25, -15]
+    assert [c["points"] for c in ruleset.explain(inputs[1])] == [0, 0, 5]
+
+
+def test_invalid_ruleset_is_rejected():
+    with pytest.raises(ValueError):
+        compile_ruleset({"version": "bad", "max_score": 100, "rules": [{"input": "x", "type": "eval"}]})
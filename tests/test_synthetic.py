@@ -0,0 +1,26 @@
+import json
+from datetime import datetime
+
+from app.services import synthetic
+from app.services.risk import calculate_risk
+
+
+def test_company_rows_are_deterministic():
+    rows = synthetic.company_rows(seed=7, count=50)
+    assert rows == synthetic.company_rows(seed=7, count=50)
+    assert rows != synthetic.company_rows(seed=8, count=50)
+    assert len({name for _, name, _, _ in rows}) == 50
+
+
+def test_request_chunks_are_deterministic_and_scored():
+    synthetic._init_worker([row[0] for row in synthetic.company_rows(seed=7, count=10)])
+    until = datetime(2026, 1, 1)
+    chunk = synthetic.request_chunk(seed=7, index=3, size=200, until=until, days=30)
+    assert chunk == synthetic.request_chunk(seed=7, index=3, size=200, until=until, days=30)
+    assert chunk != synthetic.request_chunk(seed=7, index=4, size=200, until=until, days=30)
+
+    for line in chunk.splitlines():
+        _, _, status, risk_inputs, score, _, created_at = line.split("\t")
+        assert status in synthetic.STATUSES
+        assert int(score) == calculate_risk(json.loads(risk_inputs))
+        assert datetime.fromisoformat(created_at) <= until